@@ -1,13 +1,44 @@
 from __future__ import annotations
 
-from shared_state import SharedState
+import os
+import time
+from collections.abc import Mapping
+
+from agents.writer import DETERMINISTIC_TASKS
+from shared_state import EvidenceNote, SharedState
+from retrieval.retriever import get_document_text, get_index_version, record_fetches, search_docs
+from retrieval.research_utils import merge_adjacent_results
 from tasks.registry import get_research_plan
+from writer.evidence_packer import count_tokens
+
+
+# Verifier-driven re-retrieval (verifier -> researcher_retry -> writer -> verifier).
+# A retry only starts while the run is younger than the time budget, adds at most the
+# token budget of new evidence, and its writer -> verifier pass must finish within the
+# same budget (meta["verifier_retry"]["deadline"], see agents/writer.py).
+VERIFY_RETRY_MAX = int(os.getenv("VERIFY_RETRY_MAX", "1"))
+VERIFY_RETRY_TIME_BUDGET_S = float(os.getenv("VERIFY_RETRY_TIME_BUDGET_S", "20"))
+VERIFY_RETRY_TOKEN_BUDGET = int(os.getenv("VERIFY_RETRY_TOKEN_BUDGET", "1500"))
+VERIFY_RETRY_TOP_K = 5
+
+
+def _quote(text: str) -> str:
+    quote = (text or "").replace("\n", " ").strip()
+    if len(quote) > 260:
+        quote = quote[:260] + "..."
+    return quote
 
 
 def _normalize_results_to_notes(results: list[dict]) -> list[dict]:
     """
     Convert retriever results -> SharedState.research_notes shape:
-      [{"claim": <full chunk text>, "citations": [{"source_id","quote","location"}]}]
+      [{"claim": <full chunk text>, "citations": [{"source_id","quote","location"}],
+        "score": <retrieval distance>, "span": {"doc_id","start","end"}}]
+    score/span are optional and only used by the writer's evidence packer.
+    Notes whose text is found in the indexed documents are EvidenceNote references
+    (claim sliced from the shared document text) instead of private copies.
+    Merged results (see merge_adjacent_results) get one citation per merged chunk,
+    each with the chunk's char offset inside the claim.
     """
     notes: list[dict] = []
 
@@ -16,17 +47,43 @@ def _normalize_results_to_notes(results: list[dict]) -> list[dict]:
         if not content:
             continue
 
-        quote = content.replace("\n", " ").strip()
-        if len(quote) > 260:
-            quote = quote[:260] + "..."
+        parts = r.get("parts") or []
+        if parts:
+            citations = [
+                {
+                    "source_id": (p.get("source_id") or "unknown_source").strip(),
+                    "quote": _quote(p.get("content") or ""),
+                    "location": (p.get("locator") or "unknown location").strip(),
+                    "offset": int(p.get("offset") or 0),
+                }
+                for p in parts
+            ]
+            citations[0]["location"] = (r.get("locator") or citations[0]["location"]).strip()
+        else:
+            citations = [{
+                "source_id": (r.get("source_id") or "unknown_source").strip(),
+                "quote": _quote(content),
+                "location": (r.get("locator") or "unknown location").strip(),
+            }]
+
+        score = float(r["score"]) if isinstance(r.get("score"), (int, float)) else None
 
-        citation = {
-            "source_id": (r.get("source_id") or "unknown_source").strip(),
-            "quote": quote,
-            "location": (r.get("locator") or "unknown location").strip(),
-        }
+        md = r.get("metadata") or {}
+        doc_id = md.get("doc_id")
+        start = md.get("start_index")
+        if doc_id and isinstance(start, int):
+            end = start + len(content)
+            if get_document_text(doc_id)[start:end] == content:
+                notes.append(EvidenceNote(doc_id, start, end, citations, score, index_version=get_index_version()))
+                continue
 
-        notes.append({"claim": content, "citations": [citation]})
+        # text not addressable in the index (e.g. legacy metadata): keep a plain copy
+        note = {"claim": content, "citations": citations}
+        if score is not None:
+            note["score"] = score
+        if doc_id and isinstance(start, int):
+            note["span"] = {"doc_id": doc_id, "start": start, "end": start + len(content)}
+        notes.append(note)
 
     return notes
 
@@ -57,7 +114,8 @@ def researcher_agent(state: SharedState) -> SharedState:
     plan = get_research_plan(state.task_key or "")
 
     try:
-        results = plan.retrieve(query)
+        with record_fetches() as fetches:
+            results = plan.retrieve(query)
     except Exception as e:
         state.research_notes = [{
             "claim": "Not found in the sources.",
@@ -78,10 +136,15 @@ def researcher_agent(state: SharedState) -> SharedState:
         }]
         outcome = "No relevant documents retrieved"
     else:
+        raw_count = len(results)
+        if plan.merge_adjacent:
+            results = merge_adjacent_results(results)
         notes = _normalize_results_to_notes(results)
         if notes:
             state.research_notes = notes
-            outcome = f"Retrieved {len(notes)} chunks"
+            outcome = f"Retrieved {raw_count} chunks"
+            if len(notes) != raw_count:
+                outcome += f" (merged into {len(notes)} spans)"
         else:
             state.research_notes = [{
                 "claim": "Not found in the sources.",
@@ -103,7 +166,13 @@ def researcher_agent(state: SharedState) -> SharedState:
         "retrieved_count": len(state.research_notes),
         "action_label": plan.action_label,
         "has_postprocess": bool(plan.postprocess),
+        "fetches": fetches,
     }
+    if fetches:
+        outcome += "; FAISS fetch " + ", ".join(
+            f"{f['n_fetch']} ({f['fetch_mode']}" + (f", {f['fetch_rounds']} rounds)" if f["fetch_rounds"] > 1 else ")")
+            for f in fetches
+        )
 
     state.trace.append({
         "step": "research",
@@ -112,3 +181,88 @@ def researcher_agent(state: SharedState) -> SharedState:
         "outcome": outcome,
     })
     return state
+
+
+def _run_elapsed_s(state: SharedState) -> float:
+    started = state.meta.get("run_started_at")
+    return time.time() - started if isinstance(started, (int, float)) else 0.0
+
+
+def should_retry(state: SharedState) -> bool:
+    """
+    The verifier blocked the draft, left delta queries, and the retry budget
+    (attempts + run time) is not spent. Deterministic writers render the same
+    template from whatever evidence they get, so their runs are not retried.
+    """
+    if not state.verification_notes:
+        return False
+    if (state.task_key or "").strip() in DETERMINISTIC_TASKS:
+        return False
+    retry = state.meta.get("verifier_retry") or {}
+    if not retry.get("queries"):
+        return False
+    if retry.get("abandoned") or int(retry.get("attempts", 0)) >= VERIFY_RETRY_MAX:
+        return False
+    return _run_elapsed_s(state) < VERIFY_RETRY_TIME_BUDGET_S
+
+
+def researcher_retry_agent(state: SharedState) -> SharedState:
+    """
+    Targeted second pass: run only the verifier's delta queries, keep every note
+    from the first pass, and append chunks not retrieved yet until the token
+    budget is spent. Query embeddings are cached by the retriever, so a delta
+    query equal to the first-pass query costs no embedding call.
+    """
+    retry = dict(state.meta.get("verifier_retry") or {})
+    queries = list(retry.get("queries") or [])
+    notes = list(state.research_notes or [])
+
+    seen = {
+        c.get("source_id")
+        for n in notes if isinstance(n, Mapping)
+        for c in (n.get("citations") or []) if isinstance(c, dict)
+    }
+
+    new_results: list[dict] = []
+    issued = 0
+    for q in queries:
+        if _run_elapsed_s(state) >= VERIFY_RETRY_TIME_BUDGET_S:
+            break
+        issued += 1
+        try:
+            results = search_docs(q, top_k=VERIFY_RETRY_TOP_K)
+        except Exception:
+            continue
+        for r in results:
+            sid = r.get("source_id")
+            if sid and sid not in seen:
+                seen.add(sid)
+                new_results.append(r)
+
+    added: list = []
+    tokens = 0
+    for n in _normalize_results_to_notes(merge_adjacent_results(new_results)):
+        cost = count_tokens(n.get("claim") or "")
+        if tokens + cost > VERIFY_RETRY_TOKEN_BUDGET:
+            break
+        added.append(n)
+        tokens += cost
+
+    if added:
+        state.research_notes = notes + added
+
+    retry["attempts"] = int(retry.get("attempts", 0)) + 1
+    started = state.meta.get("run_started_at")
+    if isinstance(started, (int, float)):
+        retry["deadline"] = started + VERIFY_RETRY_TIME_BUDGET_S
+    retry["added_notes"] = len(added)
+    retry["added_tokens"] = tokens
+    state.meta["verifier_retry"] = retry
+
+    state.trace.append({
+        "step": "research_retry",
+        "agent": "researcher",
+        "action": f"Targeted re-retrieval for {len(queries)} unsupported section(s)",
+        "outcome": f"Issued {issued} delta queries; added {len(added)} new notes ({tokens} tokens)",
+    })
+    return state
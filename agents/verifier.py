@@ -1,11 +1,35 @@
 from __future__ import annotations
 
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Optional
+
+from retrieval.anchors import get_anchor_source_ids
+from retrieval.retriever import get_source_ids
 from shared_state import SharedState
 
 
+NO_EVIDENCE_PROBLEM = "No citations found in research_notes. Output must be 'Not found in sources'."
+
+
+def _blocked_final_output(problems: list[str]) -> str:
+    return (
+        "## Deliverable Package\n\n"
+        "### Executive Summary\n"
+        "- Not found in sources.\n\n"
+        "---\n"
+        "## Verification\n"
+        + "\n".join(f"- {p}" for p in problems)
+    )
+
+
+# Precomputed verdict for runs whose retrieval produced no cited evidence.
+NOT_FOUND_FINAL_OUTPUT = _blocked_final_output([NO_EVIDENCE_PROBLEM])
+
+
 def _has_any_citations(notes: list[dict]) -> bool:
     for n in notes or []:
-        if not isinstance(n, dict):
+        if not isinstance(n, Mapping):
             continue
         cits = n.get("citations")
         if isinstance(cits, list) and len(cits) > 0:
@@ -13,66 +37,222 @@ def _has_any_citations(notes: list[dict]) -> bool:
     return False
 
 
-def _draft_has_citation_markers(text: str) -> bool:
+# One pass over the draft: every doc:<file>#chunk_N / doc:<file>#anchor_<name> marker, in order.
+_CITATION_RE = re.compile(r"doc:[^\s()\[\]<>#,;|`'\"]+#(?:chunk_\d+|anchor_\w+)")
+
+# Listed in the verification section / meta; longer lists are truncated.
+MAX_REPORTED_CITATIONS = 10
+
+
+def extract_citations(text: str) -> list[str]:
     """
-    We require the FINAL answer to show grounding markers (your system uses doc:...#chunk_...).
-    This prevents generic answers (like pizza instructions) from passing.
+    Unique doc:<file>#chunk_N / #anchor_<name> markers in order of first appearance.
     """
-    if not text:
-        return False
-    
-    markers = ["doc:", "#chunk_", "(doc:", "chunk "]
-    return any(m in text for m in markers)
+    return list(dict.fromkeys(_CITATION_RE.findall(text or "")))
+
+
+def _retrieved_source_ids(notes: list[dict]) -> set[str]:
+    ids: set[str] = set()
+    for n in notes or []:
+        if not isinstance(n, Mapping):
+            continue
+        for c in n.get("citations") or []:
+            if isinstance(c, dict) and c.get("source_id"):
+                ids.add(c["source_id"])
+    return ids
+
+
+def _indexed_source_ids() -> Optional[frozenset[str]]:
+    try:
+        return get_source_ids() | get_anchor_source_ids()
+    except Exception:
+        # index metadata unavailable: validate against retrieved notes only
+        return None
+
+
+def check_citations(draft: str, notes: list[dict]) -> Dict[str, Any]:
+    """
+    Extract citation markers from the draft and validate them:
+    - invalid: cited source_ids that are neither indexed chunks nor anchors (anchors.json)
+    - not_retrieved: exist in the index but were not among this run's notes
+    - valid: cited, indexed and retrieved
+    - unused: retrieved source_ids the draft never cites
+    Set lookups only, so the cost is linear in the draft length.
+    """
+    cited = extract_citations(draft)
+    retrieved = _retrieved_source_ids(notes)
+    indexed = _indexed_source_ids()
+
+    if indexed is None:
+        invalid: list[str] = []
+        not_retrieved = [sid for sid in cited if sid not in retrieved]
+    else:
+        invalid = [sid for sid in cited if sid not in indexed]
+        not_retrieved = [sid for sid in cited if sid in indexed and sid not in retrieved]
+
+    cited_set = set(cited)
+    unused = sorted(sid for sid in retrieved if sid not in cited_set)
+
+    return {
+        "cited": cited,
+        "valid": [sid for sid in cited if sid not in invalid and sid not in not_retrieved],
+        "invalid": invalid,
+        "not_retrieved": not_retrieved,
+        "unused": unused,
+        "index_checked": indexed is not None,
+    }
+
+
+# Sections of a rejected draft that are not worth re-retrieving for.
+_HEADING_RE = re.compile(r"^#{1,4}\s+(.+?)\s*$", re.MULTILINE)
+_NON_CONTENT_SECTIONS = ("deliverable package", "citations", "verification")
+
+# At most this many delta queries per retry (see orchestration/graph.py).
+MAX_RETRY_QUERIES = 3
+
+
+def _unsupported_sections(draft: str, valid_ids: set[str]) -> list[str]:
+    """
+    Headings of draft sections with no valid citation or an explicit
+    "Not found in sources" line.
+    """
+    matches = list(_HEADING_RE.finditer(draft or ""))
+    sections: list[str] = []
+    for i, m in enumerate(matches):
+        heading = m.group(1).strip().strip("*").strip()
+        if not heading or heading.lower().startswith(_NON_CONTENT_SECTIONS):
+            continue
+        body = draft[m.end(): matches[i + 1].start() if i + 1 < len(matches) else len(draft)]
+        supported = any(sid in valid_ids for sid in _CITATION_RE.findall(body))
+        if not supported or "not found in sources" in body.lower():
+            sections.append(heading)
+    return sections
+
+
+def _delta_queries(state: SharedState, draft: str, check: Dict[str, Any]) -> list[str]:
+    """
+    Targeted re-retrieval queries for a blocked draft: one per unsupported section,
+    or the task itself when the draft has no usable structure.
+    """
+    task = (state.task_text or state.task or "").strip()
+    sections = _unsupported_sections(draft, set(check["valid"]))
+    if not sections:
+        return [task] if task else []
+    return [f"{task} — {heading}" if task else heading for heading in sections[:MAX_RETRY_QUERIES]]
+
+
+def _fmt_ids(ids: list[str]) -> str:
+    shown = ", ".join(ids[:MAX_REPORTED_CITATIONS])
+    if len(ids) > MAX_REPORTED_CITATIONS:
+        shown += f", ... (+{len(ids) - MAX_REPORTED_CITATIONS} more)"
+    return shown
 
 
 def verifier_agent(state: SharedState) -> SharedState:
+    retry = state.meta.get("verifier_retry") or {}
+    if retry.get("abandoned"):
+        # the retry draft never got written: final_output / verification_notes from the first pass stand
+        state.trace.append({
+            "step": "verify",
+            "agent": "verifier",
+            "action": "Retry pass abandoned",
+            "outcome": f"Kept the first verdict ({len(state.verification_notes)} issue(s))",
+        })
+        return state
+
     notes = state.research_notes or []
     draft = state.draft or ""
     problems: list[str] = []
 
     has_evidence = _has_any_citations(notes)
-    draft_grounded = _draft_has_citation_markers(draft)
+    check = check_citations(draft, notes)
 
     
     if not has_evidence:
-        problems.append("No citations found in research_notes. Output must be 'Not found in sources'.")
+        problems.append(NO_EVIDENCE_PROBLEM)
 
-    if has_evidence and not draft_grounded:
+    if has_evidence and not check["cited"]:
         problems.append(
             "Draft contains no citation markers (e.g., doc:...#chunk_...). "
             "Answer appears ungrounded; must be 'Not found in sources'."
         )
 
+    if has_evidence and check["invalid"]:
+        problems.append(
+            f"Draft cites {len(check['invalid'])} source_id(s) that do not exist in the index: "
+            f"{_fmt_ids(check['invalid'])}."
+        )
+
+    # the writer only saw this run's notes: anything else it cites was not checked
+    # against the text it is attached to, so it blocks like an invalid id
+    if has_evidence and check["not_retrieved"]:
+        problems.append(
+            f"Draft cites {len(check['not_retrieved'])} source_id(s) that are not in this run's "
+            f"retrieved evidence: {_fmt_ids(check['not_retrieved'])}."
+        )
+
     state.verification_notes = problems
+    state.meta["citation_check"] = {
+        "cited": len(check["cited"]),
+        "invalid": check["invalid"][:MAX_REPORTED_CITATIONS],
+        "not_retrieved": check["not_retrieved"][:MAX_REPORTED_CITATIONS],
+        "unused": check["unused"][:MAX_REPORTED_CITATIONS],
+        "index_checked": check["index_checked"],
+    }
 
     if problems:
-        
+        if has_evidence:
+            # consumed by the bounded retry edge in orchestration/graph.py
+            prev = state.meta.get("verifier_retry") or {}
+            state.meta["verifier_retry"] = {
+                "queries": _delta_queries(state, draft, check),
+                "attempts": int(prev.get("attempts", 0)),
+            }
+
         state.draft = ""
 
-        state.final_output = (
-            "## Deliverable Package\n\n"
-            "### Executive Summary\n"
-            "- Not found in sources.\n\n"
-            "---\n"
-            "## Verification\n"
-            + "\n".join(f"- {p}" for p in problems)
-        )
+        state.final_output = _blocked_final_output(problems)
         outcome = f"Blocked final: {len(problems)} issue(s)"
     else:
-        state.final_output = draft + (
-            "\n\n---\n"
-            "## Verification\n"
-            "- Checked that at least one citation exists in retrieved evidence.\n"
-            "- Checked that the final answer includes citation markers.\n"
-        )
-        outcome = "Final approved"
+        lines = [
+            "- Checked that at least one citation exists in retrieved evidence.",
+            "- Checked that the final answer includes citation markers.",
+            f"- Checked {len(check['cited'])} cited source_id(s) against the index and the retrieved evidence: all found.",
+        ]
+        if check["unused"]:
+            lines.append(f"- Retrieved but not cited: {_fmt_ids(check['unused'])}")
+        state.final_output = draft + "\n\n---\n## Verification\n" + "\n".join(lines) + "\n"
+        outcome = f"Final approved ({len(check['cited'])} citations valid)"
 
     state.trace.append({
         "step": "verify",
         "agent": "verifier",
-        "action": "Enforced grounding: evidence must exist AND final answer must show citations",
+        "action": "Enforced grounding: evidence must exist AND final answer must cite indexed source_ids",
         "outcome": outcome,
     })
 
     return state
 
+
+def has_cited_evidence(state: SharedState) -> bool:
+    return _has_any_citations(state.research_notes or [])
+
+
+def verifier_not_found(state: SharedState) -> Dict[str, Any]:
+    """
+    Fast path for negative queries (see orchestration/graph.py): retrieval produced
+    no cited evidence, so the writer and the full verification are skipped and the
+    precomputed "not found" verdict is returned as a partial state update.
+    Same final_output as writer -> verifier would produce for this state.
+    """
+    return {
+        "draft": "",
+        "verification_notes": [NO_EVIDENCE_PROBLEM],
+        "final_output": NOT_FOUND_FINAL_OUTPUT,
+        "trace": [{
+            "step": "verify",
+            "agent": "verifier",
+            "action": "Enforced grounding: evidence must exist AND final answer must show citations",
+            "outcome": "Blocked final: 1 issue(s) (fast path: no evidence retrieved)",
+        }],
+    }
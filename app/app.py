@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
 import time
-from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -15,16 +14,61 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from orchestration.graph import run_task  # noqa: E402
+from agents.writer import get_llm_client  # noqa: E402
+from eval.scoring import EvalCase, result_text, score_case  # noqa: E402
+from orchestration.graph import get_graph  # noqa: E402
+from orchestration.jobs import Job, JobQueue  # noqa: E402
+from orchestration.run_store import RUN_STORE_PATH, clear_runs, load_runs, record_run, run_row  # noqa: E402
+from retrieval.anchors import get_anchor  # noqa: E402
+from retrieval.fact_store import ensure_fact_store  # noqa: E402
+from retrieval.retriever import META_PATH, get_embedding_client, get_index_version, reload_index  # noqa: E402
 
 
-@dataclass(frozen=True)
-class EvalCase:
-    case_id: str
-    task_key: str
-    prompt: str
-    must_include: List[str]
-    must_not_include: List[str]
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+@st.cache_resource(show_spinner="Loading index, fact store and graph...")
+def _load_resources(index_mtime: float) -> Dict[str, Any]:
+    """
+    Heavy, process-wide resources: loaded once per index build (keyed by the
+    chunks_meta.jsonl mtime) and reused by every rerun and session.
+    """
+    resources: Dict[str, Any] = {"graph": get_graph()}
+    reload_index()  # a rebuilt index invalidates whatever an older build loaded
+    try:
+        ensure_fact_store()
+        get_anchor("technical_decisions.options")
+        resources["index_version"] = get_index_version()
+    except Exception as e:
+        # e.g. no index built yet: history / dashboard pages still render, runs are blocked
+        resources["index_error"] = f"{type(e).__name__}: {e}"
+    try:
+        resources["embedding_client"] = get_embedding_client()
+        resources["llm_client"] = get_llm_client()
+    except Exception as e:
+        # e.g. OPENAI_API_KEY missing: pages still render, runs report the error
+        resources["client_error"] = f"{type(e).__name__}: {e}"
+    return resources
+
+
+@st.cache_data(show_spinner=False)
+def _read_eval_rows(path: str, mtime: float) -> List[Dict[str, Any]]:
+    # re-read only when questions.jsonl changes (mtime is part of the cache key)
+    rows: List[Dict[str, Any]] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line:
+            rows.append(json.loads(line))
+    return rows
+
+
+@st.cache_data(show_spinner=False)
+def _recent_runs(limit: int, since_ts: Optional[float], store_mtime: float) -> List[Dict[str, Any]]:
+    return load_runs(since_ts=since_ts, limit=limit)
 
 
 def _load_eval_cases(jsonl_path: Path) -> List[EvalCase]:
@@ -32,21 +76,8 @@ def _load_eval_cases(jsonl_path: Path) -> List[EvalCase]:
     if not jsonl_path.exists():
         return cases
 
-    for line in jsonl_path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        obj = json.loads(line)
-
-        cases.append(
-            EvalCase(
-                case_id=obj.get("id", "EVAL-???"),
-                task_key=obj.get("task_key", "default"),
-                prompt=obj.get("prompt", ""),
-                must_include=obj.get("must_include", []) or [],
-                must_not_include=obj.get("must_not_include", []) or [],
-            )
-        )
+    for obj in _read_eval_rows(str(jsonl_path), _mtime(jsonl_path)):
+        cases.append(EvalCase.from_dict(obj))
     return cases
 
 
@@ -66,35 +97,6 @@ def _pretty_trace(trace: Any) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def _extract_citations_from_text(text: str) -> List[str]:
-    if not text:
-        return []
-    lines = [ln.strip() for ln in text.splitlines()]
-    out: List[str] = []
-    in_citations = False
-    for ln in lines:
-        if ln.lower().startswith("## citations") or ln.lower().startswith("### citations"):
-            in_citations = True
-            continue
-        if in_citations:
-            if ln.startswith("## "):
-                break
-            if ln.startswith("-"):
-                out.append(ln.lstrip("-").strip())
-    seen = set()
-    uniq = []
-    for c in out:
-        if c and c not in seen:
-            seen.add(c)
-            uniq.append(c)
-    return uniq
-
-
-def _init_run_history():
-    if "run_history" not in st.session_state:
-        st.session_state.run_history = []  
-
-
 def _log_run(
     *,
     kind: str,
@@ -103,50 +105,32 @@ def _log_run(
     result: dict,
     elapsed_ms: int,
     eval_pass: Optional[bool] = None,
+    error: Optional[str] = None,
 ):
-    trace = (result or {}).get("trace", []) or []
-    draft = (result or {}).get("draft", "") or ""
-
-    # basic signals (safe + stable)
-    retrieved_chunks = 0
-    for t in trace:
-        if isinstance(t, dict) and t.get("step") == "research":
-            
-            outcome = str(t.get("outcome", ""))
-            for token in outcome.split():
-                if token.isdigit():
-                    retrieved_chunks = int(token)
-                    break
-
-    citations = _extract_citations_from_text(draft)
-    status = "ok" if draft.strip() else "empty"
-
-    if kind == "eval" and eval_pass is not None:
-        status = "pass" if eval_pass else "fail"
-
-    st.session_state.run_history.insert(
-        0,
-        {
-            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "kind": kind,  # task/eval
-            "task_key": task_key,
-            "latency_ms": elapsed_ms,
-            "chunks": retrieved_chunks,
-            "citations": len(citations),
-            "status": status,
-            "prompt_preview": prompt_preview[:80].replace("\n", " ").strip(),
-        },
+    # persisted (orchestration/run_store.py), so history survives browser refreshes
+    record_run(
+        run_row(
+            result or {},
+            kind=kind,
+            task_key=task_key,
+            prompt=prompt_preview,
+            latency_ms=elapsed_ms,
+            eval_pass=eval_pass,
+            error=error,
+        )
     )
 
 
 def _render_run_history():
-    _init_run_history()
     st.sidebar.markdown("### Run History")
-    if not st.session_state.run_history:
+    runs = _recent_runs(50, None, _mtime(RUN_STORE_PATH))
+    if not runs:
         st.sidebar.caption("No runs yet.")
         return
 
-    df = pd.DataFrame(st.session_state.run_history)
+    df = pd.DataFrame(runs)
+    df["time"] = pd.to_datetime(df["ts"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+    df = df[["time", "kind", "task_key", "latency_ms", "chunks", "citations", "status", "prompt_preview"]]
     st.sidebar.dataframe(
         df,
         use_container_width=True,
@@ -166,42 +150,316 @@ def _render_run_history():
     col_a, col_b = st.sidebar.columns(2)
     with col_a:
         if st.button("Clear history"):
-            st.session_state.run_history = []
+            clear_runs()
             st.rerun()
     with col_b:
         st.caption("")
 
-def _score_eval_case(case: EvalCase, draft: str) -> Tuple[bool, Dict[str, Any]]:
+
+def _render_latency_dashboard():
+    st.subheader("Latency Dashboard")
+
+    window = st.selectbox("Time window", ["Last 24 hours", "Last 7 days", "Last 30 days", "All time"], index=1)
+    days = {"Last 24 hours": 1, "Last 7 days": 7, "Last 30 days": 30}.get(window)
+    # whole-hour lower bound keeps the cache key stable across reruns
+    since_ts = (int(time.time() // 3600) * 3600 - days * 86400) if days else None
+    runs = _recent_runs(0, since_ts, _mtime(RUN_STORE_PATH))
+    if not runs:
+        st.info("No runs recorded in this window yet.")
+        return
+
+    df = pd.DataFrame(runs)
+    df["time"] = pd.to_datetime(df["ts"], unit="s")
+    # failed runs end early: count them, but keep them out of the latency percentiles
+    is_error = df["status"] == "error"
+    ok = df[~is_error]
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Runs", len(df))
+    col2.metric("Errors", int(is_error.sum()))
+    col3.metric("p50 latency", f"{ok['latency_ms'].quantile(0.5):.0f} ms" if len(ok) else "-")
+    col4.metric("p95 latency", f"{ok['latency_ms'].quantile(0.95):.0f} ms" if len(ok) else "-")
+    col5.metric("Cache hit rate", f"{ok['cache_hit'].mean():.0%}" if len(ok) else "-")
+
+    st.markdown("### Latency by task (excluding errors)")
+    by_task = ok.groupby("task_key").agg(
+        runs=("latency_ms", "size"),
+        p50_ms=("latency_ms", lambda x: x.quantile(0.5)),
+        p95_ms=("latency_ms", lambda x: x.quantile(0.95)),
+        p99_ms=("latency_ms", lambda x: x.quantile(0.99)),
+        cache_hit_rate=("cache_hit", "mean"),
+        avg_evidence_tokens=("evidence_tokens", "mean"),
+        avg_llm_tokens=("completion_tokens", "mean"),
+    ).reindex(sorted(df["task_key"].unique()))
+    by_task["runs"] = by_task["runs"].fillna(0).astype(int)
+    by_task["errors"] = is_error.groupby(df["task_key"]).sum()
+    st.dataframe(by_task.round(1), use_container_width=True)
+
+    if ok.empty:
+        st.caption("Only failed runs in this window.")
+        return
+
+    st.markdown("### Trend")
+    bucket = "1h" if days == 1 else "1D"
+    trend = ok.set_index("time")["latency_ms"].resample(bucket).quantile([0.5, 0.95, 0.99]).unstack()
+    trend.columns = ["p50", "p95", "p99"]
+    st.line_chart(trend.dropna(how="all"))
+
+    st.markdown("### Time per node (mean ms, uncached runs)")
+    timings = pd.DataFrame([
+        r["node_timings"] for r in runs if r["node_timings"] and not r["cache_hit"] and r["status"] != "error"
+    ])
+    if timings.empty:
+        st.caption("No node timings recorded yet.")
+    else:
+        st.bar_chart(timings.mean().sort_values(ascending=False))
+
+
+def _score_eval_case(case: EvalCase, result: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+    # same engine as eval/run_eval.py (eval/scoring.py)
+    score = score_case(case, result_text(result))
+    return score.passed, score.details()
+
+
+def _record_job(job: Job) -> None:
+    """
+    JobQueue on_done hook (worker thread: no st.* calls here).
+    Scores eval jobs and persists the run.
+    """
+    result = job.result or {}
+    case = job.context.get("case")
+    passed: Optional[bool] = None
+    # the queue outlives script reruns, so `case` may be an EvalCase from an earlier run's namespace
+    if case is not None and job.error is None:
+        passed, details = _score_eval_case(case, result)
+        job.context["passed"] = passed
+        job.context["details"] = details
+
+    _log_run(
+        kind="eval" if case is not None else "task",
+        task_key=job.task_key or "default",
+        prompt_preview=job.task,
+        result=result,
+        elapsed_ms=job.latency_ms or 0,
+        eval_pass=passed,
+        error=job.error,
+    )
+
+
+@st.cache_resource
+def _get_job_queue() -> JobQueue:
+    # one pool per server process, shared by every session and rerun
+    return JobQueue(max_workers=int(os.getenv("APP_JOB_WORKERS", "4")), on_done=_record_job)
+
+
+def _submit_job(task: str, task_key: str, *, label: str, case: Optional[EvalCase] = None) -> str:
+    job_id = _get_job_queue().submit(task, task_key, label=label, context={"case": case} if case else None)
+    st.session_state.setdefault("job_ids", []).insert(0, job_id)
+    st.session_state.selected_job = job_id
+    return job_id
+
+
+def _submit_eval_run(cases: List[EvalCase]) -> None:
     """
-    Simple, stable scoring:
-    - all must_include substrings must appear (case-insensitive)
-    - all must_not_include substrings must NOT appear (case-insensitive)
+    "Run all": every case becomes a job on the shared pool (results bypass the
+    run cache so the eval reflects the current code and index).
     """
-    text = (draft or "").lower()
+    queue = _get_job_queue()
+    st.session_state.eval_run_ids = [
+        queue.submit(c.task_text, c.task_key, label=c.case_id, use_cache=False, context={"case": c})
+        for c in cases
+    ]
+    st.session_state.eval_run_started = time.time()
+
+
+def _render_eval_run():
+    job_ids = st.session_state.get("eval_run_ids") or []
+    if not job_ids:
+        return
+
+    running = any(not j.done for j in _get_job_queue().jobs(job_ids))
+
+    @st.fragment(run_every=1.0 if running else None)
+    def _poll():
+        jobs = _get_job_queue().jobs(job_ids)
+        finished = [j for j in jobs if j.done]
+        passed = [j for j in finished if j.context.get("passed")]
+
+        st.markdown("## Eval run")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Completed", f"{len(finished)}/{len(jobs)}")
+        col2.metric("Pass rate", f"{len(passed) / len(finished):.0%}" if finished else "—")
+        col3.metric("Errors", sum(1 for j in finished if j.status == "error"))
+        wall_s = max((j.finished_at or time.time() for j in jobs), default=time.time()) - st.session_state.get(
+            "eval_run_started", time.time()
+        )
+        col4.metric("Wall time", f"{wall_s:.1f} s")
+
+        if jobs:
+            st.progress(len(finished) / len(jobs))
+
+        rows = []
+        for j in jobs:
+            if j.status == "error":
+                verdict = "error"
+            elif "passed" in j.context:
+                verdict = "PASS" if j.context["passed"] else "FAIL"
+            else:
+                verdict = ""
+            rows.append({
+                "case": j.label,
+                "task_key": j.task_key,
+                "status": j.status,
+                "result": verdict,
+                "ms": j.latency_ms,
+                "missing": ", ".join((j.context.get("details") or {}).get("missing", [])),
+                "forbidden": ", ".join((j.context.get("details") or {}).get("forbidden_found", [])),
+                "uncited": ", ".join((j.context.get("details") or {}).get("missing_citations", [])),
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+        if running and len(finished) == len(jobs):
+            st.rerun(scope="app")
+
+    _poll()
+
+
+def _job_progress(job: Job) -> str:
+    if job.status == "queued":
+        return "waiting for a worker"
+    if job.status == "error":
+        return job.error or "error"
+    nodes = [e["node"] for e in job.events]
+    if job.status == "running":
+        return f"{len(nodes)} node(s) done" + (f" — last: {nodes[-1]}" if nodes else "")
+    return " → ".join(nodes)
+
+
+def _render_trace(trace: Any):
+    st.markdown("## Trace Log")
+    df = _pretty_trace(trace)
+    if len(df) == 0:
+        st.write("_No trace available_")
+    else:
+        st.dataframe(
+            df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Step": st.column_config.TextColumn(width="small"),
+                "Agent": st.column_config.TextColumn(width="small"),
+                "Action": st.column_config.TextColumn(width="large"),
+                "Outcome": st.column_config.TextColumn(width="large"),
+            },
+        )
+
+
+def _render_job_result(job: Job):
+    if job.status == "error":
+        st.error(f"Run failed: {job.error}")
+        return
+
+    case = job.context.get("case")
+    if case is not None and "passed" in job.context:
+        passed = job.context["passed"]
+        details = job.context.get("details") or {}
+        
+        if passed:
+            st.success(f"✅ PASS — {case.case_id}")
+        else:
+            st.error(f"❌ FAIL — {case.case_id}")
+
+        
+        if not passed:
+            with st.expander("Why it failed", expanded=True):
+                if details.get("missing"):
+                    st.markdown("**Missing required phrases:**")
+                    for s in details["missing"]:
+                        st.write(f"- {s}")
+                if details.get("forbidden_found"):
+                    st.markdown("**Contains forbidden phrases:**")
+                    for s in details["forbidden_found"]:
+                        st.write(f"- {s}")
+                if details.get("missing_citations"):
+                    st.markdown("**Required sources not cited:**")
+                    for s in details["missing_citations"]:
+                        st.write(f"- {s}")
 
-    missing = []
-    for s in case.must_include or []:
-        if (s or "").strip() and (s.lower() not in text):
-            missing.append(s)
+    result = job.result or {}
+    draft = result.get("draft", "") or ""
 
-    forbidden_found = []
-    for s in case.must_not_include or []:
-        if (s or "").strip() and (s.lower() in text):
-            forbidden_found.append(s)
+    st.markdown("## Answer")
+    st.markdown(draft if draft else "_No output_")
 
-    passed = (len(missing) == 0) and (len(forbidden_found) == 0)
+    _render_trace(result.get("trace", []) or [])
 
-    details = {
-        "missing": missing,
-        "forbidden_found": forbidden_found,
-    }
-    return passed, details
+
+def _render_jobs():
+    """
+    Live job table (polled every second while something is running) and the
+    selected job's result. Runs never block the script thread.
+    """
+    jobs = _get_job_queue().jobs(st.session_state.get("job_ids", []))
+    if not jobs:
+        return
+
+    running = any(not j.done for j in jobs)
+
+    @st.fragment(run_every=1.0 if running else None)
+    def _poll():
+        current = _get_job_queue().jobs(st.session_state.get("job_ids", []))
+        st.markdown("## Jobs")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "job": j.job_id,
+                    "label": j.label,
+                    "task_key": j.task_key,
+                    "status": j.status,
+                    "ms": j.latency_ms,
+                    "progress": _job_progress(j),
+                }
+                for j in current
+            ]),
+            use_container_width=True,
+            hide_index=True,
+        )
+        # a job finished since the last full run: refresh history + result view
+        if running and all(j.done for j in current):
+            st.rerun(scope="app")
+
+    _poll()
+
+    finished = [j for j in jobs if j.done]
+    if not finished:
+        return
+    ids = [j.job_id for j in finished]
+    selected = st.session_state.get("selected_job")
+    idx = ids.index(selected) if selected in ids else 0
+    pick = st.selectbox(
+        "Show result of",
+        list(range(len(finished))),
+        index=idx,
+        format_func=lambda i: f"{finished[i].label} • {finished[i].task_key} • {finished[i].job_id}",
+    )
+    st.session_state.selected_job = ids[pick]
+    _render_job_result(finished[pick])
 
 
 st.set_page_config(page_title="Agentic Research Assistant", layout="wide")
 st.title("Agentic Research & Action Assistant")
 
-mode = st.sidebar.radio("Mode", ["Run Task", "Run Eval"], index=0)
+RESOURCES = _load_resources(_mtime(META_PATH))
+INDEX_ERROR: Optional[str] = RESOURCES.get("index_error")
+
+
+def _render_resource_errors() -> None:
+    if INDEX_ERROR:
+        st.error(f"Index not available ({INDEX_ERROR}). Build it with `python run_local.py --rebuild-index`.")
+    if RESOURCES.get("client_error"):
+        st.error(f"OpenAI client not available ({RESOURCES['client_error']}). Runs that need the API will fail.")
+
+mode = st.sidebar.radio("Mode", ["Run Task", "Run Eval", "Latency Dashboard"], index=0)
 _render_run_history()
 
 TASK_PRESETS: List[Tuple[str, str]] = [
@@ -240,45 +498,22 @@ if mode == "Run Task":
     )
 
     task_text = st.text_area("Task", key="task_text", height=160)
-    run = st.button("Run task", type="primary")
+    _render_resource_errors()
+    run = st.button(
+        "Run task",
+        type="primary",
+        disabled=bool(INDEX_ERROR),
+        help="Runs in the background; submit as many as you like.",
+    )
 
     if run:
-        t0 = time.perf_counter()
-        with st.spinner("Running multi-agent workflow..."):
-            result = run_task(task_text, task_key=st.session_state.task_key)
-        elapsed_ms = int((time.perf_counter() - t0) * 1000)
-
-        _init_run_history()
-        _log_run(
-            kind="task",
-            task_key=st.session_state.task_key,
-            prompt_preview=task_text,
-            result=result or {},
-            elapsed_ms=elapsed_ms,
-        )
+        _submit_job(task_text, st.session_state.task_key, label=task_text[:40].replace("\n", " "))
 
-        draft = (result or {}).get("draft", "") or ""
-        trace = (result or {}).get("trace", []) or []
+    _render_jobs()
 
-        st.markdown("## Answer")
-        st.markdown(draft if draft else "_No output_")
 
-        st.markdown("## Trace Log")
-        df = _pretty_trace(trace)
-        if len(df) == 0:
-            st.write("_No trace available_")
-        else:
-            st.dataframe(
-                df,
-                use_container_width=True,
-                hide_index=True,
-                column_config={
-                    "Step": st.column_config.TextColumn(width="small"),
-                    "Agent": st.column_config.TextColumn(width="small"),
-                    "Action": st.column_config.TextColumn(width="large"),
-                    "Outcome": st.column_config.TextColumn(width="large"),
-                },
-            )
+elif mode == "Latency Dashboard":
+    _render_latency_dashboard()
 
 
 else:
@@ -291,6 +526,18 @@ else:
         st.error(f"No eval cases found at: {eval_path}")
         st.stop()
 
+    _render_resource_errors()
+    if st.button(
+        f"Run all {len(cases)} cases",
+        disabled=bool(INDEX_ERROR),
+        help=f"Runs every case in parallel on {os.getenv('APP_JOB_WORKERS', '4')} workers (no result cache).",
+    ):
+        _submit_eval_run(cases)
+
+    _render_eval_run()
+
+    st.markdown("---")
+
     labels = [f"{c.case_id}  •  {c.task_key}" for c in cases]
     idx = st.selectbox("Eval case", list(range(len(cases))), format_func=lambda i: labels[i])
     case = cases[idx]
@@ -303,65 +550,17 @@ else:
         with col2:
             st.write(f"**Must include:** {len(case.must_include)} check(s)")
             st.write(f"**Must NOT include:** {len(case.must_not_include)} check(s)")
-
-    prompt = st.text_area("Eval question (editable for this run)", value=case.prompt, height=160)
-    run_eval = st.button("Run eval case", type="primary")
+            st.write(f"**Must cite:** {len(case.must_cite)} source(s)")
+
+    prompt = st.text_area("Eval question (editable for this run)", value=case.task_text, height=160)
+    run_eval = st.button(
+        "Run eval case",
+        type="primary",
+        disabled=bool(INDEX_ERROR),
+        help="Runs in the background; submit as many as you like.",
+    )
 
     if run_eval:
-        t0 = time.perf_counter()
-        with st.spinner("Running eval case..."):
-            result = run_task(prompt, task_key=case.task_key)
-        elapsed_ms = int((time.perf_counter() - t0) * 1000)
-
-        draft = (result or {}).get("draft", "") or ""
-        trace = (result or {}).get("trace", []) or []
-
-        passed, details = _score_eval_case(case, draft)
-
-        _init_run_history()
-        _log_run(
-            kind="eval",
-            task_key=case.task_key,
-            prompt_preview=prompt,
-            result=result or {},
-            elapsed_ms=elapsed_ms,
-            eval_pass=passed,
-        )
+        _submit_job(prompt, case.task_key, label=case.case_id, case=case)
 
-        
-        if passed:
-            st.success(f"✅ PASS — {case.case_id}")
-        else:
-            st.error(f"❌ FAIL — {case.case_id}")
-
-        
-        if not passed:
-            with st.expander("Why it failed", expanded=True):
-                if details.get("missing"):
-                    st.markdown("**Missing required phrases:**")
-                    for s in details["missing"]:
-                        st.write(f"- {s}")
-                if details.get("forbidden_found"):
-                    st.markdown("**Contains forbidden phrases:**")
-                    for s in details["forbidden_found"]:
-                        st.write(f"- {s}")
-
-        st.markdown("## Answer")
-        st.markdown(draft if draft else "_No output_")
-
-        st.markdown("## Trace Log")
-        df = _pretty_trace(trace)
-        if len(df) == 0:
-            st.write("_No trace available_")
-        else:
-            st.dataframe(
-                df,
-                use_container_width=True,
-                hide_index=True,
-                column_config={
-                    "Step": st.column_config.TextColumn(width="small"),
-                    "Agent": st.column_config.TextColumn(width="small"),
-                    "Action": st.column_config.TextColumn(width="large"),
-                    "Outcome": st.column_config.TextColumn(width="large"),
-                },
-            )
+    _render_jobs()
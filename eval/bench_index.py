@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import faiss
+import numpy as np
+
+# Allow running from /eval even when executed directly
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from retrieval.retriever import FAISS_INDEX_PATH  # noqa: E402
+from retrieval.vector_storage import RerankedIndex, build_quantized_index  # noqa: E402
+
+
+def _load_vectors() -> np.ndarray:
+    index = faiss.read_index(str(FAISS_INDEX_PATH))
+    return np.ascontiguousarray(index.reconstruct_n(0, index.ntotal), dtype="float32")
+
+
+def _mix(base: np.ndarray, n: int, rng: np.random.Generator, noise: float) -> np.ndarray:
+    """
+    n synthetic vectors near the real ones: random pairwise blends plus noise.
+    """
+    a = base[rng.integers(0, len(base), n)]
+    b = base[rng.integers(0, len(base), n)]
+    w = rng.uniform(0.0, 1.0, (n, 1)).astype("float32")
+    out = w * a + (1 - w) * b + rng.normal(0, noise, (n, base.shape[1])).astype("float32")
+    return np.ascontiguousarray(out, dtype="float32")
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def _timed_search(index: Any, xq: np.ndarray, k: int) -> Tuple[np.ndarray, List[float]]:
+    found = np.empty((len(xq), k), dtype="int64")
+    latencies: List[float] = []
+    for i in range(len(xq)):
+        t0 = time.perf_counter()
+        _, idx = index.search(xq[i : i + 1], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        found[i] = idx[0]
+    return found, latencies
+
+
+def bench_storage(vectors: np.ndarray, xq: np.ndarray, k: int, rerank_factors: List[int]) -> List[Dict[str, Any]]:
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    truth, flat_lat = _timed_search(flat, xq, k)
+    matrix_mb = vectors.nbytes / 2**20
+
+    rows = [{
+        "storage": "flat",
+        "rerank": "-",
+        "index_mb": len(faiss.serialize_index(flat)) / 2**20,
+        "mmap_mb": 0.0,
+        "recall": 1.0,
+        "p50_ms": statistics.median(flat_lat),
+    }]
+
+    for storage in ("fp16", "sq8"):
+        quantized = build_quantized_index(vectors, storage)
+        index_mb = len(faiss.serialize_index(quantized)) / 2**20
+
+        found, lat = _timed_search(quantized, xq, k)
+        rows.append({
+            "storage": storage,
+            "rerank": "none",
+            "index_mb": index_mb,
+            "mmap_mb": 0.0,
+            "recall": _recall(found, truth),
+            "p50_ms": statistics.median(lat),
+        })
+
+        for factor in rerank_factors:
+            found, lat = _timed_search(RerankedIndex(quantized, vectors, rerank_factor=factor), xq, k)
+            rows.append({
+                "storage": storage,
+                "rerank": f"{factor}x",
+                "index_mb": index_mb,
+                "mmap_mb": matrix_mb,
+                "recall": _recall(found, truth),
+                "p50_ms": statistics.median(lat),
+            })
+    return rows
+
+
+def _truncate(vectors: np.ndarray, dims: int) -> np.ndarray:
+    """
+    Matryoshka shortening as the embeddings API does it: first dims, L2-renormalized.
+    """
+    out = np.ascontiguousarray(vectors[:, :dims], dtype="float32")
+    faiss.normalize_L2(out)
+    return out
+
+
+def bench_dimensions(vectors: np.ndarray, xq: np.ndarray, k: int, dims_list: List[int]) -> List[Dict[str, Any]]:
+    """
+    Flat search on truncated vectors; recall@k against the full-size flat results.
+    """
+    full = faiss.IndexFlatL2(vectors.shape[1])
+    full.add(_truncate(vectors, vectors.shape[1]))
+    truth, _ = _timed_search(full, _truncate(xq, vectors.shape[1]), k)
+
+    rows: List[Dict[str, Any]] = []
+    for dims in dims_list:
+        dims = min(dims, vectors.shape[1])
+        index = faiss.IndexFlatL2(dims)
+        index.add(_truncate(vectors, dims))
+        found, lat = _timed_search(index, _truncate(xq, dims), k)
+        rows.append({
+            "dims": dims,
+            "index_mb": len(faiss.serialize_index(index)) / 2**20,
+            "recall": _recall(found, truth),
+            "p50_ms": statistics.median(lat),
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Memory / recall / latency of index storage modes and embedding dimensions (offline, no API calls)."
+    )
+    parser.add_argument("--size", type=int, default=20000, help="Index size: real vectors + synthetic blends (0 = real only)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[2, 4, 8], help="Re-rank candidate factors")
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 512, 1536], help="Embedding dimensions to compare")
+    parser.add_argument("--noise", type=float, default=0.01, help="Per-dim std-dev of noise added to synthetic vectors")
+    parser.add_argument(
+        "--dims-noise",
+        type=float,
+        default=0.002,
+        help="Noise for the dimensions benchmark: at --noise, high-dim noise dominates the truncated prefixes",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    real = _load_vectors()
+    n_real = len(real)
+
+    def _dataset(noise: float) -> Tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(args.seed)
+        vectors = real
+        if args.size > n_real:
+            vectors = np.vstack([real, _mix(real, args.size - n_real, rng, noise)])
+        return vectors, _mix(vectors, args.queries, rng, noise)
+
+    vectors, xq = _dataset(args.noise)
+    k = min(args.k, len(vectors))
+
+    print(f"{len(vectors)} vectors ({n_real} real) x {vectors.shape[1]} dims, {len(xq)} queries, k={k}\n")
+    print(f"{'storage':8} {'rerank':>6} {'index MB':>9} {'mmap MB':>8} {'recall@k':>9} {'p50 ms':>8}")
+    for r in bench_storage(vectors, xq, k, args.rerank):
+        print(
+            f"{r['storage']:8} {r['rerank']:>6} {r['index_mb']:9.2f} {r['mmap_mb']:8.2f} "
+            f"{r['recall']:9.3f} {r['p50_ms']:8.3f}"
+        )
+
+    vectors, xq = _dataset(args.dims_noise)
+    print(f"\n{'dims':>8} {'index MB':>9} {'recall@k':>9} {'p50 ms':>8}   (flat, vs full-size results, noise {args.dims_noise})")
+    for r in bench_dimensions(vectors, xq, k, args.dims):
+        print(f"{r['dims']:8d} {r['index_mb']:9.2f} {r['recall']:9.3f} {r['p50_ms']:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
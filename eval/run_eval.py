@@ -1,105 +1,145 @@
 from __future__ import annotations
 
-import json
+import argparse
 import os
-import re
+import statistics
 import sys
-from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
 
 # Allow running from /eval even when executed directly
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+from eval.scoring import (  # noqa: E402
+    EvalCase,
+    RetrievalScore,
+    load_cases,
+    result_text,
+    score_case,
+    score_retrieval,
+)
+from orchestration.cassette import get_cassette, use_cassette  # noqa: E402
 from orchestration.graph import run_task  # noqa: E402
+from tasks.registry import get_research_plan  # noqa: E402
 
 
-@dataclass
-class EvalCase:
-    id: str
-    task_key: str
-    task_text: str
-    must_contain: List[str]
-    must_not_contain: List[str]
-
-
-def _read_jsonl(path: str) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            rows.append(json.loads(line))
-    return rows
-
-
-def _to_case(d: Dict[str, Any]) -> EvalCase:
-    return EvalCase(
-        id=str(d["id"]),
-        task_key=str(d["task_key"]),
-        task_text=str(d["task_text"]),
-        must_contain=list(d.get("must_contain", [])),
-        must_not_contain=list(d.get("must_not_contain", [])),
-    )
-
-
-def _get_output_text(result: Dict[str, Any]) -> str:
-    # Your pipeline uses state.final_output in some versions, and state.draft in others.
-    # Prefer final_output if present, else draft, else stringify.
-    if isinstance(result, dict):
-        for key in ("final_output", "draft", "output", "result"):
-            val = result.get(key)
-            if isinstance(val, str) and val.strip():
-                return val
-    return json.dumps(result, ensure_ascii=False, indent=2)
+def run_case(case: EvalCase) -> Tuple[bool, List[str]]:
+    result = run_task(case.task_text, task_key=case.task_key)
+    score = score_case(case, result_text(result))
+    return score.passed, score.failures()
 
 
-def _contains(text: str, needle: str) -> bool:
+def run_retrieval_case(case: EvalCase, k: int) -> Tuple[RetrievalScore, float]:
     """
-    If needle looks like a regex (contains \\ or special char), we still treat as plain substring
-    EXCEPT we allow users to embed escaped sequences like \\n in jsonl; normalize those.
+    Runs only the case's research plan (no planner/writer/verifier, no LLM calls).
+    Returns the score and the plan's wall time in ms.
     """
-    needle_norm = needle.encode("utf-8").decode("unicode_escape")
-    return needle_norm in text
-
+    plan = get_research_plan(case.task_key)
+    t0 = time.perf_counter()
+    results = plan.retrieve(case.task_text)
+    latency_ms = (time.perf_counter() - t0) * 1000
+    return score_retrieval(case, results, k), latency_ms
 
-def run_case(case: EvalCase) -> Tuple[bool, List[str]]:
-    result = run_task(case.task_text, task_key=case.task_key)
-    out = _get_output_text(result)
 
-    failures: List[str] = []
+def main_retrieval(cases: List[EvalCase], k: int) -> None:
+    scored: List[RetrievalScore] = []
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    misses = 0
 
-    for s in case.must_contain:
-        if not _contains(out, s):
-            failures.append(f"Missing required text: {s}")
+    for c in cases:
+        score, latency_ms = run_retrieval_case(c, k)
+        latencies[c.task_key].append(latency_ms)
+        if not c.must_cite:
+            print(f"·  {c.case_id} ({c.task_key}) no must_cite, {latency_ms:.1f} ms")
+            continue
+
+        scored.append(score)
+        ranks = ", ".join(f"{src}@{rank}" for src, rank in score.ranks.items()) or "-"
+        mark = "✅" if not score.missing else "❌"
+        print(f"{mark} {c.case_id} ({c.task_key}) recall@{k}={score.recall:.2f} ranks: {ranks}, {latency_ms:.1f} ms")
+        for src in score.missing:
+            print(f"   - Not in top {k}: {src}")
+        if score.missing:
+            misses += 1
+
+    print()
+    print("========== RETRIEVAL SUMMARY ==========")
+    print(f"Scored cases: {len(scored)} (of {len(cases)})")
+    if scored:
+        print(f"Recall@{k}: {statistics.mean(s.recall for s in scored):.3f}")
+        print(f"MRR@{k}: {statistics.mean(s.reciprocal_rank for s in scored):.3f}")
+    print("Latency per plan (ms):")
+    for task_key, values in sorted(latencies.items()):
+        print(
+            f"  {task_key}: n={len(values)} p50={statistics.median(values):.1f} "
+            f"mean={statistics.mean(values):.1f} max={max(values):.1f}"
+        )
+
+    if misses > 0:
+        raise SystemExit(1)
 
-    for s in case.must_not_contain:
-        if _contains(out, s):
-            failures.append(f"Found forbidden text: {s}")
 
-    return (len(failures) == 0), failures
+def _print_cassette_stats() -> None:
+    cassette = get_cassette()
+    if cassette is not None:
+        st = cassette.stats()
+        print(f"Cassette ({st['mode']}): {st['path']} — {st['hits']} replayed, {st['recorded']} recorded")
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--retrieval",
+        action="store_true",
+        help="Only run each case's research plan and score must_cite in the top k (no LLM calls)",
+    )
+    parser.add_argument("--k", type=int, default=10, help="Cutoff for --retrieval recall/MRR")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--record",
+        action="store_true",
+        help="Record embedding/chat API responses to the cassette (known requests are replayed)",
+    )
+    mode.add_argument(
+        "--replay",
+        action="store_true",
+        help="Serve embedding/chat calls only from the cassette (offline; unrecorded requests fail)",
+    )
+    parser.add_argument("--cassette", type=str, help="Cassette file (default: CASSETTE_PATH or data/cassettes/eval.jsonl)")
+    args = parser.parse_args()
+
+    if args.record or args.replay:
+        use_cassette("record" if args.record else "replay", Path(args.cassette) if args.cassette else None)
+
     questions_path = os.path.join(os.path.dirname(__file__), "questions.jsonl")
-    rows = _read_jsonl(questions_path)
-    cases = [_to_case(r) for r in rows]
+    cases = load_cases(questions_path)
+
+    if args.retrieval:
+        print(f"Loaded {len(cases)} eval cases from {questions_path} (retrieval only, k={args.k})\n")
+        try:
+            main_retrieval(cases, args.k)
+        finally:
+            _print_cassette_stats()
+        return
 
     passed = 0
     failed = 0
 
     print(f"Loaded {len(cases)} eval cases from {questions_path}\n")
 
+    t0 = time.perf_counter()
     for c in cases:
         ok, failures = run_case(c)
         if ok:
             passed += 1
-            print(f"✅ {c.id} ({c.task_key})")
+            print(f"✅ {c.case_id} ({c.task_key})")
         else:
             failed += 1
-            print(f"❌ {c.id} ({c.task_key})")
+            print(f"❌ {c.case_id} ({c.task_key})")
             for f in failures:
                 print(f"   - {f}")
         print()
@@ -109,6 +149,8 @@ def main() -> None:
     print(f"Total: {total}")
     print(f"Passed: {passed}")
     print(f"Failed: {failed}")
+    print(f"Wall time: {time.perf_counter() - t0:.1f} s")
+    _print_cassette_stats()
 
     # Non-zero exit code if anything failed (useful for CI)
     if failed > 0:
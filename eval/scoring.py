@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from agents.verifier import extract_citations
+
+
+@dataclass(frozen=True)
+class EvalCase:
+    case_id: str
+    task_key: str
+    task_text: str
+    must_include: Tuple[str, ...] = ()
+    must_not_include: Tuple[str, ...] = ()
+    must_cite: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "EvalCase":
+        # must_contain / must_not_contain / prompt: older questions.jsonl spellings
+        return cls(
+            case_id=str(d.get("id", "EVAL-???")),
+            task_key=str(d.get("task_key") or "default"),
+            task_text=str(d.get("task_text") or d.get("prompt") or ""),
+            must_include=tuple(d.get("must_include") or d.get("must_contain") or ()),
+            must_not_include=tuple(d.get("must_not_include") or d.get("must_not_contain") or ()),
+            must_cite=tuple(d.get("must_cite") or ()),
+        )
+
+
+def load_cases(path: str | Path) -> List[EvalCase]:
+    cases: List[EvalCase] = []
+    path = Path(path)
+    if not path.exists():
+        return cases
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line:
+            cases.append(EvalCase.from_dict(json.loads(line)))
+    return cases
+
+
+def _normalize_phrase(phrase: str) -> str:
+    # jsonl phrases may carry escaped sequences like \n; matching is case-insensitive
+    # (non-ASCII text round-trips: latin-1 bytes decode to themselves, the rest via \uXXXX)
+    try:
+        phrase = phrase.encode("latin-1", "backslashreplace").decode("unicode_escape")
+    except UnicodeDecodeError:
+        pass
+    return phrase.strip().lower()
+
+
+class PhraseMatcher:
+    """
+    Finds which of a fixed set of phrases occur in a text with one regex pass.
+
+    The pattern is a lookahead over the alternation of all phrases (longest first),
+    so it tests every start position and overlapping phrases are all seen; a phrase
+    contained in a longer matched phrase is implied by it.
+    """
+
+    def __init__(self, phrases: Tuple[str, ...]):
+        self.phrases = tuple(p for p in dict.fromkeys(_normalize_phrase(p) for p in phrases) if p)
+        alts = sorted(self.phrases, key=len, reverse=True)
+        self._regex = (
+            re.compile("(?=(" + "|".join(re.escape(p) for p in alts) + "))", re.IGNORECASE)
+            if alts else None
+        )
+        self._implied: Dict[str, FrozenSet[str]] = {
+            p: frozenset(q for q in self.phrases if q in p) for p in self.phrases
+        }
+
+    def find(self, text: str) -> FrozenSet[str]:
+        if self._regex is None or not text:
+            return frozenset()
+        found: set[str] = set()
+        for m in self._regex.finditer(text):
+            hit = m.group(1).lower()
+            if hit not in found:
+                found |= self._implied.get(hit, {hit})
+        return frozenset(found)
+
+
+@lru_cache(maxsize=1024)
+def _matcher(phrases: Tuple[str, ...]) -> PhraseMatcher:
+    return PhraseMatcher(phrases)
+
+
+@dataclass
+class CaseScore:
+    passed: bool
+    missing: List[str] = field(default_factory=list)
+    forbidden_found: List[str] = field(default_factory=list)
+    missing_citations: List[str] = field(default_factory=list)
+    cited: List[str] = field(default_factory=list)
+
+    def failures(self) -> List[str]:
+        return (
+            [f"Missing required text: {s}" for s in self.missing]
+            + [f"Found forbidden text: {s}" for s in self.forbidden_found]
+            + [f"Missing citation of: {s}" for s in self.missing_citations]
+        )
+
+    def details(self) -> Dict[str, List[str]]:
+        return {
+            "missing": self.missing,
+            "forbidden_found": self.forbidden_found,
+            "missing_citations": self.missing_citations,
+        }
+
+
+def result_text(result: Dict[str, Any]) -> str:
+    """
+    Text a run is scored on: the approved draft (without the verifier's section,
+    which lists uncited sources), else the blocked final output.
+    """
+    if isinstance(result, dict):
+        for key in ("draft", "final_output"):
+            val = result.get(key)
+            if isinstance(val, str) and val.strip():
+                return val
+    return ""
+
+
+def _cites(source_id: str, entry: str) -> bool:
+    # entries are source_id prefixes: "doc:risks.md", "doc:weekly_report_week", "doc:"
+    return source_id.startswith(entry)
+
+
+def score_case(case: EvalCase, text: str) -> CaseScore:
+    """
+    - every must_include phrase appears (case-insensitive)
+    - no must_not_include phrase appears (case-insensitive)
+    - every must_cite entry is cited: a doc:...#chunk_N marker starting with it
+      (e.g. "doc:risks.md" matches doc:risks.md#chunk_2)
+    Required and forbidden phrases share one matcher pass over the text.
+    """
+    matcher = _matcher(case.must_include + case.must_not_include)
+    found = matcher.find(text or "")
+
+    missing = [p for p in case.must_include if _normalize_phrase(p) and _normalize_phrase(p) not in found]
+    forbidden = [p for p in case.must_not_include if _normalize_phrase(p) and _normalize_phrase(p) in found]
+
+    cited = extract_citations(text or "")
+    missing_citations = [c for c in case.must_cite if c.strip() and not any(_cites(sid, c) for sid in cited)]
+
+    return CaseScore(
+        passed=not (missing or forbidden or missing_citations),
+        missing=missing,
+        forbidden_found=forbidden,
+        missing_citations=missing_citations,
+        cited=cited,
+    )
+
+
+@dataclass
+class RetrievalScore:
+    k: int
+    recall: float  # share of must_cite entries with a hit in the top k
+    reciprocal_rank: float  # 1 / rank of the first must_cite hit, 0.0 if none in the top k
+    ranks: Dict[str, int] = field(default_factory=dict)  # must_cite entry -> 1-based rank of its first hit
+    missing: List[str] = field(default_factory=list)
+
+
+def score_retrieval(case: EvalCase, results: List[Dict[str, Any]], k: int) -> RetrievalScore:
+    """
+    Scores a research plan's ranked results against must_cite (same matching as
+    score_case). Results merged from adjacent chunks count for each of their parts.
+    """
+    wanted = [c for c in case.must_cite if c.strip()]
+    ranks: Dict[str, int] = {}
+    for rank, r in enumerate(results[:k], start=1):
+        sids = [p.get("source_id") or "" for p in r.get("parts") or []] or [r.get("source_id") or ""]
+        for c in wanted:
+            if c not in ranks and any(_cites(sid, c) for sid in sids):
+                ranks[c] = rank
+
+    return RetrievalScore(
+        k=k,
+        recall=len(ranks) / len(wanted) if wanted else 1.0,
+        reciprocal_rank=1.0 / min(ranks.values()) if ranks else 0.0,
+        ranks=ranks,
+        missing=[c for c in wanted if c not in ranks],
+    )
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Record/replay of external API calls (query embeddings, chat completions), keyed by
+# a hash of the request. CASSETTE_MODE=record serves known requests from the cassette
+# and records new ones; replay serves only from the cassette and fails on a miss.
+# Unset = off (live calls). Delete the file to re-record from scratch.
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "").strip().lower()
+CASSETTE_PATH = Path(os.getenv("CASSETTE_PATH", "data/cassettes/eval.jsonl"))
+
+_MODES = ("record", "replay")
+
+
+class CassetteMiss(KeyError):
+    """
+    Replay mode got a request that was never recorded.
+    """
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    raw = json.dumps({"kind": kind, **request}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    A JSONL file of {"key", "kind", "response"} lines, loaded once into memory.
+    Recorded lines are appended (thread-safe); on load, the last line for a key wins.
+    """
+
+    def __init__(self, path: Path, mode: str):
+        if mode not in _MODES:
+            raise ValueError(f"Unknown cassette mode: {mode!r} (expected one of {_MODES})")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.recorded = 0
+        self._entries: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    row = json.loads(line)
+                    self._entries[row["key"]] = row["response"]
+        elif mode == "replay":
+            raise FileNotFoundError(f"Missing cassette file: {path} (record it first with CASSETTE_MODE=record)")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self.hits += 1
+            return response
+
+    def put(self, key: str, kind: str, response: Any) -> None:
+        line = json.dumps({"key": key, "kind": kind, "response": response}, ensure_ascii=False)
+        with self._lock:
+            self._entries[key] = response
+            self.recorded += 1
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def call(self, kind: str, request: Dict[str, Any], fn: Callable[[], Any]) -> Any:
+        """
+        Response for one request: from the cassette when recorded, else fn()
+        (recorded in record mode; CassetteMiss in replay mode).
+        fn() must return JSON-serializable data.
+        """
+        key = request_key(kind, request)
+        response = self.get(key)
+        if response is not None:
+            return response
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded {kind} response for request {key[:12]} in {self.path}")
+        response = fn()
+        self.put(key, kind, response)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "entries": len(self),
+            "hits": self.hits,
+            "recorded": self.recorded,
+        }
+
+
+_CASSETTE: Optional[Cassette] = None
+_CASSETTE_LOCK = threading.Lock()
+_CONFIGURED = False
+
+
+def use_cassette(mode: Optional[str], path: Optional[Path] = None) -> Optional[Cassette]:
+    """
+    Process-wide switch (every thread of the process shares it). mode=None or ""
+    turns the cassette off. Returns the active cassette.
+    """
+    global _CASSETTE, _CONFIGURED
+    mode = (mode or "").strip().lower()
+    with _CASSETTE_LOCK:
+        _CASSETTE = Cassette(Path(path or CASSETTE_PATH), mode) if mode else None
+        _CONFIGURED = True
+    return _CASSETTE
+
+
+def get_cassette() -> Optional[Cassette]:
+    global _CASSETTE, _CONFIGURED
+    if not _CONFIGURED:
+        with _CASSETTE_LOCK:
+            if not _CONFIGURED:
+                _CASSETTE = Cassette(CASSETTE_PATH, CASSETTE_MODE) if CASSETTE_MODE else None
+                _CONFIGURED = True
+    return _CASSETTE
+
+
+def cassette_call(kind: str, request: Dict[str, Any], fn: Callable[[], Any]) -> Any:
+    """
+    fn() when no cassette is active, else the cassette's recorded/recording response.
+    """
+    cassette = get_cassette()
+    if cassette is None:
+        return fn()
+    return cassette.call(kind, request, fn)
+
+
+def cassette_call_many(
+    kind: str,
+    requests: List[Dict[str, Any]],
+    fn: Callable[[List[int]], List[Any]],
+) -> List[Any]:
+    """
+    Batched variant: one cassette entry per request, so recordings do not depend on
+    how requests were grouped into API calls. fn(positions) is called once with the
+    positions of the requests that are not recorded and returns their responses
+    in that order.
+    """
+    cassette = get_cassette()
+    if cassette is None:
+        return fn(list(range(len(requests))))
+
+    keys = [request_key(kind, r) for r in requests]
+    responses: List[Any] = [cassette.get(k) for k in keys]
+    missing = [i for i, resp in enumerate(responses) if resp is None]
+    if not missing:
+        return responses
+    if cassette.mode == "replay":
+        raise CassetteMiss(
+            f"No recorded {kind} response for {len(missing)} of {len(requests)} request(s) in {cassette.path}"
+        )
+
+    for i, resp in zip(missing, fn(missing)):
+        cassette.put(keys[i], kind, resp)
+        responses[i] = resp
+    return responses
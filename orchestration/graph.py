@@ -1,52 +1,279 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import contextvars
+import dataclasses
+import functools
+import time
+from typing import Any, Callable, Dict, Optional
 
-from langgraph.graph import END, StateGraph
+from langgraph.graph import END, START, StateGraph
 
-from shared_state import SharedState
+from orchestration.profiling import PROFILE_RUNS, profile_run, profiled
+from orchestration.tracing import trace_run, traced
+from orchestration.result_cache import RESULT_CACHE, RESULT_CACHE_ENABLED, make_cache_key
+from retrieval.retriever import get_index_version
+from shared_state import SharedState, notes_to_dicts
+from writer.evidence_packer import WRITER_MODEL
 from agents.planner import planner_agent
-from agents.researcher import researcher_agent
-from agents.writer import writer_agent
-from agents.verifier import verifier_agent
+from agents.researcher import researcher_agent, researcher_retry_agent, should_retry
+from agents.writer import DETERMINISTIC_TASKS, deterministic_writer_agent, writer_agent, writer_warmup
+from agents.verifier import has_cited_evidence, verifier_agent, verifier_not_found
+
+
+_COMPILED_GRAPH = None
+
+# Per-run node progress callback (node name, wall ms); set by run_task(on_progress=...)
+# and inherited by the graph's worker threads.
+_ON_PROGRESS: contextvars.ContextVar[Optional[Callable[[str, float], None]]] = contextvars.ContextVar(
+    "on_progress", default=None
+)
+
+
+def _as_partial_update(agent: Callable[[SharedState], SharedState]) -> Callable[[SharedState], Dict[str, Any]]:
+    """
+    Adapt a mutate-and-return agent to a LangGraph partial update, so nodes can run
+    in parallel branches: the agent works on a copy whose trace/meta are private,
+    and only reassigned fields, new trace rows and new/changed meta keys are returned
+    (trace/meta are merged by their reducers in SharedState).
+    """
+    def node(state: SharedState) -> Dict[str, Any]:
+        work = dataclasses.replace(state, trace=list(state.trace), meta=dict(state.meta))
+        agent(work)
+
+        update: Dict[str, Any] = {}
+        for f in dataclasses.fields(SharedState):
+            if f.name in ("trace", "meta"):
+                continue
+            if getattr(work, f.name) is not getattr(state, f.name):
+                update[f.name] = getattr(work, f.name)
+
+        new_rows = work.trace[len(state.trace):]
+        if new_rows:
+            update["trace"] = new_rows
+        new_meta = {k: v for k, v in work.meta.items() if state.meta.get(k) is not v}
+        if new_meta:
+            update["meta"] = new_meta
+        return update
+
+    node.__name__ = agent.__name__
+    return node
+
+
+def _timed(name: str, fn: Callable[[SharedState], Dict[str, Any]]) -> Callable[[SharedState], Dict[str, Any]]:
+    # adds the node's wall time to its partial update (summed into SharedState.node_timings_ms)
+    # and reports it to the run's progress callback, if any
+    @functools.wraps(fn)
+    def node(state: SharedState) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        update = fn(state)
+        ms = round((time.perf_counter() - t0) * 1000, 3)
+        on_progress = _ON_PROGRESS.get()
+        if on_progress is not None:
+            try:
+                on_progress(name, ms)
+            except Exception:
+                pass
+        return {**update, "node_timings_ms": {name: ms}}
+
+    return node
+
+
+def _evidence_gate(state: SharedState) -> Dict[str, Any]:
+    # join point for the parallel branches; routing happens on its outgoing edges
+    return {}
+
+
+def _route_after_research(state: SharedState) -> str:
+    if not has_cited_evidence(state):
+        return "not_found"
+    if (state.task_key or "").strip() in DETERMINISTIC_TASKS:
+        return "deterministic_writer"
+    return "writer"
+
+
+def _route_after_verify(state: SharedState) -> str:
+    return "researcher_retry" if should_retry(state) else END
+
+
+def _route_after_retry(state: SharedState) -> str:
+    # nothing new retrieved, or no time left to write again: the verifier's blocked output stands
+    retry = state.meta.get("verifier_retry") or {}
+    if not retry.get("added_notes"):
+        return END
+    deadline = retry.get("deadline")
+    if isinstance(deadline, (int, float)) and time.time() >= deadline:
+        return END
+    return "evidence_gate"
 
 
 def build_graph():
     """
     Required workflow:
     planner -> researcher -> writer -> verifier -> END
+
+    planner_agent is static and does no I/O, so retrieval starts speculatively in
+    parallel with it, and writer_warmup opens the LLM connection (once per process)
+    in the same step. All three branches join at the evidence gate, which routes:
+
+    - no cited evidence        -> not_found (precomputed verdict) -> END
+    - deterministic task_key   -> deterministic_writer -> verifier -> END
+    - otherwise                -> writer (LLM) -> verifier -> END
+
+    A blocked draft gets a bounded second pass (see agents/researcher.py::should_retry):
+    verifier -> researcher_retry -> evidence_gate -> writer -> verifier.
+
+        START -> planner ------\
+        START -> researcher ----+-> evidence_gate -> ...
+        START -> writer_warmup -/
     """
     graph = StateGraph(SharedState)
 
-    graph.add_node("planner", planner_agent)
-    graph.add_node("researcher", researcher_agent)
-    graph.add_node("writer", writer_agent)
-    graph.add_node("verifier", verifier_agent)
+    def node(name: str, fn: Callable[[SharedState], Any]) -> None:
+        # traced()/profiled() are no-ops unless the run is sampled / profiled
+        graph.add_node(name, traced(f"node.{name}")(profiled(name)(_timed(name, fn))))
 
-    graph.set_entry_point("planner")
-    graph.add_edge("planner", "researcher")
-    graph.add_edge("researcher", "writer")
+    node("planner", _as_partial_update(planner_agent))
+    node("researcher", _as_partial_update(researcher_agent))
+    node("writer_warmup", writer_warmup)
+    graph.add_node("evidence_gate", _evidence_gate)
+    node("not_found", verifier_not_found)
+    node("deterministic_writer", _as_partial_update(deterministic_writer_agent))
+    node("writer", _as_partial_update(writer_agent))
+    node("verifier", _as_partial_update(verifier_agent))
+    node("researcher_retry", _as_partial_update(researcher_retry_agent))
+
+    graph.add_edge(START, "planner")
+    graph.add_edge(START, "researcher")
+    graph.add_edge(START, "writer_warmup")
+    graph.add_edge(["planner", "researcher", "writer_warmup"], "evidence_gate")
+    graph.add_conditional_edges(
+        "evidence_gate",
+        _route_after_research,
+        ["not_found", "deterministic_writer", "writer"],
+    )
+    graph.add_edge("not_found", END)
+    graph.add_edge("deterministic_writer", "verifier")
     graph.add_edge("writer", "verifier")
-    graph.add_edge("verifier", END)
+    graph.add_conditional_edges("verifier", _route_after_verify, ["researcher_retry", END])
+    graph.add_conditional_edges("researcher_retry", _route_after_retry, ["evidence_gate", END])
 
     return graph.compile()
 
 
-def run_task(task: str, task_key: str | None = None) -> Dict[str, Any]:
+def get_graph():
+    """
+    Compiled graph, built once per process (compiled graphs are safe to invoke concurrently).
+    """
+    global _COMPILED_GRAPH
+    if _COMPILED_GRAPH is None:
+        _COMPILED_GRAPH = build_graph()
+    return _COMPILED_GRAPH
+
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    # never cache runs whose retrieval failed (transient API/index errors)
+    for row in result.get("trace") or []:
+        if isinstance(row, dict) and str(row.get("outcome", "")).startswith("Retrieval error"):
+            return False
+    return True
+
+
+def run_task(
+    task: str,
+    task_key: str | None = None,
+    use_cache: bool = True,
+    profile: bool | None = None,
+    on_progress: Callable[[str, float], None] | None = None,
+) -> Dict[str, Any]:
     """
     Convenience runner for local testing / UI.
     Always returns a plain dict (safe for run_local.py).
+
+    Whole results are cached per (task_key, normalized task text, index version,
+    writer model); pass use_cache=False to bypass the cache for this call.
+
+    profile=True (default: PROFILE_RUNS env) runs every graph node and search_docs
+    under cProfile + tracemalloc; reports are listed in meta["profile"] and the
+    trace. Profiled runs bypass the result cache.
+
+    With TRACE_EXPORT set, sampled runs record a span tree
+    (run -> node.* -> search_docs -> embed / faiss.search, llm.chat) that is
+    exported to JSONL or OTLP; meta["trace_id"] identifies it.
+
+    on_progress(node, ms) is called as each graph node finishes (used by
+    orchestration/jobs.py for live progress).
     """
-    app = build_graph()
+    token = _ON_PROGRESS.set(on_progress)
+    try:
+        return _run_traced(task, task_key, use_cache, profile)
+    finally:
+        _ON_PROGRESS.reset(token)
+
+
+def _run_traced(task: str, task_key: str | None, use_cache: bool, profile: bool | None) -> Dict[str, Any]:
+    with trace_run("run", task_key=(task_key or "default")) as root:
+        result = _run_task(task, task_key, use_cache, profile)
+        if root is not None:
+            root.set(
+                cache_hit=bool((result.get("meta") or {}).get("result_cache", {}).get("hit")),
+                blocked=bool(result.get("verification_notes")),
+                retries=int(((result.get("meta") or {}).get("verifier_retry") or {}).get("attempts", 0)),
+            )
+            result.setdefault("meta", {})["trace_id"] = root.trace_id
+        return result
+
 
-    state = SharedState(task=task, task_key=task_key, task_text=task)
+def _run_task(task: str, task_key: str | None, use_cache: bool, profile: bool | None) -> Dict[str, Any]:
+    if profile is None:
+        profile = PROFILE_RUNS
 
-    final_state = app.invoke(state)
+    cache_key = None
+    if use_cache and RESULT_CACHE_ENABLED and not profile:
+        cache_key = make_cache_key(task_key, task, get_index_version(), WRITER_MODEL)
+        cached = RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            result, age_s = cached
+            result.setdefault("meta", {})["result_cache"] = {"hit": True, "key": cache_key, "age_s": round(age_s, 1)}
+            result.setdefault("trace", []).append({
+                "step": "cache",
+                "agent": "orchestrator",
+                "action": "Result cache lookup",
+                "outcome": f"Hit (cached {int(age_s)}s ago)",
+            })
+            return result
+
+    app = get_graph()
+
+    state = SharedState(task=task, task_key=task_key, task_text=task, meta={"run_started_at": time.time()})
+
+    if profile:
+        with profile_run() as profiler:
+            final_state = app.invoke(state)
+    else:
+        final_state = app.invoke(state)
 
     if isinstance(final_state, dict):
-        return final_state
+        result = final_state
+    elif hasattr(final_state, "__dict__"):
+        result = final_state.__dict__  # SharedState dataclass
+    else:
+        return {"final_state": str(final_state)}
+
+    # EvidenceNote references only hold for the index loaded now: results outlive the run
+    # (session state, job results, cache entries), so they carry the text itself
+    result["research_notes"] = notes_to_dicts(result.get("research_notes"))
+
+    if profile:
+        result.setdefault("meta", {})["profile"] = {"dir": str(profiler.out_dir), "reports": profiler.reports}
+        result.setdefault("trace", []).append({
+            "step": "profile",
+            "agent": "orchestrator",
+            "action": "cProfile + tracemalloc per node and search_docs call",
+            "outcome": f"{len(profiler.reports)} report(s) in {profiler.out_dir}",
+        })
 
-    if hasattr(final_state, "__dict__"):
-        return final_state.__dict__  # SharedState dataclass
+    if cache_key is not None and _is_cacheable(result):
+        result.setdefault("meta", {})["result_cache"] = {"hit": False, "key": cache_key}
+        RESULT_CACHE.put(cache_key, result)
 
-    return {"final_state": str(final_state)}
+    return result
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from orchestration.graph import run_task
+
+
+@dataclass
+class Job:
+    job_id: str
+    task: str
+    task_key: Optional[str]
+    label: str = ""
+    status: str = "queued"  # queued / running / done / error
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # node-level progress: {"node", "ms", "at"} per finished graph node
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    context: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def latency_ms(self) -> Optional[int]:
+        if self.started_at is None:
+            return None
+        return int(((self.finished_at or time.time()) - self.started_at) * 1000)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+
+class JobQueue:
+    """
+    Runs run_task calls on a thread pool so callers (the Streamlit script) can
+    submit work, get a job ID back immediately and poll for progress.
+    on_done(job) runs on the worker thread after each run, before the job is marked done.
+    """
+
+    def __init__(self, max_workers: int = 4, on_done: Optional[Callable[[Job], None]] = None, max_jobs: int = 500):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="run-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._on_done = on_done
+        self._max_jobs = max_jobs
+
+    def submit(
+        self,
+        task: str,
+        task_key: Optional[str] = None,
+        *,
+        label: str = "",
+        use_cache: bool = True,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        job = Job(job_id=uuid.uuid4().hex[:12], task=task, task_key=task_key, label=label, context=dict(context or {}))
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._evict()
+        self._pool.submit(self._run, job, use_cache)
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, job_ids: Optional[List[str]] = None) -> List[Job]:
+        with self._lock:
+            if job_ids is None:
+                return list(self._jobs.values())
+            return [self._jobs[j] for j in job_ids if j in self._jobs]
+
+    def _evict(self) -> None:
+        # drop the oldest finished jobs beyond max_jobs
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in sorted(finished, key=lambda j: j.submitted_at)[: max(len(self._jobs) - self._max_jobs, 0)]:
+            del self._jobs[job.job_id]
+
+    def _run(self, job: Job, use_cache: bool) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+
+        def _progress(node: str, ms: float) -> None:
+            job.events.append({"node": node, "ms": ms, "at": time.time()})
+
+        try:
+            job.result = run_task(job.task, task_key=job.task_key, use_cache=use_cache, on_progress=_progress)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {str(e)[:300]}"
+        job.finished_at = time.time()
+
+        # on_done runs before the status flips, so pollers never see a half-finished job
+        if self._on_done is not None:
+            try:
+                self._on_done(job)
+            except Exception:
+                pass
+        job.status = "error" if job.error else "done"
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import os
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Opt-in: PROFILE_RUNS=1 (or run_task(..., profile=True) / run_local.py --profile).
+PROFILE_RUNS = os.getenv("PROFILE_RUNS", "").strip().lower() in ("1", "true", "yes")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "data/profiles"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25"))
+
+_ACTIVE: contextvars.ContextVar[Optional["RunProfiler"]] = contextvars.ContextVar("active_run_profiler", default=None)
+
+# cProfile hooks are per thread and do not nest: an inner section (search_docs inside
+# the researcher node) only records wall time / allocations, its calls already show
+# up in the enclosing node's pstats.
+_THREAD = threading.local()
+
+# tracemalloc is process-wide: started by the first profiled run, stopped by the last.
+_TRACEMALLOC_LOCK = threading.Lock()
+_TRACEMALLOC_USERS = 0
+
+
+def _start_tracemalloc() -> None:
+    global _TRACEMALLOC_USERS
+    with _TRACEMALLOC_LOCK:
+        if _TRACEMALLOC_USERS == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _TRACEMALLOC_USERS += 1
+
+
+def _stop_tracemalloc() -> None:
+    global _TRACEMALLOC_USERS
+    with _TRACEMALLOC_LOCK:
+        _TRACEMALLOC_USERS = max(_TRACEMALLOC_USERS - 1, 0)
+        if _TRACEMALLOC_USERS == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class RunProfiler:
+    """
+    Collects one cProfile (.pstats) and one tracemalloc top-N report (.alloc.txt)
+    per profiled section of a run, under PROFILE_DIR/<run_id>/.
+
+    Allocation diffs are process-wide: sections running in parallel (graph branches,
+    concurrent runs) see each other's allocations.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, out_dir: Optional[Path] = None, top_n: int = PROFILE_TOP_N):
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.out_dir = (out_dir or PROFILE_DIR) / self.run_id
+        self.top_n = top_n
+        self.reports: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def _next_prefix(self, name: str) -> str:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        return f"{seq:03d}_{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}"
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        prefix = self._next_prefix(name)
+        before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+        prof: Optional[cProfile.Profile] = None
+        if not getattr(_THREAD, "profiling", False):
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+                _THREAD.profiling = True
+            except ValueError:
+                # another profiling tool owns the interpreter hook
+                prof = None
+
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_ms = (time.perf_counter() - t0) * 1000
+            if prof is not None:
+                prof.disable()
+                _THREAD.profiling = False
+            self._write_report(name, prefix, wall_ms, prof, before)
+
+    def _write_report(
+        self,
+        name: str,
+        prefix: str,
+        wall_ms: float,
+        prof: Optional[cProfile.Profile],
+        before: Optional[tracemalloc.Snapshot],
+    ) -> None:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        report: Dict[str, Any] = {"name": name, "wall_ms": round(wall_ms, 1)}
+
+        if prof is not None:
+            pstats_path = self.out_dir / f"{prefix}.pstats"
+            prof.dump_stats(str(pstats_path))
+            report["pstats"] = str(pstats_path)
+
+        if before is not None and tracemalloc.is_tracing():
+            stats = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            alloc_path = self.out_dir / f"{prefix}.alloc.txt"
+            lines = [f"# {name}: top {self.top_n} allocation deltas ({wall_ms:.1f} ms)"]
+            lines += [str(s) for s in stats[: self.top_n]]
+            alloc_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            report["alloc"] = str(alloc_path)
+            report["alloc_kb"] = round(sum(s.size_diff for s in stats) / 1024, 1)
+
+        with self._lock:
+            self.reports.append(report)
+
+
+@contextmanager
+def profile_run(run_id: Optional[str] = None) -> Iterator[RunProfiler]:
+    """
+    Activate profiling for everything called in this context (graph nodes run
+    in worker threads inherit it through contextvars).
+    """
+    profiler = RunProfiler(run_id=run_id)
+    _start_tracemalloc()
+    token = _ACTIVE.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _ACTIVE.reset(token)
+        _stop_tracemalloc()
+
+
+def profiled(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator: profile calls made inside an active profile_run(); a no-op otherwise.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = _ACTIVE.get()
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with profiler.section(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
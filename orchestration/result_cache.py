@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Whole-run result cache settings (env overridable).
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "3600"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_DISABLED", "").strip().lower() not in {"1", "true", "yes"}
+
+
+def normalize_task_text(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip())
+
+
+def make_cache_key(task_key: Optional[str], task_text: str, index_version: str, writer_model: str) -> str:
+    raw = "\x1f".join([(task_key or "").strip(), normalize_task_text(task_text), index_version, writer_model])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    In-process LRU cache of final run_task state dicts with a TTL.
+    Values are deep-copied on the way in and out so callers can mutate results freely.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl_s: float = RESULT_CACHE_TTL_S) -> None:
+        self.max_entries = max(max_entries, 1)
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Returns (result, age_seconds) or None on miss / expiry.
+        """
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, value = item
+            if self.ttl_s > 0 and now - stored_at > self.ttl_s:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value), now - stored_at
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        stored = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (time.time(), stored)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._data)
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+RESULT_CACHE = ResultCache()
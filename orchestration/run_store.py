@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# Local, append-only history of runs (app / eval) for latency analytics.
+RUN_STORE_PATH = Path(os.getenv("RUN_STORE_PATH", "data/runs/runs.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    task_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    citations INTEGER NOT NULL DEFAULT 0,
+    evidence_tokens INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    node_timings TEXT NOT NULL DEFAULT '{}',
+    prompt_preview TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE INDEX IF NOT EXISTS runs_task_key ON runs (task_key, ts);
+"""
+
+_COLUMNS = (
+    "ts", "kind", "task_key", "status", "latency_ms", "cache_hit", "chunks", "citations",
+    "evidence_tokens", "prompt_tokens", "completion_tokens", "retries", "node_timings", "prompt_preview",
+)
+
+_LOCK = threading.Lock()
+_INITIALIZED: set[str] = set()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=5)
+    conn.row_factory = sqlite3.Row
+    if str(path) not in _INITIALIZED:
+        conn.executescript(_SCHEMA)
+        _INITIALIZED.add(str(path))
+    return conn
+
+
+def run_row(
+    result: Dict[str, Any],
+    *,
+    kind: str,
+    task_key: str,
+    prompt: str,
+    latency_ms: int,
+    eval_pass: Optional[bool] = None,
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Structured signals of one run_task result (read from meta, not from text).
+    A run that raised (error set, usually no result) is stored with status "error".
+    """
+    meta = (result or {}).get("meta") or {}
+    if error:
+        status = "error"
+    elif kind == "eval" and eval_pass is not None:
+        status = "pass" if eval_pass else "fail"
+    elif (result or {}).get("verification_notes"):
+        status = "blocked"
+    else:
+        status = "ok"
+
+    usage = meta.get("llm_usage") or {}
+    return {
+        "ts": time.time(),
+        "kind": kind,
+        "task_key": task_key or "default",
+        "status": status,
+        "latency_ms": int(latency_ms),
+        "cache_hit": int(bool((meta.get("result_cache") or {}).get("hit"))),
+        "chunks": int((meta.get("retrieval_debug") or {}).get("retrieved_count", 0)),
+        "citations": int((meta.get("citation_check") or {}).get("cited", 0)),
+        "evidence_tokens": int((meta.get("evidence_packing") or {}).get("tokens_used", 0)),
+        "prompt_tokens": int(usage.get("prompt_tokens", 0)),
+        "completion_tokens": int(usage.get("completion_tokens", 0)),
+        "retries": int((meta.get("verifier_retry") or {}).get("attempts", 0)),
+        "node_timings": json.dumps((result or {}).get("node_timings_ms") or {}),
+        "prompt_preview": (prompt or "")[:80].replace("\n", " ").strip(),
+    }
+
+
+def record_run(row: Dict[str, Any], path: Path = RUN_STORE_PATH) -> None:
+    with _LOCK:
+        conn = _connect(path)
+        try:
+            conn.execute(
+                f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                [row.get(c) for c in _COLUMNS],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def load_runs(
+    since_ts: Optional[float] = None,
+    limit: Optional[int] = None,
+    path: Path = RUN_STORE_PATH,
+) -> List[Dict[str, Any]]:
+    """
+    Newest first. node_timings is decoded to a dict.
+    """
+    if not path.exists():
+        return []
+    sql = "SELECT * FROM runs"
+    args: List[Any] = []
+    if since_ts is not None:
+        sql += " WHERE ts >= ?"
+        args.append(since_ts)
+    sql += " ORDER BY ts DESC"
+    if limit:
+        sql += " LIMIT ?"
+        args.append(int(limit))
+
+    try:
+        conn = _connect(path)
+        try:
+            rows = [dict(r) for r in conn.execute(sql, args)]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return []
+
+    for r in rows:
+        try:
+            r["node_timings"] = json.loads(r.get("node_timings") or "{}")
+        except ValueError:
+            r["node_timings"] = {}
+    return rows
+
+
+def clear_runs(path: Path = RUN_STORE_PATH) -> None:
+    if not path.exists():
+        return
+    with _LOCK:
+        conn = _connect(path)
+        try:
+            conn.execute("DELETE FROM runs")
+            conn.commit()
+        finally:
+            conn.close()
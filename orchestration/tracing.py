@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Span export: TRACE_EXPORT=jsonl (TRACE_JSONL_PATH) or otlp (OTLP/HTTP JSON to
+# TRACE_OTLP_ENDPOINT, e.g. a local collector). Unset = tracing off.
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "").strip().lower()
+TRACE_JSONL_PATH = Path(os.getenv("TRACE_JSONL_PATH", "data/traces/spans.jsonl"))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "agentic-research-assistant")
+
+_CURRENT: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error", "_spans")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], spans: List["Span"]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self._spans = spans  # shared by every span of the run; the root exports it
+
+    def set(self, **attrs: Any) -> None:
+        self.attributes.update({k: v for k, v in attrs.items() if v is not None})
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def _otlp_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def _otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "orchestration.tracing"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                        "name": s.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns or s.start_ns),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                    }
+                    for s in spans
+                ],
+            }],
+        }],
+    }
+
+
+class _Exporter:
+    """
+    Ships finished runs from a background thread so export never adds run latency.
+    Export errors are dropped: tracing must not break a run.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(maxsize=1000)
+        self._thread = threading.Thread(target=self._loop, name="span-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            pass
+
+    def flush(self, timeout_s: float = 5.0) -> None:
+        deadline = time.time() + timeout_s
+        while not self._queue.empty() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def _loop(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            try:
+                if self.mode == "otlp":
+                    self._send_otlp(spans)
+                else:
+                    self._write_jsonl(spans)
+            except Exception:
+                pass
+
+    def _write_jsonl(self, spans: List[Span]) -> None:
+        TRACE_JSONL_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with TRACE_JSONL_PATH.open("a", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+    def _send_otlp(self, spans: List[Span]) -> None:
+        body = json.dumps(_otlp_payload(spans), default=str).encode("utf-8")
+        req = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(req, timeout=5).close()
+
+
+_EXPORTER: Optional[_Exporter] = None
+_EXPORTER_LOCK = threading.Lock()
+
+
+def _get_exporter() -> Optional[_Exporter]:
+    global _EXPORTER
+    if TRACE_EXPORT not in ("jsonl", "otlp"):
+        return None
+    with _EXPORTER_LOCK:
+        if _EXPORTER is None:
+            _EXPORTER = _Exporter(TRACE_EXPORT)
+    return _EXPORTER
+
+
+@contextmanager
+def trace_run(name: str = "run", **attrs: Any) -> Iterator[Optional[Span]]:
+    """
+    Root span of a run. Sampled with TRACE_SAMPLE_RATE; yields None (and every
+    nested span() is a no-op) when tracing is off or the run is not sampled.
+    The whole span tree is exported when the root ends.
+    """
+    exporter = _get_exporter()
+    if exporter is None or random.random() >= TRACE_SAMPLE_RATE:
+        yield None
+        return
+
+    spans: List[Span] = []
+    root = Span(name, trace_id=secrets.token_hex(16), parent_id=None, spans=spans)
+    root.set(**attrs)
+    token = _CURRENT.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        _CURRENT.reset(token)
+        root.end_ns = time.time_ns()
+        spans.append(root)
+        exporter.submit(spans)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """
+    Child of the current span (propagates into graph worker threads via contextvars).
+    """
+    parent = _CURRENT.get()
+    if parent is None:
+        yield None
+        return
+
+    s = Span(name, trace_id=parent.trace_id, parent_id=parent.span_id, spans=parent._spans)
+    s.set(**attrs)
+    token = _CURRENT.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        _CURRENT.reset(token)
+        s.end_ns = time.time_ns()
+        parent._spans.append(s)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator: record a span per call inside a sampled run; a no-op otherwise.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _CURRENT.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _CURRENT.get()
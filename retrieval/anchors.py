@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from retrieval.index_store import INDEX_DIR
+from retrieval.research_utils import reconstruct_documents
+from retrieval.retriever import get_index_version, get_meta_rows
+
+ANCHORS_PATH = INDEX_DIR / "anchors.json"
+
+
+@dataclass(frozen=True)
+class AnchorSpec:
+    doc_id: str
+    start_marker: str
+    end_marker: str
+    source_id: str
+    label: str
+
+
+# Named spans any research plan postprocess can fetch with get_anchor(name).
+ANCHOR_SPECS: Dict[str, AnchorSpec] = {
+    "technical_decisions.options": AnchorSpec(
+        doc_id="doc:technical_decisions.md",
+        start_marker="### Option A:",
+        end_marker="## Current Recommendation",
+        source_id="doc:technical_decisions.md#anchor_options",
+        label="Option A/Option B section",
+    ),
+}
+
+_CACHED_ANCHORS: Optional[Tuple[str, Dict[str, Dict[str, Any]]]] = None
+
+
+def _line_of(text: str, offset: int) -> int:
+    return text.count("\n", 0, offset) + 1
+
+
+def build_anchors(chunk_rows: List[Dict[str, Any]], index_version: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve ANCHOR_SPECS against the indexed documents (rebuilt from their chunks).
+    Anchors whose markers are missing are left out.
+    """
+    docs = reconstruct_documents(chunk_rows)
+    anchors: Dict[str, Dict[str, Any]] = {}
+
+    for name, spec in ANCHOR_SPECS.items():
+        doc = docs.get(spec.doc_id)
+        if not doc:
+            continue
+        text = doc["text"]
+
+        start = text.find(spec.start_marker)
+        if start == -1:
+            continue
+        inner_start = start + len(spec.start_marker)
+        end = text.find(spec.end_marker, inner_start)
+        if end == -1:
+            continue
+        inner = text[inner_start:end].strip()
+        if not inner:
+            continue
+
+        anchors[name] = {
+            "name": name,
+            "source_id": spec.source_id,
+            "text": spec.start_marker + "\n" + inner,
+            "location": (
+                f"anchor — {spec.label} (between '{spec.start_marker}' and '{spec.end_marker}')"
+                f" — lines {_line_of(text, start)}–{_line_of(text, end)}"
+            ),
+            "chunk_source_ids": [sid for (s, e, sid, _) in doc["chunks"] if s < end and e > start],
+            "index_version": index_version,
+        }
+
+    return anchors
+
+
+def save_anchors(anchors: Dict[str, Dict[str, Any]], path: Path = ANCHORS_PATH) -> None:
+    path.write_text(json.dumps(anchors, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _load_anchors(index_version: str) -> Dict[str, Dict[str, Any]]:
+    if ANCHORS_PATH.exists():
+        try:
+            stored = json.loads(ANCHORS_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            stored = {}
+        if stored and all(a.get("index_version") == index_version for a in stored.values()):
+            return stored
+
+    # anchors file missing or built for another index: derive from the loaded chunks
+    return build_anchors(get_meta_rows(), index_version=index_version)
+
+
+def _anchors() -> Dict[str, Dict[str, Any]]:
+    global _CACHED_ANCHORS
+
+    version = get_index_version()
+    if _CACHED_ANCHORS is None or _CACHED_ANCHORS[0] != version:
+        _CACHED_ANCHORS = (version, _load_anchors(version))
+    return _CACHED_ANCHORS[1]
+
+
+def get_anchor(name: str) -> Optional[Dict[str, Any]]:
+    """
+    O(1) lookup of a named anchor. The registry is loaded once per index version
+    and reloaded automatically when the retriever picks up a new index.
+    """
+    return _anchors().get(name)
+
+
+def get_anchor_source_ids() -> frozenset[str]:
+    """
+    source_ids of the anchors resolved for the loaded index (doc:<file>#anchor_<name>);
+    drafts may cite them like chunk source_ids.
+    """
+    return frozenset(a["source_id"] for a in _anchors().values() if a.get("source_id"))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batcher for query embeddings.
+
+    Concurrent callers of embed() (one per request thread) are coalesced: the worker
+    thread waits up to `window_ms` after the first pending text for more texts, then
+    issues a single batched embedding call (up to `max_batch` texts, identical texts
+    embedded once) and hands each caller its vector.
+
+    A failed or malformed embedding call fails that batch's callers and the worker
+    keeps serving; embed() gives up after `timeout_s` either way.
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], List[List[float]]],
+        window_ms: float = 10.0,
+        max_batch: int = 64,
+        timeout_s: float = 30.0,
+    ) -> None:
+        self._embed_many = embed_many
+        self._timeout_s = timeout_s
+        self._window_s = max(window_ms, 0.0) / 1000.0
+        self._max_batch = max(max_batch, 1)
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "requests": 0,
+            "batches": 0,
+            "embedded_texts": 0,
+            "max_batch_size": 0,
+            "embed_seconds": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def embed(self, text: str) -> List[float]:
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut.result(timeout=self._timeout_s)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+        out["avg_batch_size"] = round(out["requests"] / out["batches"], 2) if out["batches"] else 0.0
+        return out
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window_s
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = list(dict.fromkeys(t for t, _ in batch))
+
+            t0 = time.perf_counter()
+            try:
+                embedded = self._embed_many(texts)
+                if len(embedded) != len(texts):
+                    raise ValueError(f"Embedding call returned {len(embedded)} vectors for {len(texts)} texts")
+                vectors = dict(zip(texts, embedded))
+                for text, fut in batch:
+                    fut.set_result(vectors[text])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - t0
+
+            with self._lock:
+                self._stats["requests"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["embedded_texts"] += len(texts)
+                self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+                self._stats["embed_seconds"] += elapsed
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Text parsers shared by ingest-time fact extraction (retrieval/fact_store.py) and the
+# deterministic writers' query-time fallbacks (writer/deterministic_*.py).
+
+RISK_ID_RE = re.compile(r"\b(R-\d{3})\s*:\s*([^\n\r]+)")
+SEVERITY_RE = re.compile(r"(?:Severity|SEVERITY)\s*[:\-]\s*(.+)", re.IGNORECASE)
+IMPACT_RE = re.compile(r"(?:Impact|IMPACT)\s*[:\-]\s*(.+)", re.IGNORECASE)
+MITIGATION_RE = re.compile(r"(?:Mitigation|MITIGATION)\s*[:\-]\s*(.+)", re.IGNORECASE)
+
+
+MD_FIELD_RE = {
+    "severity": re.compile(r"\*\*Severity\*\*\s*[:\-]\s*(.+)", re.IGNORECASE),
+    "impact": re.compile(r"\*\*Impact\*\*\s*[:\-]\s*(.+)", re.IGNORECASE),
+    "mitigation": re.compile(r"\*\*Mitigation\*\*\s*[:\-]\s*(.+)", re.IGNORECASE),
+}
+
+
+def _clean(s: Optional[str]) -> str:
+    if not s:
+        return ""
+
+    s = s.strip()
+    s = re.sub(r"^\s*[-•]\s*", "", s)
+    s = s.replace("**", "").strip()
+    return s
+
+
+def _extract_fields_from_window(window_text: str) -> Tuple[str, str, str]:
+    """
+    Try multiple patterns for Severity / Impact / Mitigation inside a small window of text.
+    """
+    severity = ""
+    impact = ""
+    mitigation = ""
+
+    m = SEVERITY_RE.search(window_text)
+    if m:
+        severity = _clean(m.group(1))
+
+    m = IMPACT_RE.search(window_text)
+    if m:
+        impact = _clean(m.group(1))
+
+    m = MITIGATION_RE.search(window_text)
+    if m:
+        mitigation = _clean(m.group(1))
+
+    if not severity:
+        m = MD_FIELD_RE["severity"].search(window_text)
+        if m:
+            severity = _clean(m.group(1))
+
+    if not impact:
+        m = MD_FIELD_RE["impact"].search(window_text)
+        if m:
+            impact = _clean(m.group(1))
+
+    if not mitigation:
+        m = MD_FIELD_RE["mitigation"].search(window_text)
+        if m:
+            mitigation = _clean(m.group(1))
+
+    return severity, impact, mitigation
+
+
+def extract_risks(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse every `R-NNN: Title` entry in text with the fields found in the 600 chars after it.
+    Returns [{"offset", "risk_id", "title", "severity", "impact", "mitigation"}];
+    missing fields are "".
+    """
+    risks: List[Dict[str, Any]] = []
+    for match in RISK_ID_RE.finditer(text or ""):
+        start = match.start()
+        window = text[start : start + 600]
+        severity, impact, mitigation = _extract_fields_from_window(window)
+        risks.append({
+            "offset": start,
+            "risk_id": match.group(1).strip(),
+            "title": _clean(match.group(2)),
+            "severity": severity,
+            "impact": impact,
+            "mitigation": mitigation,
+        })
+    return risks
+
+
+def parse_action_item_rows(text: str) -> List[Dict[str, str]]:
+    """
+    Parse markdown table rows shaped Priority | Item | Owner | Due Date | Status.
+    Rows without Owner or Due Date are skipped. Needs header + separator + rows.
+    """
+    lines = [ln.strip() for ln in (text or "").splitlines() if ln.strip()]
+    table_lines = [ln for ln in lines if ln.startswith("|") and ln.endswith("|")]
+
+    if len(table_lines) < 3:
+        return []
+
+    rows: List[Dict[str, str]] = []
+    for ln in table_lines[2:]:
+        cols = [c.strip() for c in ln.strip("|").split("|")]
+        if len(cols) < 5:
+            continue
+
+        priority, item, owner, due_date, status = cols[:5]
+
+        if not owner or not due_date:
+            continue
+
+        rows.append({
+            "priority": priority,
+            "item": item,
+            "owner": owner,
+            "due_date": due_date,
+            "status": status,
+        })
+    return rows
+
+
+def _extract_section(text: str, start: str, end: str) -> str:
+    if not text:
+        return ""
+    s = text.find(start)
+    if s == -1:
+        return ""
+    s = s + len(start)
+    e = text.find(end, s)
+    if e == -1:
+        return text[s:].strip()
+    return text[s:e].strip()
+
+
+def _extract_bullets(section_text: str) -> List[str]:
+    """
+    Extract clean bullets from a section.
+    Filters out garbage like "Pros**" / "Cons**" and empty lines.
+    """
+    bullets: List[str] = []
+    for raw in (section_text or "").splitlines():
+        line = raw.strip()
+
+        if not (line.startswith("- ") or line.startswith("* ")):
+            continue
+
+        item = line[2:].strip()
+
+        lowered = item.lower().strip("* ").strip()
+        if lowered in {"pros", "cons", "pro", "con"}:
+            continue
+
+        if not item or len(item) < 4:
+            continue
+
+        bullets.append(item)
+
+    seen = set()
+    out = []
+    for b in bullets:
+        if b in seen:
+            continue
+        seen.add(b)
+        out.append(b)
+    return out
+
+
+def extract_option_blocks(text: str) -> Dict[str, List[str]]:
+    """
+    Bullets of the "### Option A:" / "### Option B:" blocks of a decision log.
+    Returns {"A": [...], "B": [...]} (empty lists when a block is missing).
+    """
+    opt_a_block = _extract_section(text, "### Option A:", "### Option B:")
+    opt_b_block = _extract_section(text, "### Option B:", "##")
+    return {"A": _extract_bullets(opt_a_block), "B": _extract_bullets(opt_b_block)}
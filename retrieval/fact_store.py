@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from retrieval.fact_parsers import extract_option_blocks, extract_risks, parse_action_item_rows
+from retrieval.index_store import INDEX_DIR, META_PATH
+from retrieval.research_utils import chunk_at, reconstruct_documents
+from retrieval.retriever import get_index_version, get_meta_rows
+
+FACTS_PATH = INDEX_DIR / "facts.sqlite"
+
+# Builds in this process are serialized; builds in other processes write their own
+# temp file and the atomic replace lets the last one win.
+_BUILD_LOCK = threading.Lock()
+
+# (index_version, store path or None when building it failed) of the last freshness check
+_CHECKED: Optional[Tuple[str, Optional[Path]]] = None
+
+_SCHEMA = """
+CREATE TABLE risks (
+    risk_id TEXT NOT NULL,
+    title TEXT, severity TEXT, impact TEXT, mitigation TEXT,
+    source_id TEXT NOT NULL, locator TEXT
+);
+CREATE TABLE action_items (
+    priority TEXT, item TEXT, owner TEXT, due_date TEXT, status TEXT,
+    source_id TEXT NOT NULL, locator TEXT
+);
+CREATE TABLE options (
+    option TEXT NOT NULL, position INTEGER NOT NULL, bullet TEXT NOT NULL,
+    source_id TEXT NOT NULL, locator TEXT
+);
+CREATE INDEX risks_source ON risks(source_id);
+CREATE INDEX action_items_source ON action_items(source_id);
+CREATE INDEX options_source ON options(source_id);
+CREATE TABLE store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def extract_facts(chunk_rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Ingest-time extraction over the indexed documents (rebuilt from their chunks).
+    Every fact is keyed by the source_id of the chunk it starts in.
+    """
+    facts: Dict[str, List[Dict[str, Any]]] = {"risks": [], "action_items": [], "options": []}
+
+    for doc in reconstruct_documents(chunk_rows).values():
+        text, chunks = doc["text"], doc["chunks"]
+
+        for r in extract_risks(text):
+            _, _, source_id, locator = chunk_at(chunks, r["offset"])
+            facts["risks"].append({
+                **{k: r[k] for k in ("risk_id", "title", "severity", "impact", "mitigation")},
+                "source_id": source_id,
+                "locator": locator,
+            })
+
+        # tables: parse each run of table lines, cite the chunk holding its first row
+        offset = 0
+        table: List[str] = []
+        table_start = 0
+        for line in text.splitlines(keepends=True) + [""]:
+            stripped = line.strip()
+            if stripped.startswith("|") and stripped.endswith("|"):
+                if not table:
+                    table_start = offset
+                table.append(stripped)
+            elif table:
+                _, _, source_id, locator = chunk_at(chunks, table_start)
+                for row in parse_action_item_rows("\n".join(table)):
+                    facts["action_items"].append({**row, "source_id": source_id, "locator": locator})
+                table = []
+            offset += len(line)
+
+        for option, marker in (("A", "### Option A:"), ("B", "### Option B:")):
+            pos = text.find(marker)
+            if pos == -1:
+                continue
+            _, _, source_id, locator = chunk_at(chunks, pos)
+            for i, bullet in enumerate(extract_option_blocks(text)[option]):
+                facts["options"].append({
+                    "option": option,
+                    "position": i,
+                    "bullet": bullet,
+                    "source_id": source_id,
+                    "locator": locator,
+                })
+
+    return facts
+
+
+def build_fact_store(
+    chunk_rows: List[Dict[str, Any]],
+    path: Path = FACTS_PATH,
+    index_version: str = "",
+) -> Dict[str, int]:
+    """
+    (Re)create the SQLite fact store from indexed chunk rows, tagged with the index
+    version it was built from. Returns row counts per table.
+    """
+    facts = extract_facts(chunk_rows)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with _BUILD_LOCK:
+        fd, tmp_name = tempfile.mkstemp(prefix=f"{path.stem}.", suffix=".tmp", dir=str(path.parent))
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            con = sqlite3.connect(str(tmp))
+            try:
+                con.executescript(_SCHEMA)
+                for table, rows in facts.items():
+                    if not rows:
+                        continue
+                    cols = list(rows[0].keys())
+                    con.executemany(
+                        f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                        [tuple(r[c] for c in cols) for r in rows],
+                    )
+                con.execute("INSERT INTO store_meta (key, value) VALUES ('index_version', ?)", (index_version,))
+                con.commit()
+            finally:
+                con.close()
+            tmp.replace(path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    return {table: len(rows) for table, rows in facts.items()}
+
+
+def _stored_version(path: Path) -> Optional[str]:
+    if not path.exists():
+        return None
+    try:
+        con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = con.execute("SELECT value FROM store_meta WHERE key = 'index_version'").fetchone()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def ensure_fact_store(path: Path = FACTS_PATH) -> Optional[Path]:
+    """
+    Build the fact store unless it was built for the loaded index version (called at
+    ingest and warm-up; lookups only repeat the check when the index version changes).
+    Returns None when there is no index metadata to build from.
+    """
+    if not META_PATH.exists():
+        return None
+    version = get_index_version()
+    with _BUILD_LOCK:
+        fresh = _stored_version(path) == version
+    if not fresh:
+        build_fact_store(get_meta_rows(), path=path, index_version=version)
+    return path
+
+
+def _store_path() -> Optional[Path]:
+    global _CHECKED
+    version = get_index_version()
+    if _CHECKED is None or _CHECKED[0] != version:
+        try:
+            path = ensure_fact_store()
+        except (sqlite3.Error, OSError):
+            # don't rebuild on every lookup: callers fall back until the index changes
+            path = None
+        _CHECKED = (version, path)
+    return _CHECKED[1]
+
+
+def _query(sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+    """
+    Lookups never fail the request path: a missing/unreadable store returns [] and
+    callers fall back to query-time retrieval + parsing.
+    """
+    try:
+        path = _store_path()
+        if path is None:
+            return []
+        con = sqlite3.connect(str(path))
+        con.row_factory = sqlite3.Row
+        try:
+            return [dict(r) for r in con.execute(sql, params)]
+        finally:
+            con.close()
+    except (sqlite3.Error, OSError, FileNotFoundError):
+        return []
+
+
+def get_risks() -> List[Dict[str, Any]]:
+    return _query("SELECT * FROM risks ORDER BY risk_id, rowid")
+
+
+def get_action_items(source: Optional[str] = None) -> List[Dict[str, Any]]:
+    if source:
+        return _query("SELECT * FROM action_items WHERE source_id LIKE ? ORDER BY rowid", (f"%{source}%",))
+    return _query("SELECT * FROM action_items ORDER BY rowid")
+
+
+def get_options() -> List[Dict[str, Any]]:
+    return _query("SELECT * FROM options ORDER BY option, position")
+
+
+def get_fact_source_ids(table: str) -> List[str]:
+    """
+    Distinct source_ids holding facts of one table ("risks" / "action_items" / "options").
+    """
+    if table not in ("risks", "action_items", "options"):
+        raise ValueError(f"Unknown fact table: {table}")
+    return [r["source_id"] for r in _query(f"SELECT DISTINCT source_id FROM {table} ORDER BY source_id")]
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from dotenv import load_dotenv
 from langchain_core.documents import Document
@@ -10,6 +12,7 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 
 from retrieval.loader import load_and_chunk
+from retrieval.vector_storage import INDEX_STORAGE, read_manifest, write_storage
 
 load_dotenv()
 
@@ -21,36 +24,74 @@ META_PATH = INDEX_DIR / "chunks_meta.jsonl"
 
 EMBEDDING_MODEL = "text-embedding-3-small"
 
+# Shortened (Matryoshka) embeddings: text-embedding-3-* return the first N dims,
+# renormalized. Unset = the model's full size. Recorded in the index manifest, which
+# queries follow; a loaded index built with another value is rejected (retriever.py).
+_DIMENSIONS_ENV = os.getenv("EMBEDDING_DIMENSIONS", "").strip()
+EMBEDDING_DIMENSIONS: Optional[int] = int(_DIMENSIONS_ENV) if _DIMENSIONS_ENV else None
 
-def build_faiss_index(docs_dir: str = "data/docs") -> Tuple[FAISS, List[Document]]:
-    chunks = load_and_chunk(docs_dir=docs_dir)
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
-    vectorstore = FAISS.from_documents(chunks, embeddings)
+
+def _embeddings(dimensions: Optional[int] = None) -> OpenAIEmbeddings:
+    return OpenAIEmbeddings(model=EMBEDDING_MODEL, dimensions=dimensions or EMBEDDING_DIMENSIONS)
+
+
+def build_faiss_index(
+    docs_dir: str = "data/docs",
+    chunker: Optional[str] = None,
+    dimensions: Optional[int] = None,
+) -> Tuple[FAISS, List[Document]]:
+    chunks = load_and_chunk(docs_dir=docs_dir, chunker=chunker)
+    vectorstore = FAISS.from_documents(chunks, _embeddings(dimensions))
     return vectorstore, chunks
 
 
-def save_index(vectorstore: FAISS, chunk_docs: List[Document]) -> None:
+def save_index(
+    vectorstore: FAISS,
+    chunk_docs: List[Document],
+    storage: Optional[str] = None,
+    dimensions: Optional[int] = None,
+) -> None:
+    """
+    Writes index.faiss + chunk metadata, plus the storage-specific files and manifest
+    (see retrieval/vector_storage.py; storage defaults to INDEX_STORAGE, dimensions
+    to EMBEDDING_DIMENSIONS and must be what the vectors were embedded with).
+    """
     vectorstore.save_local(str(FAISS_PATH))
 
+    rows = [{"page_content": d.page_content, "metadata": d.metadata} for d in chunk_docs]
+
     with META_PATH.open("w", encoding="utf-8") as f:
-        for d in chunk_docs:
-            f.write(
-                json.dumps(
-                    {"page_content": d.page_content, "metadata": d.metadata},
-                    ensure_ascii=False,
-                )
-                + "\n"
-            )
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    index_version = hashlib.sha1(META_PATH.read_bytes()).hexdigest()
+    write_storage(
+        FAISS_PATH,
+        vectorstore.index,
+        storage or INDEX_STORAGE,
+        extra={
+            "embedding_model": EMBEDDING_MODEL,
+            "dimensions": dimensions or EMBEDDING_DIMENSIONS,
+            "index_version": index_version,
+        },
+    )
+
+    # ingest-time structured facts + named anchors, then drop any in-memory copy of the old index
+    from retrieval.anchors import build_anchors, save_anchors
+    from retrieval.fact_store import build_fact_store
+    from retrieval.retriever import reload_index
+
+    build_fact_store(rows, index_version=index_version)
+    save_anchors(build_anchors(rows, index_version=index_version))
+    reload_index()
 
 
 def load_index() -> Tuple[FAISS, List[Document]]:
 
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
-
     try:
         vectorstore = FAISS.load_local(
             str(FAISS_PATH),
-            embeddings,
+            _embeddings(read_manifest(FAISS_PATH).get("dimensions")),
             allow_dangerous_deserialization=True,
         )
     except Exception:
@@ -71,17 +112,26 @@ def load_index() -> Tuple[FAISS, List[Document]]:
     return vectorstore, chunk_docs
 
 
+def index_exists() -> bool:
+    """
+    Index files + chunk metadata are on disk (search itself only needs these, via
+    retrieval/retriever.py; the langchain vectorstore is for building).
+    """
+    return (FAISS_PATH / "index.faiss").exists() and META_PATH.exists()
+
+
 def ensure_index(
-    docs_dir: str = "data/docs", force_rebuild: bool = False
+    docs_dir: str = "data/docs",
+    force_rebuild: bool = False,
+    chunker: Optional[str] = None,
+    storage: Optional[str] = None,
+    dimensions: Optional[int] = None,
 ) -> Tuple[FAISS, List[Document]]:
 
-    faiss_exists = (FAISS_PATH / "index.faiss").exists()
-    meta_ok = META_PATH.exists()
-
-    if not force_rebuild and faiss_exists and meta_ok:
+    if not force_rebuild and index_exists():
         return load_index()
 
-    vectorstore, chunks = build_faiss_index(docs_dir=docs_dir)
-    save_index(vectorstore, chunks)
+    vectorstore, chunks = build_faiss_index(docs_dir=docs_dir, chunker=chunker, dimensions=dimensions)
+    save_index(vectorstore, chunks, storage=storage, dimensions=dimensions)
     return vectorstore, chunks
 
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -9,19 +10,54 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 SUPPORTED_EXTS = {".txt", ".md"}  
 
+# "recursive" = RecursiveCharacterTextSplitter, "markdown" = heading/table-aware chunker
+CHUNKER = os.getenv("CHUNKER", "recursive")
 
-def _extract_md_headings(text: str) -> List[Tuple[int, str]]:
-    
-    headings: List[Tuple[int, str]] = []
+HEADING_PATH_SEP = " > "
+
+
+def _extract_md_headings(text: str) -> List[Tuple[int, int, str]]:
+    """
+    Returns (line_no, level, heading_text) for every markdown heading.
+    """
+    headings: List[Tuple[int, int, str]] = []
     for i, line in enumerate(text.splitlines()):
         stripped = line.lstrip()
         if stripped.startswith("#"):
             heading_text = stripped.lstrip("#").strip()
             if heading_text:
-                headings.append((i + 1, heading_text))
+                level = len(stripped) - len(stripped.lstrip("#"))
+                headings.append((i + 1, level, heading_text))
     return headings
 
 
+def _heading_path_at(md_headings: List[Tuple[int, int, str]], line_no: int) -> List[str]:
+    """
+    Heading hierarchy (outermost first) in effect at line_no.
+    """
+    stack: List[Tuple[int, str]] = []
+    for ln, level, heading in md_headings:
+        if ln > line_no:
+            break
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, heading))
+    return [h for _, h in stack]
+
+
+def _is_table_line(line: str) -> bool:
+    stripped = line.strip()
+    return stripped.startswith("|") and stripped.endswith("|") and len(stripped) > 1
+
+
+def detect_block_type(text: str) -> str:
+    """
+    "table" if the chunk contains a markdown table (header + separator + row), else "text".
+    """
+    table_lines = [ln for ln in (text or "").splitlines() if _is_table_line(ln)]
+    return "table" if len(table_lines) >= 3 else "text"
+
+
 def _extract_md_title(text: str) -> Optional[str]:
     
     for line in text.splitlines():
@@ -62,6 +98,78 @@ def load_raw_documents(docs_dir: str = "data/docs") -> List[Document]:
     return docs
 
 
+def _attach_chunk_metadata(
+    s: Document,
+    i: int,
+    doc_id: str,
+    full_text: str,
+    file_ext: Optional[str],
+    md_headings: List[Tuple[int, int, str]],
+) -> None:
+    """
+    Adds: chunk_id, source_id, line_start/line_end, section_heading, heading_path,
+    block_type, locator (for md). Expects start_index in s.metadata.
+    """
+    s.metadata = dict(s.metadata or {})
+
+    s.metadata["chunk_id"] = i  
+    s.metadata["source_id"] = f"{doc_id}#chunk_{i}"
+    s.metadata.setdefault("block_type", detect_block_type(s.page_content))
+
+    start_idx = s.metadata.get("start_index")
+    if isinstance(start_idx, int):
+        prefix = full_text[:start_idx]
+        line_start = prefix.count("\n") + 1
+
+        end_idx = start_idx + len(s.page_content)
+        prefix_end = full_text[:end_idx]
+        line_end = prefix_end.count("\n") + 1
+
+        s.metadata["line_start"] = line_start
+        s.metadata["line_end"] = line_end
+
+        if md_headings:
+            nearest_heading_text: Optional[str] = None
+            nearest_heading_line: Optional[int] = None
+            for ln, _, heading in md_headings:
+                if ln <= line_start:
+                    nearest_heading_line = ln
+                    nearest_heading_text = heading
+                else:
+                    break
+
+            if nearest_heading_text:
+                s.metadata["section_heading"] = nearest_heading_text
+                s.metadata["section_heading_line"] = nearest_heading_line
+
+            if "heading_path" not in s.metadata:
+                path = _heading_path_at(md_headings, line_start)
+                if path:
+                    s.metadata["heading_path"] = HEADING_PATH_SEP.join(path)
+
+    chunk_id = s.metadata.get("chunk_id")
+    line_start = s.metadata.get("line_start")
+    line_end = s.metadata.get("line_end")
+    section_heading = s.metadata.get("section_heading")
+
+    locator_parts: List[str] = []
+    if chunk_id is not None:
+        locator_parts.append(f"chunk {chunk_id}")
+
+    if file_ext == ".md" and section_heading:
+        locator_parts.append(f"## {section_heading}")
+
+    if line_start is not None and line_end is not None:
+        locator_parts.append(f"lines {line_start}–{line_end}")
+
+    if locator_parts:
+        s.metadata["locator"] = " — ".join(locator_parts)
+
+
+def _doc_id(doc: Document) -> str:
+    return (doc.metadata or {}).get("doc_id") or f"doc:{(doc.metadata or {}).get('source_name')}"
+
+
 def chunk_documents(
     docs: List[Document],
     chunk_size: int = 800,
@@ -83,65 +191,147 @@ def chunk_documents(
         full_text = doc.page_content
         file_ext = (doc.metadata or {}).get("file_ext")
         md_headings = _extract_md_headings(full_text) if file_ext == ".md" else []
-        doc_id = (doc.metadata or {}).get("doc_id") or f"doc:{(doc.metadata or {}).get('source_name')}"
+        doc_id = _doc_id(doc)
 
         splits = splitter.split_documents([doc])
 
         for i, s in enumerate(splits):
-            s.metadata = dict(s.metadata or {})
+            _attach_chunk_metadata(s, i, doc_id, full_text, file_ext, md_headings)
+            chunked.append(s)
+
+    return chunked
+
+
+def _split_markdown_blocks(text: str) -> List[Dict[str, Any]]:
+    """
+    Split markdown into structural blocks: a new block starts at every heading and
+    at every table boundary. Tables are always kept as one block. Heading-only
+    blocks are folded into the block that follows them, so a heading stays with
+    its content (e.g. the action_items.md title + table).
+    Returns [{"start", "end", "block_type", "heading_path"}] with char offsets.
+    """
+    blocks: List[Dict[str, Any]] = []
+    stack: List[Tuple[int, str]] = []
+
+    cur: Optional[Dict[str, Any]] = None
+    pending_start: Optional[int] = None
+    in_fence = False
+    offset = 0
+
+    def _close(end: int) -> None:
+        nonlocal cur
+        if cur is not None and text[cur["start"]:end].strip():
+            cur["end"] = end
+            blocks.append(cur)
+        cur = None
+
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        line_start = offset
+        offset += len(line)
 
-            s.metadata["chunk_id"] = i  
-            s.metadata["source_id"] = f"{doc_id}#chunk_{i}"
+        if stripped.startswith("```"):
+            in_fence = not in_fence
 
-            start_idx = s.metadata.get("start_index")
-            if isinstance(start_idx, int):
-                prefix = full_text[:start_idx]
-                line_start = prefix.count("\n") + 1
+        is_heading = not in_fence and stripped.startswith("#") and stripped.lstrip("#").strip() != ""
+        is_table = not in_fence and _is_table_line(line)
 
-                end_idx = start_idx + len(s.page_content)
-                prefix_end = full_text[:end_idx]
-                line_end = prefix_end.count("\n") + 1
+        if is_heading:
+            _close(line_start)
+            level = len(stripped) - len(stripped.lstrip("#"))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, stripped.lstrip("#").strip()))
+            if pending_start is None:
+                pending_start = line_start
+            continue
 
-                s.metadata["line_start"] = line_start
-                s.metadata["line_end"] = line_end
+        block_type = "table" if is_table else "text"
 
-                if md_headings:
-                    nearest_heading_text: Optional[str] = None
-                    nearest_heading_line: Optional[int] = None
-                    for ln, heading in md_headings:
-                        if ln <= line_start:
-                            nearest_heading_line = ln
-                            nearest_heading_text = heading
-                        else:
-                            break
+        if cur is not None and cur["block_type"] != block_type and stripped:
+            _close(line_start)
+
+        if cur is None:
+            if not stripped:
+                continue
+            cur = {
+                "start": pending_start if pending_start is not None else line_start,
+                "block_type": block_type,
+                "heading_path": [h for _, h in stack],
+            }
+            pending_start = None
 
-                    if nearest_heading_text:
-                        s.metadata["section_heading"] = nearest_heading_text
-                        s.metadata["section_heading_line"] = nearest_heading_line
+    _close(offset)
 
-            chunk_id = s.metadata.get("chunk_id")
-            line_start = s.metadata.get("line_start")
-            line_end = s.metadata.get("line_end")
-            section_heading = s.metadata.get("section_heading")
+    if pending_start is not None and text[pending_start:].strip():
+        blocks.append({
+            "start": pending_start,
+            "end": len(text),
+            "block_type": "text",
+            "heading_path": [h for _, h in stack],
+        })
 
-            locator_parts: List[str] = []
-            if chunk_id is not None:
-                locator_parts.append(f"chunk {chunk_id}")
+    return blocks
 
-            if file_ext == ".md" and section_heading:
-                locator_parts.append(f"## {section_heading}")
 
-            if line_start is not None and line_end is not None:
-                locator_parts.append(f"lines {line_start}–{line_end}")
+def chunk_markdown_documents(
+    docs: List[Document],
+    chunk_size: int = 800,
+    chunk_overlap: int = 120,
+) -> List[Document]:
+    """
+    Structure-first chunker for markdown: splits on heading hierarchy and tables
+    before falling back to RecursiveCharacterTextSplitter for oversized text blocks.
+    Tables are never split. Each chunk records heading_path ("A > B > C") and
+    block_type ("table" / "text") on top of the usual chunk metadata.
+    Non-markdown docs go through chunk_documents unchanged.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True,
+    )
+
+    chunked: List[Document] = []
+
+    for doc in docs:
+        file_ext = (doc.metadata or {}).get("file_ext")
+        if file_ext != ".md":
+            chunked.extend(chunk_documents([doc], chunk_size=chunk_size, chunk_overlap=chunk_overlap))
+            continue
+
+        full_text = doc.page_content
+        md_headings = _extract_md_headings(full_text)
+        doc_id = _doc_id(doc)
+
+        pieces: List[Document] = []
+        for block in _split_markdown_blocks(full_text):
+            raw = full_text[block["start"]:block["end"]]
+            lead = len(raw) - len(raw.lstrip())
+            body = raw.strip()
+            base_md = {
+                **(doc.metadata or {}),
+                "block_type": block["block_type"],
+                "heading_path": HEADING_PATH_SEP.join(block["heading_path"]),
+            }
+
+            if block["block_type"] == "table" or len(body) <= chunk_size:
+                pieces.append(Document(page_content=body, metadata={**base_md, "start_index": block["start"] + lead}))
+                continue
 
-            if locator_parts:
-                s.metadata["locator"] = " — ".join(locator_parts)
+            for sub in splitter.split_documents([Document(page_content=body, metadata=base_md)]):
+                sub.metadata["start_index"] = block["start"] + lead + int(sub.metadata.get("start_index") or 0)
+                pieces.append(sub)
 
+        for i, s in enumerate(pieces):
+            _attach_chunk_metadata(s, i, doc_id, full_text, file_ext, md_headings)
             chunked.append(s)
 
     return chunked
 
 
-def load_and_chunk(docs_dir: str = "data/docs") -> List[Document]:
+def load_and_chunk(docs_dir: str = "data/docs", chunker: Optional[str] = None) -> List[Document]:
     raw = load_raw_documents(docs_dir=docs_dir)
+    if (chunker or CHUNKER) == "markdown":
+        return chunk_markdown_documents(raw)
     return chunk_documents(raw)
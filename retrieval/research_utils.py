@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 
 def dedupe_results_keep_order(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -24,3 +24,182 @@ def dedupe_results_keep_order(results: List[Dict[str, Any]]) -> List[Dict[str, A
         merged.append(r)
 
     return merged
+
+
+# Chunks separated by at most this many chars (whitespace stripped by the splitter)
+# are treated as contiguous.
+MERGE_GAP_CHARS = 2
+
+
+def _result_span(r: Dict[str, Any]) -> Optional[Tuple[str, int, int]]:
+    md = r.get("metadata") or {}
+    doc_id = md.get("doc_id")
+    start = md.get("start_index")
+    if not doc_id or not isinstance(start, int):
+        return None
+    return doc_id, start, start + len((r.get("content") or "").strip())
+
+
+def _combined_locator(parts: List[Dict[str, Any]]) -> str:
+    mds = [p.get("metadata") or {} for p in parts]
+    chunk_ids = [md["chunk_id"] for md in mds if isinstance(md.get("chunk_id"), int)]
+    line_starts = [md["line_start"] for md in mds if isinstance(md.get("line_start"), int)]
+    line_ends = [md["line_end"] for md in mds if isinstance(md.get("line_end"), int)]
+    heading = mds[0].get("section_heading")
+
+    locator_parts: List[str] = []
+    if chunk_ids:
+        locator_parts.append(f"chunks {min(chunk_ids)}–{max(chunk_ids)}")
+    if heading:
+        locator_parts.append(f"## {heading}")
+    if line_starts and line_ends:
+        locator_parts.append(f"lines {min(line_starts)}–{max(line_ends)}")
+    return " — ".join(locator_parts) or (parts[0].get("locator") or "unknown location")
+
+
+def _merge_results(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+    doc_id, start, end = _result_span(group[0])
+    text = (group[0].get("content") or "").strip()
+    parts = [{"source_id": group[0].get("source_id"), "locator": group[0].get("locator"), "offset": 0, "content": text}]
+
+    # text position = document position - start + delta; delta changes when a small
+    # gap between chunks is joined with "\n\n" instead of its own characters
+    delta = 0
+    for r in group[1:]:
+        _, r_start, r_end = _result_span(r)
+        content = (r.get("content") or "").strip()
+        if r_end <= end:
+            offset = r_start - start + delta
+        elif r_start < end:
+            offset = r_start - start + delta
+            text += content[end - r_start:]
+        else:
+            text += "\n\n"
+            delta += 2 - (r_start - end)
+            offset = len(text)
+            text += content
+        end = max(end, r_end)
+        parts.append({"source_id": r.get("source_id"), "locator": r.get("locator"), "offset": offset, "content": content})
+
+    metadata = dict(group[0].get("metadata") or {})
+    line_ends = [(r.get("metadata") or {}).get("line_end") for r in group]
+    line_ends = [x for x in line_ends if isinstance(x, int)]
+    if line_ends:
+        metadata["line_end"] = max(line_ends)
+
+    return {
+        **group[0],
+        "content": text,
+        "locator": _combined_locator(group),
+        "score": min(float(r.get("score", 0.0)) for r in group),
+        "metadata": metadata,
+        "parts": parts,
+    }
+
+
+def merge_adjacent_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Coalesce contiguous / overlapping chunks of the same doc_id into one result.
+
+    The splitter overlaps neighbours by up to chunk_overlap chars; merging by
+    start_index keeps that text once. The merged result takes the position of its
+    best-ranked member, keeps the first chunk's source_id, gets a combined locator,
+    the best (lowest) score and a "parts" list with every member's source_id and
+    its char offset inside the merged content.
+    Results without start_index metadata pass through untouched.
+    """
+    by_doc: Dict[str, List[int]] = {}
+    for i, r in enumerate(results or []):
+        sp = _result_span(r)
+        if sp:
+            by_doc.setdefault(sp[0], []).append(i)
+
+    replaced: Dict[int, Optional[Dict[str, Any]]] = {}
+
+    def _flush(group: List[int]) -> None:
+        if len(group) < 2:
+            return
+        first = min(group)
+        replaced[first] = _merge_results([results[i] for i in group])
+        for i in group:
+            if i != first:
+                replaced[i] = None
+
+    for idxs in by_doc.values():
+        if len(idxs) < 2:
+            continue
+
+        idxs = sorted(idxs, key=lambda i: _result_span(results[i])[1])
+        group = [idxs[0]]
+        cur_end = _result_span(results[idxs[0]])[2]
+
+        for i in idxs[1:]:
+            _, start, end = _result_span(results[i])
+            if start <= cur_end + MERGE_GAP_CHARS:
+                group.append(i)
+                cur_end = max(cur_end, end)
+            else:
+                _flush(group)
+                group = [i]
+                cur_end = end
+        _flush(group)
+
+    merged: List[Dict[str, Any]] = []
+    for i, r in enumerate(results or []):
+        if i in replaced:
+            if replaced[i] is not None:
+                merged.append(replaced[i])
+            continue
+        merged.append(r)
+    return merged
+
+
+def reconstruct_documents(chunk_rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Rebuild each document's text from its indexed chunks (meta rows shaped
+    {"page_content", "metadata"}) using start_index, so ingest-time extraction sees
+    exactly the indexed content. Gaps left by stripped whitespace become newlines.
+
+    Returns {doc_id: {"text": str, "chunks": [(start, end, source_id, locator), ...]}}
+    with chunks sorted by start.
+    """
+    by_doc: Dict[str, List[Tuple[int, str, Dict[str, Any]]]] = {}
+    for row in chunk_rows or []:
+        md = row.get("metadata") or {}
+        doc_id = md.get("doc_id")
+        start = md.get("start_index")
+        if not doc_id or not isinstance(start, int):
+            continue
+        by_doc.setdefault(doc_id, []).append((start, row.get("page_content") or "", md))
+
+    docs: Dict[str, Dict[str, Any]] = {}
+    for doc_id, pieces in by_doc.items():
+        pieces.sort(key=lambda p: p[0])
+        buf: List[str] = []
+        length = 0
+        chunks: List[Tuple[int, int, str, str]] = []
+
+        for start, content, md in pieces:
+            end = start + len(content)
+            if start > length:
+                buf.append("\n" * (start - length))
+                length = start
+            if end > length:
+                buf.append(content[length - start:])
+                length = end
+            chunks.append((start, end, md.get("source_id") or "", md.get("locator") or ""))
+
+        docs[doc_id] = {"text": "".join(buf), "chunks": chunks}
+    return docs
+
+
+def chunk_at(chunks: List[Tuple[int, int, str, str]], offset: int) -> Tuple[int, int, str, str]:
+    """
+    The last chunk (from reconstruct_documents) starting at or before offset.
+    """
+    found = chunks[0]
+    for c in chunks:
+        if c[0] > offset:
+            break
+        found = c
+    return found
@@ -1,53 +1,329 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
 import json
 import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import faiss
 import numpy as np
 from openai import OpenAI
 
-from retrieval.index_store import INDEX_DIR
+from orchestration.cassette import cassette_call_many
+from orchestration.profiling import profiled
+from orchestration.tracing import current_span, span, traced
+from retrieval.embedding_batcher import EmbeddingBatcher
+from retrieval.index_store import EMBEDDING_DIMENSIONS, INDEX_DIR
+from retrieval.loader import detect_block_type
+from retrieval.research_utils import reconstruct_documents
+from retrieval.vector_storage import load_search_index, read_manifest, validate_manifest
 
 _CACHED_INDEX: Optional[faiss.Index] = None
 _CACHED_META: Optional[List[Dict[str, Any]]] = None
+_CACHED_SECTIONS: Optional[Dict[str, List[int]]] = None
+_CACHED_SOURCES: Optional[Dict[str, List[int]]] = None
+_CACHED_DOCS: Optional[Dict[str, str]] = None
+_CACHED_SOURCE_IDS: Optional[frozenset[str]] = None
+_CACHED_VERSION: Optional[str] = None
+_CACHED_MANIFEST: Optional[Dict[str, Any]] = None
+_CLIENT: Optional[OpenAI] = None
+_BATCHER: Optional[EmbeddingBatcher] = None
+
+# Query embeddings depend only on the text, embedding model and dimensions, not on
+# the index contents, so repeated queries (verifier retries, eval reruns) skip the API call.
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "512"))
+_QUERY_EMBEDS: "OrderedDict[Tuple[Optional[int], str], List[float]]" = OrderedDict()
+_QUERY_EMBEDS_LOCK = threading.Lock()
 
 FAISS_INDEX_PATH = INDEX_DIR / "faiss_index" / "index.faiss"
 META_PATH = INDEX_DIR / "chunks_meta.jsonl"
 
+# Distance multiplier for chunks whose heading path matches `section` in boost mode
+# (FAISS L2: lower is better).
+SECTION_BOOST = 0.8
+
+# must_include keeps at most this many chunks of the matching source ahead of the rest.
+MUST_INCLUDE_MAX = 2
+
+# Filtered searches (must_include / section) without an explicit overfetch start at
+# ADAPTIVE_FETCH_FACTOR * top_k candidates and double until enough chunks pass the
+# filter (sized from the number of chunks the filter can match) or the index is exhausted.
+ADAPTIVE_FETCH_FACTOR = 2
+
 
-def _load_meta() -> List[Dict[str, Any]]:
+def _load_meta() -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Returns (rows, index_version). The version is the sha1 of chunks_meta.jsonl,
+    which changes whenever the index is rebuilt.
+    """
     if not META_PATH.exists():
         raise FileNotFoundError(f"Missing metadata file: {META_PATH}")
+    raw = META_PATH.read_bytes()
     rows: List[Dict[str, Any]] = []
-    with META_PATH.open("r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                rows.append(json.loads(line))
-    return rows
+    for line in raw.decode("utf-8").splitlines():
+        if line.strip():
+            rows.append(json.loads(line))
+    return rows, hashlib.sha1(raw).hexdigest()
 
 
-def _load_index() -> faiss.Index:
-    if not FAISS_INDEX_PATH.exists():
-        raise FileNotFoundError(f"Missing FAISS index file: {FAISS_INDEX_PATH}")
-    return faiss.read_index(str(FAISS_INDEX_PATH))
+def _embedding_model() -> str:
+    return os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+
+def _load_index() -> Tuple[faiss.Index, Dict[str, Any]]:
+    """
+    (index, manifest): flat index.faiss, or a quantized index with exact re-ranking
+    (RerankedIndex) when the index was built with a compressed storage mode.
+    """
+    index_dir = FAISS_INDEX_PATH.parent
+    manifest = read_manifest(index_dir)
+    return load_search_index(index_dir, manifest), manifest
 
 
 def _get_index_and_meta() -> Tuple[faiss.Index, List[Dict[str, Any]]]:
-    global _CACHED_INDEX, _CACHED_META
+    global _CACHED_INDEX, _CACHED_META, _CACHED_VERSION, _CACHED_MANIFEST
     if _CACHED_INDEX is None or _CACHED_META is None:
-        _CACHED_INDEX = _load_index()
-        _CACHED_META = _load_meta()
+        index, manifest = _load_index()
+        meta, version = _load_meta()
+        validate_manifest(
+            manifest,
+            index,
+            n_rows=len(meta),
+            index_version=version,
+            embedding_model=_embedding_model(),
+            dimensions=EMBEDDING_DIMENSIONS,
+        )
+        _CACHED_INDEX, _CACHED_MANIFEST = index, manifest
+        _CACHED_META, _CACHED_VERSION = meta, version
     return _CACHED_INDEX, _CACHED_META
 
 
+def get_embedding_dimensions() -> Optional[int]:
+    """
+    Dimensions queries are embedded with: the value the loaded index was built with
+    (None = the model's full size, also for indexes built before manifests).
+    """
+    _get_index_and_meta()
+    return (_CACHED_MANIFEST or {}).get("dimensions")
+
+
+def get_index_version() -> str:
+    """
+    Version of the index currently held in memory (loads it on first use).
+    In-memory caches derived from the index key themselves on this value.
+    """
+    _get_index_and_meta()
+    return _CACHED_VERSION or ""
+
+
+def get_meta_rows() -> List[Dict[str, Any]]:
+    return _get_index_and_meta()[1]
+
+
+def get_document_text(doc_id: str) -> str:
+    """
+    Full text of an indexed document, rebuilt once from the chunk metadata.
+    Compact research notes (shared_state.EvidenceNote) slice their claims from it.
+    """
+    global _CACHED_DOCS
+    if _CACHED_DOCS is None:
+        docs = reconstruct_documents(get_meta_rows())
+        _CACHED_DOCS = {doc_id: d["text"] for doc_id, d in docs.items()}
+    return _CACHED_DOCS.get(doc_id, "")
+
+
+def get_source_ids() -> frozenset[str]:
+    """
+    Every indexed source_id (doc:<file>#chunk_N), for O(1) citation lookups.
+    """
+    global _CACHED_SOURCE_IDS
+    if _CACHED_SOURCE_IDS is None:
+        _CACHED_SOURCE_IDS = frozenset(
+            sid for row in get_meta_rows() if (sid := (row.get("metadata") or {}).get("source_id"))
+        )
+    return _CACHED_SOURCE_IDS
+
+
+def reload_index() -> None:
+    """
+    Drop the in-memory index so the next call picks up a rebuilt one
+    (and every cache keyed by get_index_version() is invalidated).
+    """
+    global _CACHED_INDEX, _CACHED_META, _CACHED_SECTIONS, _CACHED_SOURCES, _CACHED_DOCS, _CACHED_SOURCE_IDS
+    global _CACHED_VERSION, _CACHED_MANIFEST
+    _CACHED_INDEX = None
+    _CACHED_META = None
+    _CACHED_SECTIONS = None
+    _CACHED_SOURCES = None
+    _CACHED_DOCS = None
+    _CACHED_SOURCE_IDS = None
+    _CACHED_VERSION = None
+    _CACHED_MANIFEST = None
+
+
+def _heading_path(md: Dict[str, Any]) -> str:
+    # Indexes built before heading_path existed only carry section_heading.
+    return md.get("heading_path") or md.get("section_heading") or ""
+
+
+def _block_type(row: Dict[str, Any]) -> str:
+    md = row.get("metadata") or {}
+    return md.get("block_type") or detect_block_type(row.get("page_content") or "")
+
+
+def _get_section_index() -> Dict[str, List[int]]:
+    """
+    Heading-path index: lowercased heading path -> meta row positions.
+    """
+    global _CACHED_SECTIONS
+    if _CACHED_SECTIONS is None:
+        _, meta = _get_index_and_meta()
+        sections: Dict[str, List[int]] = {}
+        for i, row in enumerate(meta):
+            path = _heading_path(row.get("metadata") or {}).lower()
+            if path:
+                sections.setdefault(path, []).append(i)
+        _CACHED_SECTIONS = sections
+    return _CACHED_SECTIONS
+
+
+def _section_rows(section: str) -> set[int]:
+    needle = (section or "").strip().lower()
+    rows: set[int] = set()
+    for path, idxs in _get_section_index().items():
+        if needle in path:
+            rows.update(idxs)
+    return rows
+
+
+def _matches_source(result: Dict[str, Any], needle: str) -> bool:
+    return needle in (result.get("source_id") or "").lower() or needle in (result.get("source") or "").lower()
+
+
+def _get_source_index() -> Dict[str, List[int]]:
+    """
+    Per-source index: lowercased "<source_id>\x1f<source>" of each chunk -> meta row positions.
+    Grouping by the same strings _matches_source reads lets a must_include needle be
+    resolved to its chunk count without touching every row.
+    """
+    global _CACHED_SOURCES
+    if _CACHED_SOURCES is None:
+        _, meta = _get_index_and_meta()
+        sources: Dict[str, List[int]] = {}
+        for i, row in enumerate(meta):
+            if not (row.get("page_content") or "").strip():
+                continue
+            r = _row_to_result(row, score=0.0)
+            sources.setdefault(f"{r['source_id']}\x1f{r['source']}".lower(), []).append(i)
+        _CACHED_SOURCES = sources
+    return _CACHED_SOURCES
+
+
+def _source_rows(needle: str) -> set[int]:
+    needle = (needle or "").strip().lower()
+    rows: set[int] = set()
+    for key, idxs in _get_source_index().items():
+        source_id, _, source = key.partition("\x1f")
+        if needle in source_id or needle in source:
+            rows.update(idxs)
+    return rows
+
+
+def get_chunks(
+    source: Optional[str] = None,
+    section: Optional[str] = None,
+    block_type: Optional[str] = None,
+    source_ids: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Metadata-only lookup (no embedding call): chunks of `source` whose heading path
+    contains `section` and/or whose block_type matches, or exactly the given
+    source_ids, in index order. Results have the same shape as search_docs with score 0.0.
+    """
+    _, meta = _get_index_and_meta()
+    candidates = sorted(_section_rows(section)) if section else range(len(meta))
+    wanted = set(source_ids) if source_ids is not None else None
+
+    results: List[Dict[str, Any]] = []
+    for i in candidates:
+        row = meta[i]
+        if not (row.get("page_content") or "").strip():
+            continue
+        if wanted is not None and (row.get("metadata") or {}).get("source_id") not in wanted:
+            continue
+        if block_type and _block_type(row) != block_type:
+            continue
+        r = _row_to_result(row, score=0.0)
+        if source and not _matches_source(r, source.lower()):
+            continue
+        results.append(r)
+    return results
+
+
+def get_embedding_client() -> OpenAI:
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = OpenAI()
+    return _CLIENT
+
+
+def _embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    One embeddings API call for the texts that are not in the active cassette
+    (see orchestration/cassette.py; every text is recorded separately).
+    """
+    model = _embedding_model()
+    dimensions = get_embedding_dimensions()
+    # only sent when set, so full-size requests (and their cassette keys) are unchanged
+    params: Dict[str, Any] = {"model": model} if dimensions is None else {"model": model, "dimensions": dimensions}
+
+    def _call(positions: List[int]) -> List[List[float]]:
+        resp = get_embedding_client().embeddings.create(input=[texts[i] for i in positions], **params)
+        return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
+
+    return cassette_call_many("embedding", [{**params, "input": t} for t in texts], _call)
+
+
+def enable_embedding_batching(window_ms: float = 10.0, max_batch: int = 64, timeout_s: float = 30.0) -> EmbeddingBatcher:
+    """
+    Route query embeddings through a shared EmbeddingBatcher (for long-running,
+    concurrent processes such as service/api.py). Idempotent.
+    """
+    global _BATCHER
+    if _BATCHER is None:
+        _BATCHER = EmbeddingBatcher(_embed_texts, window_ms=window_ms, max_batch=max_batch, timeout_s=timeout_s)
+    return _BATCHER
+
+
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    return _BATCHER
+
+
 def _embed_query(text: str) -> List[float]:
-    model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-    client = OpenAI()
-    resp = client.embeddings.create(model=model, input=text)
-    return resp.data[0].embedding
+    key = (get_embedding_dimensions(), text)
+    with _QUERY_EMBEDS_LOCK:
+        cached = _QUERY_EMBEDS.get(key)
+        if cached is not None:
+            _QUERY_EMBEDS.move_to_end(key)
+            return cached
+
+    with span("embed", batched=_BATCHER is not None, chars=len(text)):
+        if _BATCHER is not None:
+            emb = _BATCHER.embed(text)
+        else:
+            emb = _embed_texts([text])[0]
+
+    if QUERY_EMBED_CACHE_SIZE > 0:
+        with _QUERY_EMBEDS_LOCK:
+            _QUERY_EMBEDS[key] = emb
+            while len(_QUERY_EMBEDS) > QUERY_EMBED_CACHE_SIZE:
+                _QUERY_EMBEDS.popitem(last=False)
+    return emb
 
 
 def _row_to_result(row: Dict[str, Any], score: float) -> Dict[str, Any]:
@@ -66,41 +342,183 @@ def _row_to_result(row: Dict[str, Any], score: float) -> Dict[str, Any]:
     }
 
 
+def _fetch_targets(
+    top_k: int,
+    must_include: Optional[str],
+    section: Optional[str],
+    section_mode: str,
+) -> List[Tuple[Optional[set[int]], int]]:
+    """
+    (rows, hits needed from them) that the fetched candidates must settle; rows=None
+    means any chunk. A filter matching fewer chunks than it would keep only needs those.
+    """
+    section_rows = _section_rows(section) if section else None
+    if section_rows is not None and section_mode == "boost":
+        # boosting reorders everything: the overall top_k must be settled too
+        targets: List[Tuple[Optional[set[int]], int]] = [(None, top_k)]
+        filter_rows = None
+    else:
+        targets = []
+        filter_rows = section_rows
+    if must_include:
+        rows = _source_rows(must_include)
+        if filter_rows is not None:
+            rows &= filter_rows
+        targets.append((rows, min(MUST_INCLUDE_MAX, top_k, len(rows))))
+    if filter_rows is not None:
+        targets.append((filter_rows, min(top_k, len(filter_rows))))
+    return targets
+
+
+def _settled(
+    fetched: List[Tuple[float, int]],
+    rows: Optional[set[int]],
+    needed: int,
+    boosted: Optional[set[int]],
+) -> bool:
+    """
+    True when the best `needed` chunks of `rows` are among the fetched candidates.
+    Without boosting that is a count; with it, unfetched chunks (distance >= the last
+    fetched one) could still be boosted past them unless the needed-th best boosted
+    score is <= SECTION_BOOST times the last fetched distance.
+    """
+    scores = [d * SECTION_BOOST if boosted and i in boosted else d for d, i in fetched if rows is None or i in rows]
+    if len(scores) < needed:
+        return False
+    if not boosted or needed == 0:
+        return True
+    return sorted(scores)[needed - 1] <= fetched[-1][0] * SECTION_BOOST
+
+
+def _search_adaptive(
+    index: faiss.Index,
+    xq: np.ndarray,
+    top_k: int,
+    targets: List[Tuple[Optional[set[int]], int]],
+    boosted: Optional[set[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    FAISS search doubling the candidate count until every target is settled.
+    Returns (distances, indices, n_fetch, rounds).
+    """
+    ntotal = int(index.ntotal)
+    if any(needed for _, needed in targets):
+        n_fetch = min(max(top_k * ADAPTIVE_FETCH_FACTOR, 1), ntotal)
+    else:
+        n_fetch = min(top_k, ntotal)
+
+    rounds = 0
+    while True:
+        rounds += 1
+        distances, indices = index.search(xq, max(n_fetch, 1))
+        if n_fetch >= ntotal:
+            return distances, indices, n_fetch, rounds
+        fetched = [(float(d), int(i)) for d, i in zip(distances[0], indices[0]) if int(i) != -1]
+        if all(_settled(fetched, rows, needed, boosted) for rows, needed in targets):
+            return distances, indices, n_fetch, rounds
+        n_fetch = min(n_fetch * 2, ntotal)
+
+
+# Fetch sizing of every search_docs call inside record_fetches() (independent of
+# span tracing, which is opt-in).
+_FETCHES: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar("search_fetches", default=None)
+
+
+@contextmanager
+def record_fetches() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Collects one {"top_k", "n_fetch", "fetch_rounds", "fetch_mode", "must_include",
+    "section"} row per search_docs call made in the block (the researcher stores
+    them in meta["retrieval_debug"]["fetches"]).
+    """
+    rows: List[Dict[str, Any]] = []
+    token = _FETCHES.set(rows)
+    try:
+        yield rows
+    finally:
+        _FETCHES.reset(token)
+
+
+@traced("search_docs")
+@profiled("search_docs")
 def search_docs(
     query: str,
     top_k: int = 5,
     must_include: Optional[str] = None,
-    overfetch: int = 30,
+    overfetch: Optional[int] = None,
+    section: Optional[str] = None,
+    section_mode: str = "filter",
 ) -> List[Dict[str, Any]]:
     """
     Vector search over local FAISS index.
     Returns list of dicts with: content, source_id, source, locator, score.
-    If must_include is provided, we overfetch and ensure up to 2 matches are included.
+    If must_include is provided, up to MUST_INCLUDE_MAX of its chunks are ranked first.
+    If section is provided, chunks whose heading path contains it are kept exclusively
+    (section_mode="filter") or ranked ahead via SECTION_BOOST (section_mode="boost").
+    Filtered searches size their candidate fetch from the number of chunks the filter
+    matches (see _search_adaptive); an explicit overfetch fixes it instead.
     """
     index, meta = _get_index_and_meta()
 
     q_emb = _embed_query(query)
     xq = np.array([q_emb], dtype="float32")
 
-    n_fetch = max(overfetch, top_k) if must_include else top_k
-    distances, indices = index.search(xq, n_fetch)
+    filtered = bool(must_include or section)
+    with span("faiss.search", ntotal=int(index.ntotal)) as search_span:
+        if filtered and overfetch is None:
+            targets = _fetch_targets(top_k, must_include, section, section_mode)
+            boosted = _section_rows(section) if (section and section_mode == "boost") else None
+            distances, indices, n_fetch, rounds = _search_adaptive(index, xq, top_k, targets, boosted)
+            fetch_mode = "adaptive"
+        else:
+            n_fetch = max(overfetch or 0, top_k) if filtered else top_k
+            distances, indices = index.search(xq, n_fetch)
+            rounds = 1
+            fetch_mode = "fixed"
+        if search_span is not None:
+            search_span.set(n_fetch=n_fetch, fetch_rounds=rounds, fetch_mode=fetch_mode)
+
+    fetches = _FETCHES.get()
+    if fetches is not None:
+        fetches.append({
+            "top_k": top_k,
+            "n_fetch": int(n_fetch),
+            "fetch_rounds": int(rounds),
+            "fetch_mode": fetch_mode,
+            "must_include": must_include,
+            "section": section,
+        })
+
+    sp = current_span()
+    if sp is not None:
+        sp.set(top_k=top_k, n_fetch=n_fetch, must_include=must_include, section=section)
+
+    section_hits = _section_rows(section) if section else set()
 
     results: List[Dict[str, Any]] = []
     for dist, idx in zip(distances[0], indices[0]):
         if int(idx) == -1:
             continue
+        if section and section_mode == "filter" and int(idx) not in section_hits:
+            continue
         row = meta[int(idx)]
         content = (row.get("page_content") or "").strip()
         if not content:
             continue
-        results.append(_row_to_result(row, score=float(dist)))
+        score = float(dist)
+        if section and section_mode == "boost" and int(idx) in section_hits:
+            score *= SECTION_BOOST
+        results.append(_row_to_result(row, score=score))
+
+    if section and section_mode == "boost":
+        results.sort(key=lambda r: r["score"])
 
     if must_include:
         needle = must_include.lower()
-        forced = [r for r in results if needle in (r.get("source_id") or "").lower() or needle in (r.get("source") or "").lower()]
+        forced = [r for r in results if _matches_source(r, needle)]
 
         if forced:
-            forced = forced[:2] 
+            forced = forced[:MUST_INCLUDE_MAX]
             seen = {r["source_id"] for r in forced if r.get("source_id")}
             for r in results:
                 if len(forced) >= top_k:
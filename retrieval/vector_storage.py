@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+
+# Vector storage of the search index, chosen at build time (INDEX_STORAGE or
+# run_local.py --rebuild-index --index-storage):
+#   flat  full float32 vectors in index.faiss (default)
+#   fp16  float16 scalar-quantized first pass (2x smaller) + exact re-ranking
+#   sq8   8-bit scalar-quantized first pass (4x smaller) + exact re-ranking
+# Re-ranking reads candidate rows from a memory-mapped float32 matrix, so processes
+# sharing a host share its pages instead of each holding a float32 index.
+STORAGE_MODES = ("flat", "fp16", "sq8")
+INDEX_STORAGE = os.getenv("INDEX_STORAGE", "flat").strip().lower()
+
+# First-pass candidates per requested result before exact re-ranking.
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", "4"))
+
+MANIFEST_NAME = "index_manifest.json"
+VECTORS_NAME = "vectors.f32.npy"
+
+_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def quantized_index_name(storage: str) -> str:
+    return f"index.{storage}.faiss"
+
+
+def build_quantized_index(vectors: np.ndarray, storage: str) -> faiss.Index:
+    """
+    L2 scalar-quantized index over float32 vectors (sq8 is trained on them).
+    """
+    if storage not in _QUANTIZERS:
+        raise ValueError(f"Not a quantized storage mode: {storage!r} (expected one of {tuple(_QUANTIZERS)})")
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    index = faiss.IndexScalarQuantizer(vectors.shape[1], _QUANTIZERS[storage], faiss.METRIC_L2)
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+class RerankedIndex:
+    """
+    Quantized first pass + exact L2 re-ranking of RERANK_FACTOR * k candidates
+    against full-precision rows. Implements the part of the faiss.Index interface
+    the retriever uses (d, ntotal, search) and returns squared L2 distances like
+    IndexFlatL2, so scores match a flat index.
+    """
+
+    def __init__(self, quantized: faiss.Index, vectors: np.ndarray, rerank_factor: int = RERANK_FACTOR):
+        if vectors.shape != (quantized.ntotal, quantized.d):
+            raise ValueError(
+                f"Vector matrix shape {vectors.shape} does not match the index ({quantized.ntotal}, {quantized.d})"
+            )
+        self.quantized = quantized
+        self.vectors = vectors
+        self.rerank_factor = max(rerank_factor, 1)
+
+    @property
+    def d(self) -> int:
+        return int(self.quantized.d)
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.quantized.ntotal)
+
+    def search(self, xq: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        xq = np.ascontiguousarray(xq, dtype="float32")
+        n_candidates = min(max(k * self.rerank_factor, k), self.ntotal) or k
+        _, cand = self.quantized.search(xq, n_candidates)
+
+        # unfilled slots look like faiss's: max float distance, id -1
+        distances = np.full((len(xq), k), np.finfo("float32").max, dtype="float32")
+        indices = np.full((len(xq), k), -1, dtype="int64")
+        for qi, row in enumerate(cand):
+            ids = row[row != -1]
+            if not len(ids):
+                continue
+            # sorted ids keep mmap reads sequential
+            ids = np.sort(ids)
+            diff = np.asarray(self.vectors[ids], dtype="float32") - xq[qi]
+            exact = np.einsum("ij,ij->i", diff, diff)
+            order = np.argsort(exact, kind="stable")[:k]
+            distances[qi, : len(order)] = exact[order]
+            indices[qi, : len(order)] = ids[order]
+        return distances, indices
+
+
+def write_storage(
+    index_dir: Path,
+    flat_index: faiss.Index,
+    storage: str,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Writes the manifest and, for quantized modes, the quantized index and the
+    float32 matrix (taken from the flat index) next to index.faiss.
+    """
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Unknown index storage: {storage!r} (expected one of {STORAGE_MODES})")
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    for mode in _QUANTIZERS:
+        (index_dir / quantized_index_name(mode)).unlink(missing_ok=True)
+    (index_dir / VECTORS_NAME).unlink(missing_ok=True)
+
+    manifest: Dict[str, Any] = {"storage": storage, "dim": int(flat_index.d), "ntotal": int(flat_index.ntotal)}
+    if storage != "flat":
+        vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+        np.save(index_dir / VECTORS_NAME, np.ascontiguousarray(vectors, dtype="float32"))
+        faiss.write_index(build_quantized_index(vectors, storage), str(index_dir / quantized_index_name(storage)))
+    manifest.update(extra or {})
+
+    (index_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def read_manifest(index_dir: Path) -> Dict[str, Any]:
+    """
+    Index manifest; indexes built before manifests existed are flat.
+    """
+    path = index_dir / MANIFEST_NAME
+    if not path.exists():
+        return {"storage": "flat"}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def validate_manifest(
+    manifest: Dict[str, Any],
+    index: Any,
+    *,
+    n_rows: int,
+    index_version: str,
+    embedding_model: str,
+    dimensions: Optional[int],
+) -> None:
+    """
+    Raises ValueError when the loaded index does not fit its manifest, the chunk
+    metadata, or the embedding settings queries will use (model, dimensions).
+    Checks only what the manifest records; indexes without one skip them.
+    """
+    problems = []
+    if int(index.ntotal) != n_rows:
+        problems.append(f"index has {index.ntotal} vectors but chunks_meta.jsonl has {n_rows} rows")
+    if "dim" in manifest and int(manifest["dim"]) != int(index.d):
+        problems.append(f"index vectors have {index.d} dims, manifest says {manifest['dim']}")
+    if manifest.get("index_version") and manifest["index_version"] != index_version:
+        problems.append("manifest was written for different chunk metadata (stale index files)")
+    if manifest.get("embedding_model") and manifest["embedding_model"] != embedding_model:
+        problems.append(f"index was embedded with {manifest['embedding_model']}, queries would use {embedding_model}")
+    if dimensions is not None and int(index.d) != dimensions:
+        problems.append(f"EMBEDDING_DIMENSIONS={dimensions} but the index has {index.d}-dim vectors")
+
+    if problems:
+        raise ValueError("Index does not match its settings: " + "; ".join(problems) + " (rebuild the index)")
+
+
+def load_search_index(index_dir: Path, manifest: Dict[str, Any]) -> Any:
+    """
+    faiss.Index (flat) or RerankedIndex (quantized), as recorded in the manifest.
+    """
+    storage = manifest.get("storage", "flat")
+    if storage == "flat":
+        path = index_dir / "index.faiss"
+        if not path.exists():
+            raise FileNotFoundError(f"Missing FAISS index file: {path}")
+        return faiss.read_index(str(path))
+
+    if storage not in _QUANTIZERS:
+        raise ValueError(f"Unknown index storage in {index_dir / MANIFEST_NAME}: {storage!r}")
+    q_path = index_dir / quantized_index_name(storage)
+    v_path = index_dir / VECTORS_NAME
+    for path in (q_path, v_path):
+        if not path.exists():
+            raise FileNotFoundError(f"Missing {storage} index file: {path} (rebuild the index)")
+    return RerankedIndex(faiss.read_index(str(q_path)), np.load(v_path, mmap_mode="r"))
@@ -1,29 +1,191 @@
 from __future__ import annotations
 
 import argparse
-from typing import Optional
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
 
 from retrieval.index_store import ensure_index
-from orchestration.graph import run_task
+from retrieval.retriever import enable_embedding_batching, get_index_version
+from orchestration.graph import get_graph, run_task
 from tasks.examples import EXAMPLE_TASKS
 
 
+def _iter_batch_tasks(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Stream tasks from a JSONL file. Each line needs a task text under
+    "task", "task_text", "prompt" or "body"; "task_key" and "id"/"request_id" are optional.
+    A line with only a known task_key runs that example task.
+    Lines that are not JSON objects or have no task text are yielded with an
+    "error" and are reported instead of run.
+    """
+    with path.open("r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield {"id": f"line-{line_no}", "task_key": None, "task": "", "error": f"Invalid JSON: {e}"}
+                continue
+            if not isinstance(row, dict):
+                yield {"id": f"line-{line_no}", "task_key": None, "task": "", "error": "Line is not a JSON object"}
+                continue
+
+            task_key = row.get("task_key") or None
+            task_text = row.get("task") or row.get("task_text") or row.get("prompt") or row.get("body")
+            if not task_text and task_key in EXAMPLE_TASKS:
+                task_text = EXAMPLE_TASKS[task_key]["task"]
+            item = {
+                "id": str(row.get("id") or row.get("request_id") or f"line-{line_no}"),
+                "task_key": task_key,
+                "task": task_text if isinstance(task_text, str) else "",
+            }
+            if not item["task"].strip():
+                item["error"] = "No task text (task/task_text/prompt/body) and no known task_key"
+            yield item
+
+
+def _run_one(item: Dict[str, Any], use_cache: bool, profile: bool = False) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        result = run_task(item["task"], task_key=item["task_key"], use_cache=use_cache, profile=profile or None)
+        row = {
+            **item,
+            "status": "ok",
+            "final_output": result.get("final_output", ""),
+            "verification_notes": result.get("verification_notes", []),
+            "trace": result.get("trace", []),
+        }
+        if "profile" in (result.get("meta") or {}):
+            row["profile"] = result["meta"]["profile"]
+    except Exception as e:
+        row = {**item, "status": "error", "error": f"{type(e).__name__}: {str(e)[:300]}"}
+    row["latency_ms"] = int((time.perf_counter() - t0) * 1000)
+    return row
+
+
+def run_batch(
+    batch_path: Path,
+    out_path: Path,
+    workers: int = 4,
+    use_cache: bool = True,
+    profile: bool = False,
+) -> Dict[str, int]:
+    """
+    Run every task of a JSONL file over one warm index + compiled graph with a
+    thread pool, appending one result line per task to out_path as soon as it
+    finishes. At most 2 x workers tasks are in flight, so large files stream.
+    """
+    get_index_version()
+    get_graph()
+    if workers > 1:
+        enable_embedding_batching()
+
+    counts = {"ok": 0, "error": 0}
+    lock = threading.Lock()
+
+    with out_path.open("w", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def _write_row(row: Dict[str, Any]) -> None:
+            with lock:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                out.flush()
+                counts[row["status"]] += 1
+            print(f"- {row['status']:5} | {row['id']} ({row['task_key'] or 'default'}) {row['latency_ms']} ms")
+
+        def _write(fut: Future) -> None:
+            _write_row(fut.result())
+
+        pending: Set[Future] = set()
+        for item in _iter_batch_tasks(batch_path):
+            if "error" in item:
+                _write_row({**item, "status": "error", "latency_ms": 0})
+                continue
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    _write(fut)
+            pending.add(pool.submit(_run_one, item, use_cache, profile))
+
+        for fut in wait(pending).done:
+            _write(fut)
+
+    return counts
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
 
     parser.add_argument("--rebuild-index", action="store_true")
     parser.add_argument("--task_key", type=str, help="Task key from EXAMPLE_TASKS")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the whole-run result cache")
+    parser.add_argument("--batch", type=str, help="JSONL file of tasks to run in bulk")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent tasks for --batch")
+    parser.add_argument("--out", type=str, help="Results JSONL for --batch (default: <batch>.results.jsonl)")
+    parser.add_argument(
+        "--chunker",
+        choices=["recursive", "markdown"],
+        default=None,
+        help="Chunking strategy used with --rebuild-index (default: CHUNKER env or recursive)",
+    )
+    parser.add_argument(
+        "--index-storage",
+        choices=["flat", "fp16", "sq8"],
+        default=None,
+        help="Vector storage used with --rebuild-index: float32 flat, or fp16/sq8 + exact re-ranking "
+        "(default: INDEX_STORAGE env or flat)",
+    )
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        default=None,
+        help="Shortened embedding size used with --rebuild-index, e.g. 256 or 512 "
+        "(default: EMBEDDING_DIMENSIONS env or the model's full size)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="cProfile + tracemalloc every graph node and search_docs call (reports under PROFILE_DIR, default data/profiles)",
+    )
 
     args = parser.parse_args()
 
     if args.rebuild_index:
         print("Rebuilding FAISS index from data/docs ...")
-        ensure_index(docs_dir="data/docs", force_rebuild=True)
+        ensure_index(
+            docs_dir="data/docs",
+            force_rebuild=True,
+            chunker=args.chunker,
+            storage=args.index_storage,
+            dimensions=args.dimensions,
+        )
         print(" Index rebuilt.")
         return
     else:
         ensure_index(docs_dir="data/docs", force_rebuild=False)
 
+    if args.batch:
+        batch_path = Path(args.batch)
+        out_path = Path(args.out) if args.out else batch_path.with_suffix(".results.jsonl")
+        print(f"\nRunning batch: {batch_path} with {args.workers} worker(s) -> {out_path}\n")
+        t0 = time.perf_counter()
+        counts = run_batch(
+            batch_path,
+            out_path,
+            workers=max(args.workers, 1),
+            use_cache=not args.no_cache,
+            profile=args.profile,
+        )
+        elapsed = time.perf_counter() - t0
+        total = counts["ok"] + counts["error"]
+        print(f"\nDone: {total} task(s), {counts['error']} error(s), {elapsed:.1f}s total")
+        return
+
     if not args.task_key:
         print(" Index ready. Provide --task_key to run a task.")
         return
@@ -40,7 +202,7 @@ def main() -> None:
 
     print(f"\nRunning task: {args.task_key}\n")
 
-    result = run_task(task_text, task_key=args.task_key)
+    result = run_task(task_text, task_key=args.task_key, use_cache=not args.no_cache, profile=args.profile or None)
 
     print("\n================ FINAL OUTPUT ================\n")
     print(result.get("final_output", ""))
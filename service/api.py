@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Allow running as a script from the repo root or /service
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from orchestration.graph import get_graph, run_task  # noqa: E402
+from orchestration.result_cache import RESULT_CACHE  # noqa: E402
+from retrieval.anchors import get_anchor  # noqa: E402
+from retrieval.fact_store import ensure_fact_store  # noqa: E402
+from retrieval.index_store import ensure_index, index_exists  # noqa: E402
+from retrieval.retriever import (  # noqa: E402
+    enable_embedding_batching,
+    get_embedding_batcher,
+    get_index_version,
+    search_docs,
+)
+
+# Micro-batching window for concurrent query embeddings (ms) and max texts per call.
+BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "10"))
+BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+BATCH_TIMEOUT_S = float(os.getenv("EMBED_BATCH_TIMEOUT_S", "30"))
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+_STATS: Dict[str, Any] = {"started_at": None, "requests": {}, "errors": 0}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def warm_up() -> None:
+    """
+    Load everything a request needs once: the retriever's search index (flat, or
+    quantized + memory-mapped vectors) + metadata, fact store, anchors, compiled
+    graph, and the embedding batcher. The langchain vectorstore is only loaded to
+    build a missing index, never to serve.
+    """
+    if not index_exists():
+        ensure_index(docs_dir="data/docs", force_rebuild=False)
+    get_index_version()
+    ensure_fact_store()
+    get_anchor("technical_decisions.options")
+    get_graph()
+    enable_embedding_batching(window_ms=BATCH_WINDOW_MS, max_batch=BATCH_MAX_SIZE, timeout_s=BATCH_TIMEOUT_S)
+    _STATS["started_at"] = time.time()
+
+
+async def _read_json(receive: Receive) -> Dict[str, Any]:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    if not body.strip():
+        return {}
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise BadRequest(f"Invalid JSON body: {e}")
+    if not isinstance(payload, dict):
+        raise BadRequest("JSON body must be an object")
+    return payload
+
+
+def _json_default(obj: Any) -> Any:
+    # read-only Mappings (e.g. EvidenceNote) from anything that bypassed run_task()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    return str(obj)
+
+
+async def _send_json(send: Send, status: int, payload: Any) -> None:
+    body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _require_str(payload: Dict[str, Any], key: str) -> str:
+    val = payload.get(key)
+    if not isinstance(val, str) or not val.strip():
+        raise BadRequest(f"'{key}' must be a non-empty string")
+    return val
+
+
+def _optional_positive_int(payload: Dict[str, Any], key: str) -> Optional[int]:
+    val = payload.get(key)
+    if val is None:
+        return None
+    if isinstance(val, bool) or not isinstance(val, int) or val < 1:
+        raise BadRequest(f"'{key}' must be a positive integer")
+    return val
+
+
+def _optional_str(payload: Dict[str, Any], key: str) -> Optional[str]:
+    val = payload.get(key)
+    if val is not None and not isinstance(val, str):
+        raise BadRequest(f"'{key}' must be a string or null")
+    return val or None
+
+
+def _optional_bool(payload: Dict[str, Any], key: str, default: bool) -> bool:
+    val = payload.get(key, default)
+    if not isinstance(val, bool):
+        raise BadRequest(f"'{key}' must be true or false")
+    return val
+
+
+async def _handle_run_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    task = _require_str(payload, "task")
+    task_key = _optional_str(payload, "task_key")
+    use_cache = not _optional_bool(payload, "bypass_cache", False)
+    result = await asyncio.to_thread(run_task, task, task_key, use_cache)
+    return result
+
+
+async def _handle_search(payload: Dict[str, Any]) -> Dict[str, Any]:
+    query = _require_str(payload, "query")
+    top_k = _optional_positive_int(payload, "top_k")
+    section_mode = payload.get("section_mode", "filter")
+    if section_mode not in ("filter", "boost"):
+        raise BadRequest("'section_mode' must be 'filter' or 'boost'")
+    results = await asyncio.to_thread(
+        search_docs,
+        query,
+        top_k=top_k or 5,
+        must_include=_optional_str(payload, "must_include"),
+        overfetch=_optional_positive_int(payload, "overfetch"),
+        section=_optional_str(payload, "section"),
+        section_mode=section_mode,
+    )
+    return {"results": results}
+
+
+async def _handle_health(_: Dict[str, Any]) -> Dict[str, Any]:
+    return {"status": "ok", "index_version": get_index_version()}
+
+
+async def _handle_stats(_: Dict[str, Any]) -> Dict[str, Any]:
+    batcher = get_embedding_batcher()
+    return {
+        **_STATS,
+        "uptime_s": round(time.time() - _STATS["started_at"], 1) if _STATS["started_at"] else None,
+        "embedding_batcher": batcher.stats() if batcher else None,
+        "result_cache": RESULT_CACHE.stats(),
+    }
+
+
+ROUTES: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+    ("POST", "/run_task"): _handle_run_task,
+    ("POST", "/search"): _handle_search,
+    ("GET", "/health"): _handle_health,
+    ("GET", "/stats"): _handle_stats,
+}
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await asyncio.to_thread(warm_up)
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": f"{type(e).__name__}: {e}"})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+    """
+    Minimal ASGI app:
+      POST /run_task {"task", "task_key"?, "bypass_cache"?} -> final SharedState dict
+      POST /search   {"query", "top_k"?, ...}        -> {"results": [...]}
+      GET  /health, GET /stats
+    """
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    method, path = scope["method"], scope["path"].rstrip("/") or "/"
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        status = 405 if any(p == path for (_, p) in ROUTES) else 404
+        await _send_json(send, status, {"error": f"{method} {path} not supported"})
+        return
+
+    key = f"{method} {path}"
+    t0 = time.perf_counter()
+    try:
+        payload = await _read_json(receive) if method == "POST" else {}
+        result = await handler(payload)
+        status = 200
+    except BadRequest as e:
+        result, status = {"error": str(e)}, 400
+    except Exception as e:
+        _STATS["errors"] += 1
+        result, status = {"error": f"{type(e).__name__}: {str(e)[:300]}"}, 500
+
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    row = _STATS["requests"].setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+    row["count"] += 1
+    row["total_ms"] += elapsed_ms
+    row["max_ms"] = max(row["max_ms"], elapsed_ms)
+
+    await _send_json(send, status, result)
+
+
+def main(argv: Optional[list] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve run_task/search over HTTP (ASGI).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    uvicorn.run("service.api:app", host=args.host, port=args.port, lifespan="on")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,107 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
-from typing import Any, Dict, List, Optional, TypedDict
+import operator
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields
+from typing import Annotated, Any, Dict, Iterator, List, NotRequired, Optional, TypedDict
 
 
 class Citation(TypedDict):
     source_id: str          
     quote: str              
     location: str           
+    offset: NotRequired[int]
+
+
+class EvidenceSpan(TypedDict):
+    doc_id: str
+    start: int
+    end: int
 
 
 class ResearchNote(TypedDict):
     claim: str
     citations: List[Citation]
+    score: NotRequired[float]
+    span: NotRequired[EvidenceSpan]
+
+
+class StaleEvidenceError(LookupError):
+    """
+    An EvidenceNote was read after the index it points into was replaced.
+    """
+
+
+class EvidenceNote(Mapping):
+    """
+    Read-only ResearchNote whose claim is not stored: it is a (doc_id, start, end)
+    reference into the indexed document text (retrieval.retriever.get_document_text),
+    shared by every run in the process. Readers use it like the ResearchNote dict
+    (n["claim"], n.get("citations"), {**n}); copying it is free.
+
+    The reference is only valid for the index version it was made from: reading the
+    claim after reload_index() swapped in another index raises StaleEvidenceError.
+    Notes live inside a graph run; run_task() snapshots them into plain dicts before
+    results are returned or cached.
+    """
+
+    __slots__ = ("doc_id", "start", "end", "citations", "score", "index_version")
+
+    def __init__(
+        self,
+        doc_id: str,
+        start: int,
+        end: int,
+        citations: List[Citation],
+        score: Optional[float] = None,
+        index_version: str = "",
+    ):
+        self.doc_id = doc_id
+        self.start = start
+        self.end = end
+        self.citations = citations
+        self.score = score
+        self.index_version = index_version
+
+    @property
+    def claim(self) -> str:
+        from retrieval.retriever import get_document_text, get_index_version
+
+        if self.index_version and get_index_version() != self.index_version:
+            raise StaleEvidenceError(f"{self!r} was made from index {self.index_version[:12]}, which is no longer loaded")
+        text = get_document_text(self.doc_id)
+        if len(text) < self.end:
+            raise StaleEvidenceError(f"{self!r} points past the end of the indexed document")
+        return text[self.start:self.end]
+
+    def _keys(self) -> tuple:
+        return ("claim", "citations", "span") if self.score is None else ("claim", "citations", "score", "span")
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "claim":
+            return self.claim
+        if key == "citations":
+            return self.citations
+        if key == "score" and self.score is not None:
+            return self.score
+        if key == "span":
+            return {"doc_id": self.doc_id, "start": self.start, "end": self.end}
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __copy__(self) -> "EvidenceNote":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "EvidenceNote":
+        return self
+
+    def __repr__(self) -> str:
+        return f"EvidenceNote({self.doc_id}[{self.start}:{self.end}], citations={len(self.citations)})"
 
 
 class TraceLogRow(TypedDict):
@@ -22,6 +111,24 @@ class TraceLogRow(TypedDict):
     outcome: str           
 
 
+def merge_meta(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Graph reducer for SharedState.meta: parallel nodes each contribute their own keys.
+    """
+    return {**(left or {}), **(right or {})}
+
+
+def sum_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    """
+    Graph reducer for SharedState.node_timings_ms: a node that runs twice
+    (verifier retry) accumulates its time.
+    """
+    out = dict(left or {})
+    for k, v in (right or {}).items():
+        out[k] = round(out.get(k, 0.0) + v, 3)
+    return out
+
+
 @dataclass
 class SharedState:
     task: str
@@ -30,7 +137,8 @@ class SharedState:
 
     plan: List[str] = field(default_factory=list)
 
-    research_notes: List[ResearchNote] = field(default_factory=list)
+    # plain ResearchNote dicts or EvidenceNote references (both read the same way)
+    research_notes: List[ResearchNote | EvidenceNote] = field(default_factory=list)
 
     draft: Optional[str] = None
 
@@ -38,9 +146,23 @@ class SharedState:
 
     final_output: Optional[str] = None
     
-    trace: List[TraceLogRow] = field(default_factory=list)
+    # reducers let parallel graph branches append rows / add keys in the same step
+    trace: Annotated[List[TraceLogRow], operator.add] = field(default_factory=list)
+
+    meta: Annotated[Dict[str, Any], merge_meta] = field(default_factory=dict)
 
-    meta: Dict[str, Any] = field(default_factory=dict)
+    # wall time per graph node, filled in by orchestration/graph.py
+    node_timings_ms: Annotated[Dict[str, float], sum_timings] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        """
+        Plain, JSON-ready dict. Only the notes are materialized; other fields are
+        shared with the state rather than deep-copied.
+        """
+        out = {f.name: getattr(self, f.name) for f in fields(self)}
+        out["research_notes"] = notes_to_dicts(self.research_notes)
+        return out
+
+
+def notes_to_dicts(notes: List[Any]) -> List[Dict[str, Any]]:
+    return [dict(n) if isinstance(n, EvidenceNote) else n for n in notes or []]
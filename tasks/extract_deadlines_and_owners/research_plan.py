@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from retrieval.retriever import search_docs
+from retrieval.fact_store import get_action_items
+from retrieval.retriever import get_chunks, search_docs
 from retrieval.research_utils import dedupe_results_keep_order
 
 def retrieve_deadlines(query: str) -> list[dict]:
-    results = []
-    results += search_docs(query, top_k=12, overfetch=80)
-    results += search_docs("Owner Due Date Week action item status", top_k=12, overfetch=80)
-    results += search_docs("deadline due by responsible owner", top_k=10, overfetch=80)
+    # indexed lookup, no embedding calls: the chunks holding parsed action_items.md rows
+    item_sources = sorted({r["source_id"] for r in get_action_items(source="action_items.md")})
+    if item_sources:
+        return get_chunks(source_ids=item_sources)
+
+    # the consolidated action-items table, fetched by structure instead of similarity
+    results = get_chunks(source="action_items.md", block_type="table")
+    results += search_docs(query, top_k=12)
+    results += search_docs("Owner Due Date Week action item status", top_k=12)
+    results += search_docs("deadline due by responsible owner", top_k=10)
     return dedupe_results_keep_order(results)[:25]
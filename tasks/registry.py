@@ -12,6 +12,7 @@ class ResearchPlan:
     action_label: str
     retrieve: Callable[[str], list[dict]]
     postprocess: Optional[Callable[[SharedState], None]] = None
+    merge_adjacent: bool = True
 
 
 def get_research_plan(task_key: str) -> ResearchPlan:
@@ -30,7 +31,7 @@ def get_research_plan(task_key: str) -> ResearchPlan:
         from tasks.top5_risks_mitigations_strict.research_plan import retrieve_top5_risks
         return ResearchPlan(
             task_key=key,
-            action_label="FAISS retrieval (boosted for risks.md)",
+            action_label="Fact-store lookup of risks.md (FAISS retrieval boosted for risks.md as fallback)",
             retrieve=retrieve_top5_risks,
         )
 
@@ -54,7 +55,7 @@ def get_research_plan(task_key: str) -> ResearchPlan:
         from tasks.extract_deadlines_and_owners.research_plan import retrieve_deadlines
         return ResearchPlan(
             task_key=key,
-            action_label="FAISS retrieval (deadlines + owners)",
+            action_label="Fact-store lookup of action_items.md (FAISS retrieval as fallback)",
             retrieve=retrieve_deadlines,
         )
 
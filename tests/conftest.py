@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+import os
+import sys
+
+# Allow running from /tests even when pytest is invoked from elsewhere
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
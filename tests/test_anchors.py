@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import pytest
+
+from retrieval import anchors
+from retrieval.anchors import build_anchors, get_anchor, save_anchors
+
+TEXT = "# Decisions\n### Option A: FAISS\nLocal index.\n### Option B: Pinecone\nHosted.\n## Current Recommendation\nA.\n"
+
+
+def _rows(text: str = TEXT):
+    cut = text.find("### Option B")
+    parts = [(0, text[:cut]), (cut, text[cut:])] if cut > 0 else [(0, text)]
+    return [
+        {
+            "page_content": body,
+            "metadata": {
+                "doc_id": "doc:technical_decisions.md",
+                "start_index": start,
+                "source_id": f"doc:technical_decisions.md#chunk_{i}",
+                "locator": f"chunk {i}",
+            },
+        }
+        for i, (start, body) in enumerate(parts)
+    ]
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    """
+    Point anchors at a temp anchors.json and a fake loaded index; returns the mutable state.
+    """
+    state = {"version": "v1", "rows": _rows(), "row_loads": 0}
+
+    def rows():
+        state["row_loads"] += 1
+        return state["rows"]
+
+    monkeypatch.setattr(anchors, "ANCHORS_PATH", tmp_path / "anchors.json")
+    monkeypatch.setattr(anchors, "get_index_version", lambda: state["version"])
+    monkeypatch.setattr(anchors, "get_meta_rows", rows)
+    monkeypatch.setattr(anchors, "_CACHED_ANCHORS", None)
+    return state
+
+
+def test_build_anchors_resolves_markers():
+    built = build_anchors(_rows(), index_version="v1")["technical_decisions.options"]
+    assert built["text"].startswith("### Option A:\nFAISS")
+    assert built["text"].endswith("Hosted.")
+    assert built["chunk_source_ids"] == ["doc:technical_decisions.md#chunk_0", "doc:technical_decisions.md#chunk_1"]
+    assert built["index_version"] == "v1"
+
+    assert build_anchors(_rows("# Decisions\nno options here\n")) == {}
+
+
+def test_stored_anchors_used_only_for_their_index_version(index):
+    stored = build_anchors(_rows(), index_version="v1")
+    stored["technical_decisions.options"]["text"] = "from file"
+    save_anchors(stored, anchors.ANCHORS_PATH)
+
+    assert get_anchor("technical_decisions.options")["text"] == "from file"
+    assert index["row_loads"] == 0
+
+    # a new index makes the file stale: rebuilt from the loaded chunks instead
+    index["version"] = "v2"
+    rebuilt = get_anchor("technical_decisions.options")
+    assert rebuilt["text"] != "from file"
+    assert rebuilt["index_version"] == "v2"
+    assert index["row_loads"] == 1
+
+
+def test_registry_cached_per_version(index):
+    anchors.ANCHORS_PATH.write_text("not json", encoding="utf-8")
+
+    assert get_anchor("technical_decisions.options")["index_version"] == "v1"
+    assert get_anchor("missing") is None
+    assert index["row_loads"] == 1
+
+    index["version"] = "v2"
+    index["rows"] = _rows("# Decisions\n")
+    assert get_anchor("technical_decisions.options") is None
+    assert anchors.get_anchor_source_ids() == frozenset()
+    assert index["row_loads"] == 2
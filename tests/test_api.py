@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from service import api
+
+
+@pytest.mark.parametrize(
+    "handler, payload, message",
+    [
+        (api._handle_run_task, {}, "'task'"),
+        (api._handle_run_task, {"task": "x", "task_key": 5}, "'task_key'"),
+        (api._handle_run_task, {"task": "x", "bypass_cache": "false"}, "'bypass_cache'"),
+        (api._handle_search, {"query": "x", "top_k": 0}, "'top_k'"),
+        (api._handle_search, {"query": "x", "top_k": "5"}, "'top_k'"),
+        (api._handle_search, {"query": "x", "overfetch": True}, "'overfetch'"),
+        (api._handle_search, {"query": "x", "section_mode": "rank"}, "'section_mode'"),
+        (api._handle_search, {"query": "x", "section": ["Risks"]}, "'section'"),
+        (api._handle_search, {"query": "x", "must_include": 3}, "'must_include'"),
+    ],
+)
+def test_invalid_params_are_bad_requests(handler, payload, message):
+    with pytest.raises(api.BadRequest, match=message):
+        asyncio.run(handler(payload))
+
+
+def test_valid_params_reach_the_handler(monkeypatch):
+    calls = []
+    monkeypatch.setattr(api, "run_task", lambda task, task_key, use_cache: calls.append((task, task_key, use_cache)) or {})
+    monkeypatch.setattr(api, "search_docs", lambda query, **kw: calls.append((query, kw)) or [])
+
+    asyncio.run(api._handle_run_task({"task": "x", "task_key": None, "bypass_cache": True}))
+    asyncio.run(api._handle_search({"query": "q", "top_k": 3, "section": "", "section_mode": "boost"}))
+
+    assert calls[0] == ("x", None, False)
+    assert calls[1] == ("q", {
+        "top_k": 3,
+        "must_include": None,
+        "overfetch": None,
+        "section": None,
+        "section_mode": "boost",
+    })
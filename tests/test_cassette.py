@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import pytest
+
+from orchestration import cassette as cassette_mod
+from orchestration.cassette import Cassette, CassetteMiss, cassette_call, cassette_call_many, use_cassette
+
+
+@pytest.fixture(autouse=True)
+def _cassette_off():
+    yield
+    use_cassette(None)
+
+
+def test_record_then_replay(tmp_path):
+    path = tmp_path / "c.jsonl"
+    calls = []
+
+    def live():
+        calls.append(1)
+        return {"content": "hi"}
+
+    use_cassette("record", path)
+    assert cassette_call("chat", {"model": "m", "messages": ["a"]}, live) == {"content": "hi"}
+    assert cassette_call("chat", {"messages": ["a"], "model": "m"}, live) == {"content": "hi"}  # key ignores dict order
+    assert calls == [1]
+
+    replay = use_cassette("replay", path)
+    assert cassette_call("chat", {"model": "m", "messages": ["a"]}, live) == {"content": "hi"}
+    assert calls == [1]
+    assert replay.stats()["hits"] == 1
+
+    with pytest.raises(CassetteMiss):
+        cassette_call("chat", {"model": "m", "messages": ["b"]}, live)
+
+
+def test_call_many_records_per_request(tmp_path):
+    path = tmp_path / "c.jsonl"
+    asked = []
+
+    def embed(positions):
+        asked.append(list(positions))
+        return [[float(i)] for i in positions]
+
+    use_cassette("record", path)
+    reqs = [{"input": t} for t in ("a", "b", "c")]
+    assert cassette_call_many("embedding", reqs[:2], embed) == [[0.0], [1.0]]
+    # only the unrecorded request goes to the live call, grouped differently
+    assert cassette_call_many("embedding", reqs, embed) == [[0.0], [1.0], [2.0]]
+    assert asked == [[0, 1], [2]]
+
+    use_cassette("replay", path)
+    assert cassette_call_many("embedding", list(reversed(reqs)), embed) == [[2.0], [1.0], [0.0]]
+    with pytest.raises(CassetteMiss):
+        cassette_call_many("embedding", [{"input": "d"}], embed)
+
+
+def test_off_and_invalid_modes(tmp_path):
+    use_cassette(None)
+    assert cassette_mod.get_cassette() is None
+    assert cassette_call("chat", {}, lambda: 42) == 42
+
+    with pytest.raises(ValueError):
+        Cassette(tmp_path / "c.jsonl", "rewind")
+    with pytest.raises(FileNotFoundError):
+        Cassette(tmp_path / "missing.jsonl", "replay")
+
+
+class _FakeOpenAI:
+    """
+    Just enough of the OpenAI client for one chat completion and one embeddings call.
+    """
+
+    class _Obj:
+        def __init__(self, **kw):
+            self.__dict__.update(kw)
+
+    def __init__(self):
+        self.chat = self._Obj(completions=self._Obj(create=self._chat))
+        self.embeddings = self._Obj(create=self._embed)
+
+    def _chat(self, **request):
+        msg = self._Obj(content="draft (doc:risks.md#chunk_0)")
+        usage = self._Obj(prompt_tokens=10, completion_tokens=5)
+        return self._Obj(choices=[self._Obj(message=msg)], usage=usage)
+
+    def _embed(self, input, **params):
+        return self._Obj(data=[self._Obj(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)])
+
+
+def test_replay_runs_without_credentials(tmp_path, monkeypatch):
+    from agents import writer
+    from retrieval import retriever
+    from shared_state import SharedState
+
+    monkeypatch.setattr(retriever, "get_embedding_dimensions", lambda: None)
+    path = tmp_path / "c.jsonl"
+
+    monkeypatch.setattr(writer, "_LLM_CLIENT", _FakeOpenAI())
+    monkeypatch.setattr(retriever, "_CLIENT", _FakeOpenAI())
+    use_cassette("record", path)
+    recorded = writer._llm_write(SharedState(task="t"), system_prompt="s", user_prompt="u")
+    assert retriever._embed_texts(["query"]) == [[5.0]]
+
+    # no client objects and no key: replay must not construct OpenAI()
+    monkeypatch.setattr(writer, "_LLM_CLIENT", None)
+    monkeypatch.setattr(retriever, "_CLIENT", None)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    use_cassette("replay", path)
+
+    state = SharedState(task="t")
+    assert writer._llm_write(state, system_prompt="s", user_prompt="u") == recorded
+    assert state.meta["llm_usage"]["completion_tokens"] == 5
+    assert retriever._embed_texts(["query"]) == [[5.0]]
+    assert writer._LLM_CLIENT is None and retriever._CLIENT is None
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from retrieval.embedding_batcher import EmbeddingBatcher
+
+
+def _embed_concurrently(batcher: EmbeddingBatcher, texts):
+    out = {}
+
+    def call(text):
+        try:
+            out[text] = batcher.embed(text)
+        except Exception as e:
+            out[text] = e
+
+    threads = [threading.Thread(target=call, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_coalesces_and_dedupes_concurrent_calls():
+    batches = []
+
+    def embed_many(texts):
+        batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    batcher = EmbeddingBatcher(embed_many, window_ms=50)
+    out = _embed_concurrently(batcher, ["a", "bb", "a"])
+
+    assert out == {"a": [1.0], "bb": [2.0]}
+    assert sum(len(b) for b in batches) == 2
+    assert batcher.stats()["requests"] == 3
+
+
+def test_short_response_fails_the_batch_and_keeps_serving():
+    calls = []
+
+    def embed_many(texts):
+        calls.append(list(texts))
+        if len(calls) == 1:
+            return [[0.0]] * (len(texts) - 1)
+        return [[float(len(t))] for t in texts]
+
+    batcher = EmbeddingBatcher(embed_many, window_ms=50, timeout_s=5)
+    out = _embed_concurrently(batcher, ["a", "bb"])
+
+    assert all(isinstance(v, ValueError) for v in out.values())
+    # the worker survived the bad response
+    assert batcher.embed("ccc") == [3.0]
+
+
+def test_embed_error_is_raised_to_callers():
+    def embed_many(texts):
+        raise RuntimeError("rate limited")
+
+    batcher = EmbeddingBatcher(embed_many, window_ms=0, timeout_s=5)
+    with pytest.raises(RuntimeError, match="rate limited"):
+        batcher.embed("a")
+
+
+def test_embed_times_out():
+    release = threading.Event()
+
+    def embed_many(texts):
+        release.wait(5)
+        return [[0.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(embed_many, window_ms=0, timeout_s=0.05)
+    try:
+        with pytest.raises(FutureTimeout):
+            batcher.embed("slow")
+    finally:
+        release.set()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+
+from writer import evidence_packer
+from writer.evidence_packer import MIN_TRIM_TOKENS, pack_evidence
+
+
+@pytest.fixture(autouse=True)
+def _chars_per_token(monkeypatch):
+    # deterministic ~4 chars/token counting, independent of tiktoken
+    monkeypatch.setattr(evidence_packer, "_get_encoding", lambda: None)
+
+
+def _note(tokens: int, score: float, name: str) -> dict:
+    return {"claim": name[0] * (tokens * 4), "citations": [f"doc:{name}.md#chunk_0"], "score": score}
+
+
+def test_oversized_note_is_trimmed_and_packing_continues(monkeypatch):
+    monkeypatch.setenv("EVIDENCE_TOKEN_BUDGET", "300")
+    notes = [_note(100, 0.1, "a"), _note(500, 0.2, "b"), _note(50, 0.3, "c")]
+
+    packed, stats = pack_evidence(notes)
+
+    # b is cut to what is left, c no longer fits in the remainder and is skipped
+    assert [n["citations"][0] for n in packed] == ["doc:a.md#chunk_0", "doc:b.md#chunk_0"]
+    assert packed[1]["claim"].endswith(" ...")
+    assert stats["trimmed_notes"] == 1
+    assert stats["dropped_notes"] == 1
+    assert stats["tokens_used"] <= 300
+
+
+def test_oversized_note_is_dropped_below_min_trim(monkeypatch):
+    monkeypatch.setenv("EVIDENCE_TOKEN_BUDGET", str(100 + MIN_TRIM_TOKENS - 1))
+    notes = [_note(100, 0.1, "a"), _note(500, 0.2, "b"), _note(20, 0.3, "c")]
+
+    packed, stats = pack_evidence(notes)
+
+    # b is skipped rather than ending the pack, so the smaller c still goes in
+    assert [n["claim"][0] for n in packed] == ["a", "c"]
+    assert stats["trimmed_notes"] == 0
+    assert stats["dropped_notes"] == 1
+    assert stats["tokens_used"] == 120
+
+
+def test_anchors_rank_first_and_unusable_notes_are_ignored(monkeypatch):
+    monkeypatch.setenv("EVIDENCE_TOKEN_BUDGET", "1000")
+    anchor = {"claim": "anchor", "citations": ["doc:technical_decisions.md#anchor_options"]}
+    notes = [_note(10, 0.5, "a"), anchor, {"claim": "uncited", "citations": []}, "junk"]
+
+    packed, stats = pack_evidence(notes)
+
+    assert packed[0] is anchor
+    assert stats["input_notes"] == 4
+    assert stats["candidate_notes"] == 2
+    assert stats["packed_notes"] == 2
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from retrieval import fact_store
+
+
+DOCS_DIR = Path(__file__).resolve().parents[1] / "data" / "docs"
+
+
+def _chunk_rows(*names: str):
+    # one chunk per document, shaped like chunks_meta.jsonl rows
+    return [
+        {
+            "page_content": (DOCS_DIR / name).read_text(encoding="utf-8").strip(),
+            "metadata": {
+                "doc_id": f"doc:{name}",
+                "start_index": 0,
+                "source_id": f"doc:{name}#chunk_0",
+                "locator": "chunk 0",
+            },
+        }
+        for name in names
+    ]
+
+
+def _count(path: Path, table: str) -> int:
+    con = sqlite3.connect(str(path))
+    try:
+        return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        con.close()
+
+
+def test_extract_facts_from_docs():
+    facts = fact_store.extract_facts(_chunk_rows("risks.md", "action_items.md", "technical_decisions.md"))
+    assert facts["risks"] and facts["action_items"] and facts["options"]
+    assert {r["source_id"] for r in facts["risks"]} == {"doc:risks.md#chunk_0"}
+    assert {o["option"] for o in facts["options"]} == {"A", "B"}
+
+
+def test_concurrent_builds_do_not_collide(tmp_path):
+    rows = _chunk_rows("risks.md", "action_items.md")
+    path = tmp_path / "facts.sqlite"
+    errors = []
+
+    def build():
+        try:
+            fact_store.build_fact_store(rows, path=path, index_version="v1")
+        except Exception as e:  # collected so the assertion shows it
+            errors.append(e)
+
+    threads = [threading.Thread(target=build) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert [p.name for p in tmp_path.iterdir()] == ["facts.sqlite"]  # no temp files left behind
+    assert fact_store._stored_version(path) == "v1"
+    assert _count(path, "risks") == len(fact_store.extract_facts(rows)["risks"])
+
+
+def test_ensure_rebuilds_only_for_a_new_index_version(tmp_path, monkeypatch):
+    rows = _chunk_rows("risks.md")
+    meta = tmp_path / "chunks_meta.jsonl"
+    meta.write_text("", encoding="utf-8")
+    path = tmp_path / "facts.sqlite"
+    version = {"value": "v1"}
+    builds = []
+
+    real_build = fact_store.build_fact_store
+
+    def counting_build(chunk_rows, path=path, index_version=""):
+        builds.append(index_version)
+        return real_build(chunk_rows, path=path, index_version=index_version)
+
+    monkeypatch.setattr(fact_store, "META_PATH", meta)
+    monkeypatch.setattr(fact_store, "get_index_version", lambda: version["value"])
+    monkeypatch.setattr(fact_store, "get_meta_rows", lambda: rows)
+    monkeypatch.setattr(fact_store, "build_fact_store", counting_build)
+
+    assert fact_store.ensure_fact_store(path) == path
+    assert fact_store.ensure_fact_store(path) == path
+    assert builds == ["v1"]
+
+    version["value"] = "v2"
+    fact_store.ensure_fact_store(path)
+    assert builds == ["v1", "v2"]
+    assert fact_store._stored_version(path) == "v2"
+
+
+def test_lookups_check_freshness_once_per_version(monkeypatch):
+    calls = []
+    monkeypatch.setattr(fact_store, "_CHECKED", None)
+    monkeypatch.setattr(fact_store, "get_index_version", lambda: "v1")
+
+    def failing_ensure():
+        calls.append(1)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(fact_store, "ensure_fact_store", failing_ensure)
+
+    # a failed build degrades to [] (callers fall back) and is not retried per lookup
+    assert fact_store.get_risks() == []
+    assert fact_store.get_options() == []
+    assert calls == [1]
+
+    with pytest.raises(ValueError):
+        fact_store.get_fact_source_ids("nope")
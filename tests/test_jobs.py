@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from orchestration import jobs
+from orchestration.jobs import JobQueue
+
+
+def _wait(queue: JobQueue, job_id: str, timeout: float = 5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        job = queue.get(job_id)
+        if job is not None and job.done:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _fake_run_task(gate: threading.Event):
+    def run_task(task, task_key=None, use_cache=True, on_progress=None):
+        gate.wait(5)
+        if task == "fail":
+            raise RuntimeError("no index")
+        on_progress("researcher", 1.5)
+        return {"final_output": task.upper(), "use_cache": use_cache}
+
+    return run_task
+
+
+def test_lifecycle_and_on_done(monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(jobs, "run_task", _fake_run_task(gate))
+    seen = []
+    queue = JobQueue(max_workers=2, on_done=lambda job: seen.append((job.job_id, job.status)))
+
+    ok_id = queue.submit("hello", "default", label="a", use_cache=False, context={"case": 1})
+    err_id = queue.submit("fail")
+    assert queue.get(ok_id).status in ("queued", "running")
+    assert not queue.get(ok_id).done
+
+    gate.set()
+    ok, err = _wait(queue, ok_id), _wait(queue, err_id)
+
+    assert ok.status == "done"
+    assert ok.result == {"final_output": "HELLO", "use_cache": False}
+    assert [e["node"] for e in ok.events] == ["researcher"]
+    assert ok.context == {"case": 1} and ok.latency_ms is not None
+
+    assert err.status == "error" and err.result is None
+    assert err.error == "RuntimeError: no index"
+
+    # on_done sees the finished job before its status flips
+    assert sorted(seen) == sorted([(ok_id, "running"), (err_id, "running")])
+    assert [j.job_id for j in queue.jobs([err_id, "missing"])] == [err_id]
+
+
+def test_evicts_oldest_finished_jobs_only(monkeypatch):
+    gate = threading.Event()
+    gate.set()
+    monkeypatch.setattr(jobs, "run_task", _fake_run_task(gate))
+    queue = JobQueue(max_workers=1, max_jobs=2)
+
+    first = queue.submit("a")
+    _wait(queue, first)
+    second = queue.submit("b")
+    _wait(queue, second)
+
+    gate.clear()
+    third = queue.submit("c")
+    assert queue.get(first) is None
+    assert {j.job_id for j in queue.jobs()} == {second, third}
+
+    # unfinished jobs are never evicted, even past max_jobs
+    fourth = queue.submit("d")
+    assert {j.job_id for j in queue.jobs()} == {third, fourth}
+    fifth = queue.submit("e")
+    assert {j.job_id for j in queue.jobs()} == {third, fourth, fifth}
+    gate.set()
+    _wait(queue, fifth)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from langchain_core.documents import Document
+
+from retrieval.loader import _split_markdown_blocks, chunk_markdown_documents
+
+DOC = """# Project
+
+Intro line.
+
+## Actions
+
+| Owner | Item |
+|---|---|
+| Ann | Sign SOW |
+Follow-up text.
+
+```
+# not a heading
+```
+
+### Deep
+Nested.
+"""
+
+
+def _blocks(text: str):
+    return [(text[b["start"]:b["end"]].strip(), b["block_type"], b["heading_path"]) for b in _split_markdown_blocks(text)]
+
+
+def test_headings_fold_into_following_block():
+    blocks = _blocks(DOC)
+    assert blocks[0] == ("# Project\n\nIntro line.", "text", ["Project"])
+    assert blocks[1][0].startswith("## Actions\n\n| Owner |")
+    assert blocks[1][2] == ["Project", "Actions"]
+    assert blocks[-1] == ("### Deep\nNested.", "text", ["Project", "Actions", "Deep"])
+
+
+def test_table_is_its_own_block():
+    blocks = _blocks(DOC)
+    assert blocks[1][1] == "table"
+    assert blocks[1][0].endswith("| Ann | Sign SOW |")
+    # text right after the table starts a new block; "#" inside a fence is not a heading
+    assert blocks[2][1] == "text"
+    assert blocks[2][0].startswith("Follow-up text.") and "# not a heading" in blocks[2][0]
+    assert blocks[2][2] == ["Project", "Actions"]
+
+
+def test_trailing_heading_and_sibling_levels():
+    blocks = _blocks("## A\ntext\n## B\n")
+    assert blocks == [("## A\ntext", "text", ["A"]), ("## B", "text", ["B"])]
+
+
+def test_tables_are_never_split():
+    rows = "\n".join(f"| r{i} | {'x' * 40} |" for i in range(40))
+    text = f"# T\n\n| a | b |\n|---|---|\n{rows}\n"
+    doc = Document(page_content=text, metadata={"source": "t.md", "file_ext": ".md"})
+
+    chunks = chunk_markdown_documents([doc], chunk_size=200, chunk_overlap=20)
+
+    assert len(chunks) == 1
+    assert chunks[0].metadata["block_type"] == "table"
+    assert chunks[0].metadata["heading_path"] == "T"
+    assert chunks[0].page_content == text.strip()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from retrieval.research_utils import merge_adjacent_results, reconstruct_documents
+
+
+DOC = "Alpha one.\nBravo two.\n\nCharlie three.Delta four. Echo five."
+
+
+def _result(source_id: str, start: int, end: int, score: float = 1.0):
+    return {
+        "source_id": source_id,
+        "content": DOC[start:end],
+        "locator": source_id,
+        "score": score,
+        "metadata": {"doc_id": "doc:x.md", "start_index": start},
+    }
+
+
+def _assert_parts_aligned(merged):
+    for p in merged["parts"]:
+        assert merged["content"][p["offset"]: p["offset"] + len(p["content"])] == p["content"], p["source_id"]
+
+
+def test_merge_offsets_after_gap_separators():
+    # chunk_1 starts 1 char after chunk_0 ends (gap 1 -> "\n\n"), chunk_2 overlaps
+    # chunk_1, chunk_3 is contained in chunk_2: later offsets must include the shift
+    results = [
+        _result("c0", 0, 10),
+        _result("c1", 11, 21),
+        _result("c2", 17, 37, score=0.5),
+        _result("c3", 23, 30),
+    ]
+    merged = merge_adjacent_results(results)
+
+    assert len(merged) == 1
+    assert [p["source_id"] for p in merged[0]["parts"]] == ["c0", "c1", "c2", "c3"]
+    assert merged[0]["score"] == 0.5
+    _assert_parts_aligned(merged[0])
+
+
+def test_merge_keeps_separate_spans_apart():
+    results = [_result("c0", 0, 10), _result("c4", 38, 49)]
+    assert merge_adjacent_results(results) == results
+
+
+def test_reconstruct_documents_fills_gaps_with_newlines():
+    rows = [
+        {"page_content": DOC[11:21], "metadata": {"doc_id": "doc:x.md", "start_index": 11, "source_id": "c1"}},
+        {"page_content": DOC[0:10], "metadata": {"doc_id": "doc:x.md", "start_index": 0, "source_id": "c0"}},
+    ]
+    doc = reconstruct_documents(rows)["doc:x.md"]
+    assert doc["text"] == DOC[:21]
+    assert [c[2] for c in doc["chunks"]] == ["c0", "c1"]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from orchestration import result_cache
+from orchestration.result_cache import ResultCache, make_cache_key
+
+
+def test_key_normalizes_whitespace_only():
+    k = make_cache_key("top5", "  Top 5\n risks ", "v1", "m")
+    assert k == make_cache_key("top5", "Top 5 risks", "v1", "m")
+    assert k != make_cache_key("top5", "Top 5 risks", "v2", "m")
+    assert k != make_cache_key(None, "Top 5 risks", "v1", "m")
+
+
+def test_values_are_copied_in_and_out():
+    cache = ResultCache(max_entries=4, ttl_s=60)
+    value = {"meta": {"n": 1}}
+    cache.put("k", value)
+    value["meta"]["n"] = 2
+
+    got, age = cache.get("k")
+    assert got == {"meta": {"n": 1}} and age >= 0
+    got["meta"]["n"] = 3
+    assert cache.get("k")[0] == {"meta": {"n": 1}}
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = ResultCache(max_entries=2, ttl_s=10)
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+
+    cache.put("a", {})
+    cache.put("b", {})
+    assert cache.get("a") is not None  # a is now most recent
+    cache.put("c", {})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+
+from orchestration.run_store import clear_runs, load_runs, record_run, run_row
+
+RESULT = {
+    "final_output": "draft",
+    "verification_notes": [],
+    "node_timings_ms": {"researcher": 12.5},
+    "meta": {
+        "result_cache": {"hit": True},
+        "retrieval_debug": {"retrieved_count": 8},
+        "citation_check": {"cited": 3},
+        "llm_usage": {"prompt_tokens": 100, "completion_tokens": 20},
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "result, kind, eval_pass, error, status",
+    [
+        (RESULT, "app", None, None, "ok"),
+        ({**RESULT, "verification_notes": ["uncited claim"]}, "app", None, None, "blocked"),
+        (RESULT, "eval", True, None, "pass"),
+        ({**RESULT, "verification_notes": ["uncited claim"]}, "eval", False, None, "fail"),
+        (RESULT, "app", True, None, "ok"),  # eval_pass only counts for eval runs
+        ({}, "app", None, "TimeoutError: slow", "error"),
+        (RESULT, "eval", True, "boom", "error"),
+    ],
+)
+def test_status_mapping(result, kind, eval_pass, error, status):
+    row = run_row(result, kind=kind, task_key="t", prompt="p", latency_ms=5, eval_pass=eval_pass, error=error)
+    assert row["status"] == status
+
+
+def test_error_row_without_result_has_zeroed_signals():
+    row = run_row(None, kind="app", task_key=None, prompt="", latency_ms=7.9, error="boom")
+    assert row["task_key"] == "default"
+    assert row["latency_ms"] == 7
+    assert (row["cache_hit"], row["chunks"], row["prompt_tokens"], row["retries"]) == (0, 0, 0, 0)
+    assert row["node_timings"] == "{}"
+
+
+def test_record_load_clear(tmp_path):
+    path = tmp_path / "runs.sqlite"
+    assert load_runs(path=path) == []
+
+    record_run(run_row(RESULT, kind="app", task_key="t", prompt="a\nb", latency_ms=10), path=path)
+    record_run(run_row(None, kind="app", task_key="t", prompt="c", latency_ms=20, error="boom"), path=path)
+
+    rows = {r["status"]: r for r in load_runs(path=path)}
+    assert sorted(rows) == ["error", "ok"]
+    ok = rows["ok"]
+    assert ok["node_timings"] == {"researcher": 12.5}
+    assert ok["prompt_preview"] == "a b"
+    assert (ok["cache_hit"], ok["chunks"], ok["citations"]) == (1, 8, 3)
+    assert len(load_runs(limit=1, path=path)) == 1
+
+    clear_runs(path=path)
+    assert load_runs(path=path) == []
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from eval.scoring import EvalCase, PhraseMatcher, score_case, score_retrieval
+
+
+def test_phrase_matcher_sees_overlapping_phrases():
+    m = PhraseMatcher(("Option A", "A vs Option B", "Option B"))
+    assert m.find("compare option a vs option b") == {"option a", "a vs option b", "option b"}
+
+
+def test_phrase_matcher_implies_contained_phrases():
+    # "risk" only ever occurs inside the longer "top risk" here, but is still found
+    m = PhraseMatcher(("top risk", "risk"))
+    assert m.find("The TOP RISK is vendor delay") == {"top risk", "risk"}
+
+
+def test_phrase_matcher_normalizes_escapes_and_dedupes():
+    m = PhraseMatcher(("Line one\\nLine two", "line one\nline two", ""))
+    assert m.phrases == ("line one\nline two",)
+    assert m.find("LINE ONE\nLINE TWO") == {"line one\nline two"}
+    assert PhraseMatcher(()).find("anything") == frozenset()
+
+
+def test_non_ascii_phrases_match():
+    case = EvalCase(
+        case_id="T-3",
+        task_key="default",
+        task_text="",
+        must_include=("€50k", "Café"),
+        must_not_include=("Überzug",),
+    )
+    assert score_case(case, "Budget €50k for the café").passed
+
+    score = score_case(case, "Budget €50k for the CAFÉ, see ÜBERZUG")
+    assert score.forbidden_found == ["Überzug"]
+    assert score.missing == []
+
+
+def test_score_case_checks_phrases_and_citation_prefixes():
+    case = EvalCase(
+        case_id="T-1",
+        task_key="default",
+        task_text="",
+        must_include=("Recommendation",),
+        must_not_include=("Not found in sources",),
+        must_cite=("doc:weekly_report_week", "doc:risks.md"),
+    )
+    text = "## Recommendation\n- go (doc:weekly_report_week13.md#chunk_2)"
+
+    score = score_case(case, text)
+    assert not score.passed
+    assert score.missing == []
+    assert score.forbidden_found == []
+    assert score.missing_citations == ["doc:risks.md"]
+
+    assert score_case(case, text + " (doc:technical_decisions.md#anchor_options) (doc:risks.md#chunk_0)").passed
+
+
+def test_score_retrieval_counts_merged_parts():
+    case = EvalCase(case_id="T-2", task_key="default", task_text="", must_cite=("doc:risks.md", "doc:faq.md"))
+    results = [
+        {"source_id": "doc:other.md#chunk_0"},
+        {"source_id": "doc:a.md#chunk_0", "parts": [{"source_id": "doc:a.md#chunk_0"}, {"source_id": "doc:risks.md#chunk_3"}]},
+    ]
+
+    score = score_retrieval(case, results, k=10)
+    assert score.ranks == {"doc:risks.md": 2}
+    assert score.recall == 0.5
+    assert score.reciprocal_rank == 0.5
+    assert score.missing == ["doc:faq.md"]
+
+    assert score_retrieval(case, results, k=1).recall == 0.0
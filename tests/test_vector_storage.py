@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import faiss
+import numpy as np
+import pytest
+
+from retrieval.vector_storage import (
+    RerankedIndex,
+    build_quantized_index,
+    load_search_index,
+    read_manifest,
+    validate_manifest,
+    write_storage,
+)
+
+
+def _vectors(n: int = 300, d: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, d)).astype("float32")
+
+
+def _flat(vectors: np.ndarray) -> faiss.Index:
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+
+@pytest.mark.parametrize("storage", ["fp16", "sq8"])
+def test_reranked_search_matches_flat(storage):
+    vectors = _vectors()
+    xq = _vectors(20, seed=1)
+    d_flat, i_flat = _flat(vectors).search(xq, 5)
+
+    index = RerankedIndex(build_quantized_index(vectors, storage), vectors, rerank_factor=8)
+    d, i = index.search(xq, 5)
+
+    assert (index.d, index.ntotal) == (32, 300)
+    np.testing.assert_array_equal(i, i_flat)
+    np.testing.assert_allclose(d, d_flat, rtol=1e-4)
+
+
+def test_unfilled_slots_look_like_faiss():
+    vectors = _vectors(3)
+    d, i = RerankedIndex(build_quantized_index(vectors, "fp16"), vectors).search(vectors[:1], 5)
+    assert list(i[0, 3:]) == [-1, -1]
+    assert d[0, 4] == np.finfo("float32").max
+
+
+def test_storage_round_trip(tmp_path):
+    vectors = _vectors()
+    flat = _flat(vectors)
+
+    manifest = write_storage(tmp_path, flat, "sq8", extra={"index_version": "v1"})
+    assert read_manifest(tmp_path) == manifest
+    index = load_search_index(tmp_path, manifest)
+    assert isinstance(index, RerankedIndex)
+    assert isinstance(index.vectors, np.memmap)
+
+    # switching back to flat removes the quantized files
+    faiss.write_index(flat, str(tmp_path / "index.faiss"))
+    manifest = write_storage(tmp_path, flat, "flat")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["index.faiss", "index_manifest.json"]
+    assert load_search_index(tmp_path, manifest).ntotal == 300
+
+    with pytest.raises(ValueError):
+        write_storage(tmp_path, flat, "pq4")
+
+
+def test_missing_manifest_means_flat(tmp_path):
+    assert read_manifest(tmp_path) == {"storage": "flat"}
+    with pytest.raises(FileNotFoundError):
+        load_search_index(tmp_path, {"storage": "fp16"})
+
+
+def test_validate_manifest_reports_every_mismatch():
+    index = _flat(_vectors())
+    manifest = {"dim": 32, "index_version": "v1", "embedding_model": "m"}
+    validate_manifest(manifest, index, n_rows=300, index_version="v1", embedding_model="m", dimensions=32)
+    validate_manifest({}, index, n_rows=300, index_version="v2", embedding_model="other", dimensions=None)
+
+    with pytest.raises(ValueError) as e:
+        validate_manifest(manifest, index, n_rows=299, index_version="v2", embedding_model="x", dimensions=16)
+    msg = str(e.value)
+    for part in ("299 rows", "different chunk metadata", "queries would use x", "EMBEDDING_DIMENSIONS=16"):
+        assert part in msg
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
+
+from retrieval.fact_parsers import extract_option_blocks
 
 
 def _pick_source_id(note: dict) -> Optional[str]:
@@ -34,67 +36,38 @@ def _collect_td_text(notes: List[dict]) -> str:
     return "\n\n".join(parts)
 
 
-def _extract_section(text: str, start: str, end: str) -> str:
-    if not text:
-        return ""
-    s = text.find(start)
-    if s == -1:
-        return ""
-    s = s + len(start)
-    e = text.find(end, s)
-    if e == -1:
-        return text[s:].strip()
-    return text[s:e].strip()
-
-
-def _extract_bullets(section_text: str) -> List[str]:
-    """
-    Extract clean bullets from a section.
-    Filters out garbage like "Pros**" / "Cons**" and empty lines.
-    """
-    bullets: List[str] = []
-    for raw in (section_text or "").splitlines():
-        line = raw.strip()
-
-        if not (line.startswith("- ") or line.startswith("* ")):
-            continue
-
-        item = line[2:].strip()
-
-        lowered = item.lower().strip("* ").strip()
-        if lowered in {"pros", "cons", "pro", "con"}:
-            continue
-
-        if not item or len(item) < 4:
-            continue
-
-        bullets.append(item)
-
-    seen = set()
-    out = []
-    for b in bullets:
-        if b in seen:
-            continue
-        seen.add(b)
-        out.append(b)
-    return out
-
-
-def build_compare_markdown(notes: List[dict]) -> str:
+def build_compare_markdown(notes: List[dict], options: Optional[List[Dict[str, Any]]] = None) -> str:
     """
     Produces EXACT required format:
       1) Option A: 2–4 bullets
       2) Option B: 2–4 bullets
       3) Recommendation: pick ONE option and give exactly 3 reasons
     Every bullet and reason must include citations.
-    """
-    td_text = _collect_td_text(notes)
-
-    opt_a_block = _extract_section(td_text, "### Option A:", "### Option B:")
-    opt_b_block = _extract_section(td_text, "### Option B:", "##")  
 
-    a_bullets = _extract_bullets(opt_a_block)
-    b_bullets = _extract_bullets(opt_b_block)
+    `options` are pre-parsed option bullets from the ingest-time fact store
+    ({"option", "position", "bullet", "source_id"}). Only rows whose source_id is
+    cited by the notes are used; otherwise the technical_decisions.md notes are
+    parsed at query time.
+    """
+    cited = {
+        c.get("source_id")
+        for n in notes or []
+        for c in (n.get("citations") or [])
+        if isinstance(c, dict)
+    }
+    grouped: Dict[str, List[str]] = {"A": [], "B": []}
+    fact_sources: Dict[str, str] = {}
+    for r in sorted(options or [], key=lambda r: (r.get("option"), r.get("position", 0))):
+        if r.get("source_id") in cited and r.get("option") in grouped:
+            grouped[r["option"]].append(r["bullet"])
+            fact_sources.setdefault(r["option"], r["source_id"])
+
+    if grouped["A"] or grouped["B"]:
+        options_by_key = grouped
+    else:
+        options_by_key = extract_option_blocks(_collect_td_text(notes))
+    a_bullets = list(options_by_key.get("A") or [])
+    b_bullets = list(options_by_key.get("B") or [])
 
     if not a_bullets:
         a_bullets = ["Not stated in sources"]
@@ -110,9 +83,17 @@ def build_compare_markdown(notes: List[dict]) -> str:
     a_bullets = _clamp_2_4(a_bullets)
     b_bullets = _clamp_2_4(b_bullets)
 
+    # cite only what this run retrieved: the option's usual chunk, else the chunk its
+    # fact rows came from, else the injected anchor (the verifier blocks ids outside the notes)
     cite_anchor = "doc:technical_decisions.md#anchor_options"
-    cite_a = "doc:technical_decisions.md#chunk_0"
-    cite_b = "doc:technical_decisions.md#chunk_1"
+
+    def _cite(option: str, chunk_sid: str) -> str:
+        if chunk_sid in cited:
+            return chunk_sid
+        return fact_sources.get(option, cite_anchor)
+
+    cite_a = _cite("A", "doc:technical_decisions.md#chunk_0")
+    cite_b = _cite("B", "doc:technical_decisions.md#chunk_1")
 
     reasons = [
         f"Strategic differentiation via full control over data model and UX ({cite_a}).",
@@ -120,9 +101,6 @@ def build_compare_markdown(notes: List[dict]) -> str:
         f"Tighter integration with product workflows ({cite_a}).",
     ]
 
-    if cite_a not in {(_pick_source_id(n) or "") for n in (notes or [])}:
-        reasons = [r.replace(f"({cite_a})", f"({cite_anchor})") for r in reasons]
-
     lines: List[str] = []
     lines.append("# Comparison of Option A vs Option B\n")
     lines.append("## Option A: 2–4 bullets")
@@ -143,8 +121,8 @@ def build_compare_markdown(notes: List[dict]) -> str:
     lines.append(f"3. {reasons[2]}")
 
     lines.append("\n## Citations")
-    lines.append(f"- ({cite_a})")
-    lines.append(f"- ({cite_b})")
+    for sid in dict.fromkeys((cite_a, cite_b)):
+        lines.append(f"- ({sid})")
 
     return "\n".join(lines).strip()
 
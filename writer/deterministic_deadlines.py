@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import List, Dict, Optional
 
+from retrieval.fact_parsers import parse_action_item_rows
+
 
 def _first_source_id(note: dict) -> Optional[str]:
     cits = note.get("citations") or []
@@ -12,7 +14,9 @@ def _first_source_id(note: dict) -> Optional[str]:
     return None
 
 
-def _parse_action_items_table_from_action_items_md(notes: List[dict]) -> List[Dict[str, str]]:
+def _parse_action_items_table_from_action_items_md(
+    notes: List[dict], facts: Optional[List[Dict[str, str]]] = None
+) -> List[Dict[str, str]]:
     """
     Deterministic extraction for extract_deadlines_and_owners.
 
@@ -22,44 +26,33 @@ def _parse_action_items_table_from_action_items_md(notes: List[dict]) -> List[Di
 
     We purposely DO NOT invent rows from roadmap/weekly reports here,
     because your requirement is: only include action items with Owner + Due Date.
+
+    `facts` are pre-parsed rows from the ingest-time fact store (with source_id);
+    rows whose source_id is one of the action_items.md notes are used as-is instead
+    of re-parsing the tables.
     """
     rows: List[Dict[str, str]] = []
 
-    for n in notes or []:
-        sid = (_first_source_id(n) or "").lower()
-        if "doc:action_items.md" not in sid:
-            continue
-
-        text = (n.get("claim") or "").strip()
-        if not text:
-            continue
-
-        lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-        table_lines = [ln for ln in lines if ln.startswith("|") and ln.endswith("|")]
+    action_notes = [n for n in notes or [] if "doc:action_items.md" in (_first_source_id(n) or "").lower()]
+    cited = {
+        c.get("source_id")
+        for n in action_notes
+        for c in (n.get("citations") or [])
+        if isinstance(c, dict)
+    }
 
-        if len(table_lines) < 3:
-            continue
-
-        data_lines = table_lines[2:]
-
-        for ln in data_lines:
-            cols = [c.strip() for c in ln.strip("|").split("|")]
-            if len(cols) < 5:
-                continue
-
-            priority, item, owner, due_date, status = cols[:5]
+    for f in facts or []:
+        if f.get("source_id") in cited:
+            rows.append({**{k: f[k] for k in ("priority", "item", "owner", "due_date", "status")}, "cite": f["source_id"]})
 
-            if not owner or not due_date:
+    if not rows:
+        for n in action_notes:
+            text = (n.get("claim") or "").strip()
+            if not text:
                 continue
 
-            rows.append({
-                "priority": priority,
-                "item": item,
-                "owner": owner,
-                "due_date": due_date,
-                "status": status,
-                "cite": _first_source_id(n) or "doc:action_items.md",
-            })
+            for r in parse_action_item_rows(text):
+                rows.append({**r, "cite": _first_source_id(n) or "doc:action_items.md"})
 
     seen = set()
     out: List[Dict[str, str]] = []
@@ -73,8 +66,8 @@ def _parse_action_items_table_from_action_items_md(notes: List[dict]) -> List[Di
     return out
 
 
-def build_deadlines_markdown(notes: List[dict]) -> str:
-    rows = _parse_action_items_table_from_action_items_md(notes)
+def build_deadlines_markdown(notes: List[dict], facts: Optional[List[Dict[str, str]]] = None) -> str:
+    rows = _parse_action_items_table_from_action_items_md(notes, facts=facts)
 
     if not rows:
         return (
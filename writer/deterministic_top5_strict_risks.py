@@ -1,30 +1,9 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
-
-RISK_ID_RE = re.compile(r"\b(R-\d{3})\s*:\s*([^\n\r]+)")
-SEVERITY_RE = re.compile(r"(?:Severity|SEVERITY)\s*[:\-]\s*(.+)", re.IGNORECASE)
-IMPACT_RE = re.compile(r"(?:Impact|IMPACT)\s*[:\-]\s*(.+)", re.IGNORECASE)
-MITIGATION_RE = re.compile(r"(?:Mitigation|MITIGATION)\s*[:\-]\s*(.+)", re.IGNORECASE)
-
-
-MD_FIELD_RE = {
-    "severity": re.compile(r"\*\*Severity\*\*\s*[:\-]\s*(.+)", re.IGNORECASE),
-    "impact": re.compile(r"\*\*Impact\*\*\s*[:\-]\s*(.+)", re.IGNORECASE),
-    "mitigation": re.compile(r"\*\*Mitigation\*\*\s*[:\-]\s*(.+)", re.IGNORECASE),
-}
-
-
-def _clean(s: Optional[str]) -> str:
-    if not s:
-        return ""
-
-    s = s.strip()
-    s = re.sub(r"^\s*[-•]\s*", "", s)
-    s = s.replace("**", "").strip()
-    return s
+from retrieval.fact_parsers import extract_risks
 
 
 def _pick_source_id(note: dict) -> str:
@@ -34,6 +13,22 @@ def _pick_source_id(note: dict) -> str:
     return ""
 
 
+def _source_id_at(note: dict, pos: int) -> str:
+    """
+    Citation for a char position inside a (possibly merged) note:
+    the last citation whose offset is <= pos. Unmerged notes have a single citation.
+    """
+    best = _pick_source_id(note)
+    best_offset = -1
+    for c in note.get("citations") or []:
+        if not isinstance(c, dict):
+            continue
+        offset = c.get("offset")
+        if isinstance(offset, int) and best_offset < offset <= pos and c.get("source_id"):
+            best, best_offset = c["source_id"], offset
+    return best
+
+
 def _pick_text(note: dict) -> str:
     for k in ("claim", "content", "text", "page_content", "snippet", "chunk_text", "passage"):
         v = note.get(k)
@@ -50,50 +45,23 @@ def _is_pricing_doc(source_id: str) -> bool:
     return "pricing_and_packaging.md" in (source_id or "").lower()
 
 
-def _extract_fields_from_window(window_text: str) -> Tuple[str, str, str]:
-    """
-    Try multiple patterns for Severity / Impact / Mitigation inside a small window of text.
-    """
-    severity = ""
-    impact = ""
-    mitigation = ""
-
-    m = SEVERITY_RE.search(window_text)
-    if m:
-        severity = _clean(m.group(1))
-
-    m = IMPACT_RE.search(window_text)
-    if m:
-        impact = _clean(m.group(1))
-
-    m = MITIGATION_RE.search(window_text)
-    if m:
-        mitigation = _clean(m.group(1))
-
-    if not severity:
-        m = MD_FIELD_RE["severity"].search(window_text)
-        if m:
-            severity = _clean(m.group(1))
-
-    if not impact:
-        m = MD_FIELD_RE["impact"].search(window_text)
-        if m:
-            impact = _clean(m.group(1))
-
-    if not mitigation:
-        m = MD_FIELD_RE["mitigation"].search(window_text)
-        if m:
-            mitigation = _clean(m.group(1))
-
-    return severity, impact, mitigation
-
-
 def _risk_order_key(risk_id: str) -> int:
     m = re.search(r"R-(\d{3})", risk_id)
     return int(m.group(1)) if m else 9999
 
 
-def build_top5_strict_risks_markdown(notes: List[dict]) -> str:
+def _risks_from_notes(risks_notes: List[dict]) -> List[Dict[str, Any]]:
+    found: List[Dict[str, Any]] = []
+    for n in risks_notes:
+        text = _pick_text(n)
+        if not text:
+            continue
+        for r in extract_risks(text):
+            found.append({**r, "source_id": _source_id_at(n, r["offset"])})
+    return found
+
+
+def build_top5_strict_risks_markdown(notes: List[dict], risks: Optional[List[Dict[str, Any]]] = None) -> str:
     """
     Deterministic strict risk builder.
 
@@ -101,6 +69,10 @@ def build_top5_strict_risks_markdown(notes: List[dict]) -> str:
     - Titles MUST come only from lines like: R-001: Something
     - Prefer risks.md citations for each risk
     - Optional: add pricing_and_packaging.md as secondary support for R-004 only
+
+    `risks` are pre-parsed rows from the ingest-time fact store (retrieval/fact_store.py).
+    Only rows whose source_id is cited by the notes are used; without any, the notes
+    are parsed at query time.
     """
     notes = notes or []
 
@@ -121,41 +93,44 @@ def build_top5_strict_risks_markdown(notes: List[dict]) -> str:
     extracted: Dict[str, Dict[str, str]] = {}
     risk_citations: Dict[str, List[str]] = {}
 
-    for n in risks_notes:
-        source_id = _pick_source_id(n)
-        text = _pick_text(n)
-        if not text:
-            continue
-
-        for match in RISK_ID_RE.finditer(text):
-            rid = match.group(1).strip()
-            title = _clean(match.group(2))
-
-            start = match.start()
-            window = text[start : start + 600]
-
-            severity, impact, mitigation = _extract_fields_from_window(window)
-
-            if rid not in extracted:
-                extracted[rid] = {
-                    "title": title,
-                    "severity": severity or "Not found in sources",
-                    "impact": impact or "Not found in sources",
-                    "mitigation": mitigation or "Not found in sources",
-                }
-                risk_citations[rid] = [source_id] if source_id else []
-            else:
-                if extracted[rid].get("title") in ("", "Not found in sources") and title:
-                    extracted[rid]["title"] = title
-                if extracted[rid]["severity"] == "Not found in sources" and severity:
-                    extracted[rid]["severity"] = severity
-                if extracted[rid]["impact"] == "Not found in sources" and impact:
-                    extracted[rid]["impact"] = impact
-                if extracted[rid]["mitigation"] == "Not found in sources" and mitigation:
-                    extracted[rid]["mitigation"] = mitigation
-
-                if source_id and source_id not in risk_citations[rid]:
-                    risk_citations[rid].append(source_id)
+    cited = {
+        c.get("source_id")
+        for n in risks_notes
+        for c in (n.get("citations") or [])
+        if isinstance(c, dict)
+    }
+    found = [r for r in (risks or []) if r.get("source_id") in cited]
+    if not found:
+        found = _risks_from_notes(risks_notes)
+
+    for r in found:
+        source_id = r.get("source_id") or ""
+        rid = r["risk_id"]
+        title = r.get("title") or ""
+        severity = r.get("severity") or ""
+        impact = r.get("impact") or ""
+        mitigation = r.get("mitigation") or ""
+
+        if rid not in extracted:
+            extracted[rid] = {
+                "title": title,
+                "severity": severity or "Not found in sources",
+                "impact": impact or "Not found in sources",
+                "mitigation": mitigation or "Not found in sources",
+            }
+            risk_citations[rid] = [source_id] if source_id else []
+        else:
+            if extracted[rid].get("title") in ("", "Not found in sources") and title:
+                extracted[rid]["title"] = title
+            if extracted[rid]["severity"] == "Not found in sources" and severity:
+                extracted[rid]["severity"] = severity
+            if extracted[rid]["impact"] == "Not found in sources" and impact:
+                extracted[rid]["impact"] = impact
+            if extracted[rid]["mitigation"] == "Not found in sources" and mitigation:
+                extracted[rid]["mitigation"] = mitigation
+
+            if source_id and source_id not in risk_citations[rid]:
+                risk_citations[rid].append(source_id)
                     
     risk_ids = sorted(extracted.keys(), key=_risk_order_key)[:5]
 
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+WRITER_MODEL = "gpt-4o-mini"
+
+# Token budget for the Evidence block of LLM writer prompts, per task_key.
+# Deterministic writers (compare / deadlines / strict risks) never build a prompt.
+DEFAULT_TOKEN_BUDGET = 4000
+TASK_TOKEN_BUDGETS: Dict[str, int] = {
+    "top_risks_mitigations": 3500,
+    "client_update_email": 3000,
+    "draft_confluence_page": 5000,
+}
+
+# Below this many remaining tokens a chunk is dropped instead of trimmed.
+MIN_TRIM_TOKENS = 80
+
+
+def get_token_budget(task_key: Optional[str]) -> int:
+    """
+    EVIDENCE_TOKEN_BUDGET (env) overrides every task; otherwise per-task budget.
+    """
+    override = os.getenv("EVIDENCE_TOKEN_BUDGET", "").strip()
+    if override.isdigit():
+        return int(override)
+    return TASK_TOKEN_BUDGETS.get((task_key or "").strip(), DEFAULT_TOKEN_BUDGET)
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(WRITER_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken unavailable or encoding files cannot be fetched: fall back to ~4 chars/token
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _get_encoding()
+    if enc is None:
+        return (len(text or "") + 3) // 4
+    return len(enc.encode(text or ""))
+
+
+def _trim_to_tokens(text: str, max_tokens: int) -> str:
+    enc = _get_encoding()
+    if enc is None:
+        return text[: max_tokens * 4]
+    return enc.decode(enc.encode(text)[:max_tokens])
+
+
+def pack_evidence(notes: List[dict], task_key: Optional[str] = None) -> Tuple[List[dict], Dict[str, Any]]:
+    """
+    Select notes for the writer prompt under the task's token budget.
+
+    - adjacent chunks of one document arrive already merged by the researcher
+      (retrieval/research_utils.py::merge_adjacent_results)
+    - notes are ranked by retrieval score (FAISS L2 distance, lower is better);
+      notes without a score (injected anchors) rank first
+    - notes are kept in rank order while they fit; a note that does not fit is
+      trimmed to the remaining budget if at least MIN_TRIM_TOKENS remain,
+      otherwise skipped, and packing continues with the next (shorter) notes
+    Returns (packed_notes, stats).
+    """
+    budget = get_token_budget(task_key)
+    candidates = [
+        n for n in notes or []
+        if isinstance(n, Mapping) and (n.get("claim") or "").strip() and n.get("citations")
+    ]
+
+    def _rank(n: dict) -> float:
+        s = n.get("score")
+        return float(s) if isinstance(s, (int, float)) else float("-inf")
+
+    ranked = sorted(candidates, key=_rank)
+
+    packed: List[dict] = []
+    used = 0
+    trimmed = 0
+
+    for n in ranked:
+        claim = (n.get("claim") or "").strip()
+        cost = count_tokens(claim)
+        remaining = budget - used
+
+        if cost <= remaining:
+            packed.append(n)
+            used += cost
+            continue
+
+        if remaining >= MIN_TRIM_TOKENS:
+            short = _trim_to_tokens(claim, remaining - 2).rstrip() + " ..."
+            packed.append({**n, "claim": short})
+            used += count_tokens(short)
+            trimmed += 1
+
+    stats = {
+        "task_key": task_key,
+        "token_budget": budget,
+        "tokens_used": used,
+        "input_notes": len(notes or []),
+        "candidate_notes": len(candidates),
+        "packed_notes": len(packed),
+        "trimmed_notes": trimmed,
+        "dropped_notes": len(candidates) - len(packed),
+    }
+    return packed, stats